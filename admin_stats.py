@@ -0,0 +1,182 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import case, func, select, true
+from sqlalchemy.dialects.sqlite import insert
+
+from models import db, Pizza, Order, StatCounter, SalesBucket, write_lane
+
+COUNTER_NAMES = ['total_pizzas', 'available_pizzas', 'total_orders', 'pending_orders']
+RECONCILED_AT = 'reconciled_at'
+
+def aggregate_stats():
+    # Один запит замість чотирьох окремих COUNT(*)
+    pizzas = select(
+        func.count(Pizza.id),
+        func.coalesce(func.sum(case((Pizza.available == True, 1), else_=0)), 0)
+    ).subquery()
+    orders = select(
+        func.count(Order.id),
+        func.coalesce(func.sum(case((Order.status == 'pending', 1), else_=0)), 0)
+    ).subquery()
+    row = db.session.execute(
+        select(pizzas, orders).select_from(pizzas.join(orders, true()))
+    ).one()
+    return dict(zip(COUNTER_NAMES, (int(value) for value in row)))
+
+def add_to_counters(**deltas):
+    for name, delta in deltas.items():
+        if not delta:
+            continue
+        db.session.execute(
+            insert(StatCounter)
+            .values(name=name, value=delta)
+            .on_conflict_do_update(
+                index_elements=[StatCounter.name],
+                set_={'value': StatCounter.value + delta}
+            )
+        )
+
+def hour_bucket(moment):
+    return moment.replace(minute=0, second=0, microsecond=0)
+
+def record_orders(orders):
+    # orders: пари (created_at, total_amount), записуються в тій самій транзакції
+    buckets = {}
+    for created_at, total_amount in orders:
+        bucket = buckets.setdefault(hour_bucket(created_at), [0, 0.0])
+        bucket[0] += 1
+        bucket[1] += total_amount
+
+    for hour, (count, revenue) in buckets.items():
+        db.session.execute(
+            insert(SalesBucket)
+            .values(hour=hour, orders=count, revenue=revenue)
+            .on_conflict_do_update(
+                index_elements=[SalesBucket.hour],
+                set_={
+                    'orders': SalesBucket.orders + count,
+                    'revenue': SalesBucket.revenue + revenue
+                }
+            )
+        )
+    add_to_counters(total_orders=len(orders), pending_orders=len(orders))
+
+def record_order(total_amount, created_at=None):
+    record_orders([(created_at or datetime.utcnow(), total_amount)])
+
+def record_pizza_change(was_available=None, is_available=None):
+    # None означає, що піци до (або після) зміни не існувало
+    add_to_counters(
+        total_pizzas=(is_available is not None) - (was_available is not None),
+        available_pizzas=bool(is_available) - bool(was_available)
+    )
+
+def reconcile_counters():
+    stats = aggregate_stats()
+    values = dict(stats, **{RECONCILED_AT: time.time()})
+    for name, value in values.items():
+        db.session.execute(
+            insert(StatCounter)
+            .values(name=name, value=value)
+            .on_conflict_do_update(index_elements=[StatCounter.name], set_={'value': value})
+        )
+    return stats
+
+def rebuild_sales_buckets():
+    db.session.execute(SalesBucket.__table__.delete())
+    hour = func.strftime('%Y-%m-%d %H:00:00.000000', Order.created_at)
+    db.session.execute(
+        insert(SalesBucket).from_select(
+            ['hour', 'orders', 'revenue'],
+            select(hour, func.count(Order.id), func.sum(Order.total_amount))
+            .where(Order.created_at.isnot(None))
+            .group_by(hour)
+        )
+    )
+
+def reconcile_counters_locked(max_age=0):
+    # Повні агрегати лише поза запитами сторінок. BEGIN IMMEDIATE до читання:
+    # приріст від замовлення з іншого воркера не загубиться між COUNT і перезаписом.
+    # Кілька воркерів не рахують двічі - свіжа позначка часу означає, що вже звірено.
+    with write_lane:
+        db.session.connection().exec_driver_sql('BEGIN IMMEDIATE')
+        try:
+            reconciled_at = db.session.execute(
+                select(StatCounter.value).where(StatCounter.name == RECONCILED_AT)
+            ).scalar()
+            if reconciled_at is not None and time.time() - reconciled_at < max_age:
+                db.session.rollback()
+                return None
+            stats = reconcile_counters()
+            db.session.commit()
+            return stats
+        except Exception:
+            db.session.rollback()
+            raise
+
+class CounterReconciler:
+    # Фонова звірка лічильників з таблицями раз на interval секунд
+
+    def __init__(self, app, interval=600):
+        self.app = app
+        self.interval = interval
+        self.stats = {'runs': 0, 'errors': 0}
+        self._thread = None
+        self._start_lock = threading.Lock()
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            with self.app.app_context():
+                try:
+                    if reconcile_counters_locked(self.interval) is not None:
+                        self.stats['runs'] += 1
+                except Exception:
+                    self.stats['errors'] += 1
+                finally:
+                    db.session.remove()
+            time.sleep(self.interval)
+
+def get_counters():
+    values = dict(db.session.execute(select(StatCounter.name, StatCounter.value)).all())
+    return {name: int(values.get(name, 0)) for name in COUNTER_NAMES}
+
+def get_sales_summary(days=7, hours=24, now=None):
+    now = now or datetime.utcnow()
+    current_hour = hour_bucket(now)
+    since = current_hour - timedelta(days=days - 1, hours=current_hour.hour)
+
+    rows = db.session.execute(
+        select(SalesBucket.hour, SalesBucket.orders, SalesBucket.revenue)
+        .where(SalesBucket.hour >= since)
+        .order_by(SalesBucket.hour)
+    ).all()
+
+    revenue_per_day = {}
+    orders_per_hour = {}
+    hours_since = current_hour - timedelta(hours=hours - 1)
+    for hour, orders, revenue in rows:
+        day = hour.date()
+        revenue_per_day[day] = revenue_per_day.get(day, 0.0) + revenue
+        if hour >= hours_since:
+            orders_per_hour[hour] = orders
+
+    return {
+        'revenue_per_day': [
+            {'day': day, 'revenue': round(revenue_per_day.get(day, 0.0), 2)}
+            for day in ((since + timedelta(days=i)).date() for i in range(days))
+        ],
+        'orders_per_hour': [
+            {'hour': hour, 'orders': orders_per_hour.get(hour, 0)}
+            for hour in (hours_since + timedelta(hours=i) for i in range(hours))
+        ],
+    }
@@ -1,82 +1,304 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash
-from flask_sqlalchemy import SQLAlchemy
+from flask import (Flask, Blueprint, Response, current_app, render_template, request, jsonify,
+                   redirect, url_for, flash, stream_with_context)
+import click
+import sys
 from dotenv import load_dotenv
+from functools import wraps
+from sqlalchemy.exc import IntegrityError
 import os
-from models import db, Pizza, Order, OrderItem, Poll, PollVote
-from weather_service import WeatherService, get_weather_icon_emoji
+from models import (db, Pizza, Order, OrderItem, Poll, PollVote,
+                    sqlite_engine_options, install_sqlite_pragmas, write_lane)
+from recommendations import PizzaRecommender
+from menu_cache import MenuCache
+from order_service import (OrderValidationError, parse_order, load_available_prices,
+                           price_order, insert_order, format_order_id)
+from migrations import upgrade_database
+from poll_tally import increment_tally, rebuild_tally, get_tally, build_poll_results
+from poll_stream import SSE_HEADERS
+from pagination import keyset_page, parse_per_page
+from sqlalchemy.orm import selectinload
+from order_export import ExportError, parse_date_range, export_chunks, export_filename
+from pizza_search import SearchError, parse_search_params, search_pizzas, rebuild_search_index
+from fragment_cache import FragmentCacheExtension, StaticPageCache
+from metrics import Metrics, SlowRequestProfiler
+from admin_stats import (record_order, record_pizza_change, get_counters, get_sales_summary,
+                         reconcile_counters, reconcile_counters_locked)
+from services import AppBound, Services
+from rate_limit import AdmissionControl
+from popularity import PopularityTracker
+from kitchen_feed import (KitchenError, MAX_WAIT, record_changes, load_snapshot, load_changes,
+                          parse_status, transition_order)
 
 load_dotenv()
 
-app = Flask(__name__)
+# Маршрути і CLI-команди; cli_group=None лишає команди на верхньому рівні (flask init-db)
+views = Blueprint('main', __name__, cli_group=None)
 
-app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
-app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///oderman.db')
-app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+def create_metrics(app):
+    profiler = None
+    if app.config['PROFILE_SLOW_REQUEST_MS'] > 0:
+        profiler = SlowRequestProfiler(
+            app.config['PROFILE_SLOW_REQUEST_MS'] / 1000, app.config['PROFILE_DIR'],
+            interval=float(os.getenv('PROFILE_SAMPLE_INTERVAL_MS', '5')) / 1000
+        )
+    app_metrics = Metrics(profiler)
+    if app.config['METRICS_ENABLED']:
+        with app.app_context():
+            engine = db.engine
+        app_metrics.init_app(app, engine)
+    return app_metrics
+
+# Кеші, метрики, ліміти й сервіси залежать від бази та конфігурації - свої в кожного застосунку
+metrics = AppBound('oderman_metrics', create_metrics)
+recommender = AppBound('oderman_recommender', lambda app: PizzaRecommender())
+static_pages = AppBound('oderman_static_pages', lambda app: StaticPageCache())
+menu_cache = AppBound('oderman_menu_cache', lambda app: MenuCache(
+    check_interval=float(os.getenv('MENU_CACHE_CHECK_INTERVAL', '2'))
+))
+popularity = AppBound('oderman_popularity', lambda app: PopularityTracker(
+    check_interval=float(os.getenv('POPULARITY_CHECK_INTERVAL', '2')),
+    top_size=int(os.getenv('POPULARITY_TOP_SIZE', '3'))
+))
+admission = AppBound('oderman_admission', AdmissionControl)
+services = AppBound('oderman_services', lambda app: Services(app, metrics.get(app), menu_cache.get(app)))
+
+def create_app(test_config=None):
+    # Лише конфігурація і реєстрація: жодних звернень до бази, потоків чи мережі.
+    # Схема і тестові дані створюються один раз командою flask init-db.
+    app = Flask(__name__)
+
+    app.config['SECRET_KEY'] = os.getenv('SECRET_KEY', 'dev-secret-key')
+    app.config['SQLALCHEMY_DATABASE_URI'] = os.getenv('DATABASE_URL', 'sqlite:///oderman.db')
+    app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['DB_PROFILE'] = os.getenv('DB_PROFILE', 'default')
+    app.config['API_PIZZAS_MAX_AGE'] = int(os.getenv('API_PIZZAS_MAX_AGE', '60'))
+    app.config['STATS_RECONCILE_INTERVAL'] = int(os.getenv('STATS_RECONCILE_INTERVAL', '600'))
+    app.config['ORDER_INGESTION_MODE'] = os.getenv('ORDER_INGESTION_MODE', 'sync')
+    app.config['POLL_VOTE_MODE'] = os.getenv('POLL_VOTE_MODE', 'sync')
+    app.config['POLL_VOTE_SEEN_PATH'] = os.getenv('POLL_VOTE_SEEN_PATH', os.path.join(app.instance_path, 'poll_votes.bloom'))
+    app.config['ORDER_QUEUE_PATH'] = os.getenv('ORDER_QUEUE_PATH', os.path.join(app.instance_path, 'order_queue.db'))
+    app.config['TEMPLATE_CACHE'] = os.getenv('TEMPLATE_CACHE', '1') == '1'
+    app.config['METRICS_ENABLED'] = os.getenv('METRICS_ENABLED', '1') == '1'
+    app.config['PROFILE_SLOW_REQUEST_MS'] = int(os.getenv('PROFILE_SLOW_REQUEST_MS', '0'))
+    app.config['PROFILE_DIR'] = os.getenv('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+    app.config['RATE_LIMIT_ENABLED'] = os.getenv('RATE_LIMIT_ENABLED', '1') == '1'
+    # Ендпоінт: (запитів за хвилину з одного IP, запас на сплеск)
+    app.config['RATE_LIMITS'] = {
+        'main.create_order': (int(os.getenv('ORDER_RATE_PER_MINUTE', '10')), int(os.getenv('ORDER_RATE_BURST', '5'))),
+        'main.poll_vote': (int(os.getenv('VOTE_RATE_PER_MINUTE', '6')), int(os.getenv('VOTE_RATE_BURST', '3'))),
+    }
+    app.config['RATE_LIMIT_REDIRECTS'] = {'main.poll_vote': 'main.poll_page'}
+    app.config['RATE_LIMIT_MAX_KEYS'] = int(os.getenv('RATE_LIMIT_MAX_KEYS', '100000'))
+    app.config['WRITE_CONCURRENCY'] = int(os.getenv('WRITE_CONCURRENCY', '4'))
+    app.config['WRITE_QUEUE_TIMEOUT'] = float(os.getenv('WRITE_QUEUE_TIMEOUT', '0.05'))
+    if test_config:
+        app.config.update(test_config)
+    app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', sqlite_engine_options(app.config['DB_PROFILE']))
+
+    db.init_app(app)
+    app.jinja_env.add_extension(FragmentCacheExtension)
+
+    if app.config['DB_PROFILE'] == 'production':
+        # Рушій створюється без з'єднання; PRAGMA виконаються при першому підключенні
+        with app.app_context():
+            install_sqlite_pragmas(db.engine)
+    write_lane.init_app(app, enabled=app.config['DB_PROFILE'] == 'production')
+
+    metrics.init_app(app)
+    admission.init_app(app)
 
-db.init_app(app)
+    menu_cache.init_app(app)
+    recommender.init_app(app)
+    static_pages.init_app(app)
+    popularity.init_app(app)
+    services.init_app(app)
+    app.register_blueprint(views)
+    return app
 
-weather_service = WeatherService(
-    api_key=os.getenv('OPENWEATHER_API_KEY', 'demo-key'),
-    city=os.getenv('PIZZERIA_CITY', 'Kyiv'),
-    country=os.getenv('PIZZERIA_COUNTRY', 'UA')
-)
+def serialized_write(view):
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if request.method != 'POST':
+            return view(*args, **kwargs)
+        with write_lane:
+            return view(*args, **kwargs)
+    return wrapper
 
-@app.route('/')
+@views.route('/')
 def index():
-    weather_data = weather_service.get_current_weather()
-    pizza_recommendation = weather_service.get_pizza_recommendation(weather_data)
+    from weather_service import get_weather_icon_emoji
+
+    locations = None
+    current_location = None
+    weather_scheduler = services.weather_scheduler
+    with metrics.timer('weather'):
+        if weather_scheduler is not None:
+            # Погода вже завантажена планувальником - запит лише читає її з пам'яті
+            current_location = weather_scheduler.resolve_key(
+                request.args.get('location') or request.cookies.get('location')
+            )
+            locations = weather_scheduler.locations.values()
+            weather_data = weather_scheduler.get_weather(current_location)
+            weather_available = True
+        else:
+            weather_service = services.weather_service
+            weather_data = weather_service.get_current_weather()
+            weather_available = not weather_service.circuit_breaker.is_open()
+    pizza_recommendation = recommender.recommend(
+        weather_data, menu_cache.get_snapshot(), weather_available=weather_available
+    )
     
     if weather_data.get('success') and weather_data.get('icon'):
         weather_data['emoji'] = get_weather_icon_emoji(weather_data['icon'])
     
-    return render_template('index.html', 
+    response = current_app.make_response(render_template('index.html', 
                          weather=weather_data, 
-                         recommendation=pizza_recommendation)
+                         recommendation=pizza_recommendation,
+                         locations=locations,
+                         current_location=current_location))
+    if request.args.get('location') == current_location and current_location is not None:
+        response.set_cookie('location', current_location, max_age=365 * 24 * 3600, samesite='Lax')
+    return response
 
-@app.route('/menu')
+@views.route('/menu')
 def menu():
-    pizzas = Pizza.query.filter_by(available=True).all()
-    pizzas_dict = [pizza.to_dict() for pizza in pizzas]
-    return render_template('menu.html', pizzas=pizzas_dict)
+    return render_template('menu.html', **menu_context())
 
-@app.route('/menu/cards')
+@views.route('/menu/cards')
 def menu_cards():
-    pizzas = Pizza.query.filter_by(available=True).all()
-    pizzas_dict = [pizza.to_dict() for pizza in pizzas]
-    return render_template('menu_cards.html', pizzas=pizzas_dict)
+    return render_template('menu_cards.html', **menu_context())
+
+def menu_context():
+    # Позначка "Популярна" і порядок "у тренді" - з реальних продажів, а не з ручного прапорця
+    snapshot = menu_cache.get_snapshot()
+    popular = popularity.get_snapshot()
+    sort = 'trending' if request.args.get('sort') == 'trending' else 'default'
+    return {
+        'pizzas': popular.sort(snapshot.pizzas) if sort == 'trending' else snapshot.pizzas,
+        'menu': snapshot,
+        'menu_version': snapshot.version,
+        'popularity': popular,
+        'sort': sort,
+    }
 
-@app.route('/api/pizzas')
+SEARCH_PARAMS = ('q', 'category', 'max_price', 'page', 'per_page')
+
+@views.route('/api/pizzas')
 def api_pizzas():
-    pizzas = Pizza.query.filter_by(available=True).all()
-    pizzas_dict = [pizza.to_dict() for pizza in pizzas]
-    return jsonify(pizzas_dict)
+    if any(name in request.args for name in SEARCH_PARAMS):
+        return api_search_pizzas()
+    if request.args.get('sort') == 'trending':
+        return api_trending_pizzas()
+
+    snapshot = menu_cache.get_snapshot()
+    body, encoding, etag = snapshot.encoded_body(request.accept_encodings)
+
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype='application/json')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
 
-@app.route('/order')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f"public, max-age={current_app.config['API_PIZZAS_MAX_AGE']}"
+    response.vary.add('Accept-Encoding')
+    return response
+
+def api_trending_pizzas():
+    body, etag = popularity.get_snapshot().trending_body(menu_cache.get_snapshot())
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        response = current_app.response_class(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Продажі змінюються постійно - клієнт щоразу перевіряє ETag
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def api_search_pizzas():
+    try:
+        query, category, max_price, page = parse_search_params(request.args)
+    except SearchError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    per_page = parse_per_page(request.args.get('per_page'))
+    pizzas, next_page = search_pizzas(query, category, max_price, page, per_page)
+    return jsonify({
+        'pizzas': [pizza.to_dict() for pizza in pizzas],
+        'page': page,
+        'per_page': per_page,
+        'next_page': next_page,
+    })
+
+@views.route('/order')
 def order_form():
-    return render_template('order.html')
+    return static_pages.render('order.html')
 
-@app.route('/admin')
+@views.route('/admin')
 def admin_dashboard():
-    total_pizzas = Pizza.query.count()
-    available_pizzas = Pizza.query.filter_by(available=True).count()
-    total_orders = Order.query.count()
-    pending_orders = Order.query.filter_by(status='pending').count()
-    
-    stats = {
-        'total_pizzas': total_pizzas,
-        'available_pizzas': available_pizzas,
-        'total_orders': total_orders,
-        'pending_orders': pending_orders
-    }
+    stats = get_counters()
+    sales = get_sales_summary()
     
-    return render_template('admin/dashboard.html', stats=stats)
+    return render_template('admin/dashboard.html', stats=stats, sales=sales)
 
-@app.route('/admin/pizzas')
+@views.route('/admin/pizzas')
 def admin_pizzas():
-    pizzas = Pizza.query.all()
-    return render_template('admin/pizzas.html', pizzas=pizzas)
+    pizzas, next_cursor = keyset_page(
+        Pizza.query, Pizza,
+        cursor=request.args.get('cursor'),
+        per_page=parse_per_page(request.args.get('per_page'))
+    )
+    return render_template('admin/pizzas.html', pizzas=pizzas, next_cursor=next_cursor)
 
-@app.route('/admin/pizzas/add', methods=['GET', 'POST'])
+ORDER_STATUSES = {
+    'pending': 'Нове',
+    'preparing': 'Готується',
+    'ready': 'Готове',
+    'delivering': 'Доставляється',
+    'delivered': 'Доставлено',
+    'cancelled': 'Скасовано',
+}
+
+@views.route('/admin/orders')
+def admin_orders():
+    status = request.args.get('status')
+    query = Order.query.options(
+        # Позиції та піци всієї сторінки підтягуються одним додатковим запитом
+        selectinload(Order.items).joinedload(OrderItem.pizza)
+    )
+    if status:
+        query = query.filter(Order.status == status)
+
+    orders, next_cursor = keyset_page(
+        query, Order,
+        cursor=request.args.get('cursor'),
+        per_page=parse_per_page(request.args.get('per_page')),
+        descending=True
+    )
+    return render_template('admin/orders.html', orders=orders, next_cursor=next_cursor,
+                           status=status, statuses=ORDER_STATUSES)
+
+@views.route('/admin/orders/export')
+def admin_export_orders():
+    export_format = request.args.get('format', 'csv')
+    compress = request.args.get('gzip') == '1'
+    try:
+        start, end = parse_date_range(request.args.get('from'), request.args.get('to'))
+        chunks = export_chunks(export_format, start, end, compress)
+    except ExportError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    response = Response(stream_with_context(chunks), mimetype=mimetype)
+    if compress:
+        # Файл .gz, а не Content-Encoding: браузер збереже його стиснутим
+        response.mimetype = 'application/gzip'
+    response.headers['Content-Disposition'] = f'attachment; filename={export_filename(export_format, compress)}'
+    return response
+
+@views.route('/admin/pizzas/add', methods=['GET', 'POST'])
+@serialized_write
 def admin_add_pizza():
     if request.method == 'POST':
         try:
@@ -92,22 +314,28 @@ def admin_add_pizza():
             )
             
             db.session.add(pizza)
+            db.session.flush()
+            record_pizza_change(None, pizza.available)
+            menu_cache.invalidate()
             db.session.commit()
+            menu_cache.expire()
             
             flash(f'Піца "{pizza.name}" успішно додана!', 'success')
-            return redirect(url_for('admin_pizzas'))
+            return redirect(url_for('main.admin_pizzas'))
             
         except Exception as e:
             flash(f'Помилка при додаванні піци: {str(e)}', 'error')
     
     return render_template('admin/add_pizza.html')
 
-@app.route('/admin/pizzas/edit/<int:pizza_id>', methods=['GET', 'POST'])
+@views.route('/admin/pizzas/edit/<int:pizza_id>', methods=['GET', 'POST'])
+@serialized_write
 def admin_edit_pizza(pizza_id):
     pizza = Pizza.query.get_or_404(pizza_id)
     
     if request.method == 'POST':
         try:
+            was_available = pizza.available
             pizza.name = request.form['name']
             pizza.ingredients = request.form['ingredients']
             pizza.price = float(request.form['price'])
@@ -118,57 +346,66 @@ def admin_edit_pizza(pizza_id):
             pizza.available = bool(request.form.get('available'))
             pizza.image_url = request.form.get('image_url')
             
+            record_pizza_change(was_available, pizza.available)
+            menu_cache.invalidate()
             db.session.commit()
+            menu_cache.expire()
             
             flash(f'Піца "{pizza.name}" успішно оновлена!', 'success')
-            return redirect(url_for('admin_pizzas'))
+            return redirect(url_for('main.admin_pizzas'))
             
         except Exception as e:
             flash(f'Помилка при оновленні піци: {str(e)}', 'error')
     
     return render_template('admin/edit_pizza.html', pizza=pizza)
 
-@app.route('/admin/pizzas/delete/<int:pizza_id>', methods=['POST'])
+@views.route('/admin/pizzas/delete/<int:pizza_id>', methods=['POST'])
+@serialized_write
 def admin_delete_pizza(pizza_id):
     try:
         pizza = Pizza.query.get_or_404(pizza_id)
         pizza_name = pizza.name
         
         db.session.delete(pizza)
+        record_pizza_change(pizza.available, None)
+        menu_cache.invalidate()
         db.session.commit()
+        menu_cache.expire()
         
         flash(f'Піца "{pizza_name}" успішно видалена!', 'success')
     except Exception as e:
         flash(f'Помилка при видаленні піци: {str(e)}', 'error')
     
-    return redirect(url_for('admin_pizzas'))
+    return redirect(url_for('main.admin_pizzas'))
 
 
-@app.route('/poll')
+@views.route('/poll')
 def poll_page():
     poll = Poll.query.filter_by(active=True).first()
     if not poll:
         flash('Наразі немає активних опитувань', 'info')
-        return redirect(url_for('index'))
+        return redirect(url_for('main.index'))
     
-    pizzas = Pizza.query.filter_by(available=True).all()
-    return render_template('poll.html', poll=poll, pizzas=pizzas)
+    snapshot = menu_cache.get_snapshot()
+    return render_template('poll.html', poll=poll, pizzas=snapshot.pizzas, menu_version=snapshot.version)
 
-@app.route('/poll/vote', methods=['POST'])
+@views.route('/poll/vote', methods=['POST'])
 def poll_vote():
     try:
-        poll_id = request.form.get('poll_id')
-        pizza_id = request.form.get('pizza_id')
+        poll_id = int(request.form.get('poll_id'))
+        pizza_id = int(request.form.get('pizza_id'))
         voter_ip = request.remote_addr
         
-        existing_vote = PollVote.query.filter_by(
-            poll_id=poll_id, 
-            voter_ip=voter_ip
-        ).first()
-        
-        if existing_vote:
-            flash('Ви вже голосували в цьому опитуванні!', 'warning')
-            return redirect(url_for('poll_page'))
+        if services.vote_buffer is not None:
+            if pizza_id not in menu_cache.get_snapshot().by_id:
+                flash('Оберіть піцу з меню', 'error')
+                return redirect(url_for('main.poll_page'))
+            if not services.vote_buffer.submit(poll_id, pizza_id, voter_ip):
+                flash('Ви вже голосували в цьому опитуванні!', 'warning')
+                return redirect(url_for('main.poll_page'))
+            
+            flash('Дякуємо за участь в опитуванні!', 'success')
+            return redirect(url_for('main.poll_results'))
         
         vote = PollVote(
             poll_id=poll_id,
@@ -176,53 +413,36 @@ def poll_vote():
             voter_ip=voter_ip
         )
         
-        db.session.add(vote)
-        db.session.commit()
+        with write_lane:
+            db.session.add(vote)
+            db.session.flush()
+            increment_tally(vote.poll_id, vote.pizza_id)
+            db.session.commit()
+        services.poll_publisher.notify()
         
         flash('Дякуємо за участь в опитуванні!', 'success')
-        return redirect(url_for('poll_results'))
+        return redirect(url_for('main.poll_results'))
         
+    except IntegrityError:
+        # Унікальний індекс (poll_id, voter_ip) замість попереднього SELECT
+        db.session.rollback()
+        flash('Ви вже голосували в цьому опитуванні!', 'warning')
+        return redirect(url_for('main.poll_page'))
     except Exception as e:
+        db.session.rollback()
         flash(f'Помилка при голосуванні: {str(e)}', 'error')
-        return redirect(url_for('poll_page'))
+        return redirect(url_for('main.poll_page'))
 
-@app.route('/poll/results')
+@views.route('/poll/results')
 def poll_results():
     poll = Poll.query.filter_by(active=True).first()
     if not poll:
         flash('Немає активних опитувань для відображення результатів', 'info')
-        return redirect(url_for('index'))
-    
-    from sqlalchemy import func
-    vote_results = db.session.query(
-        Pizza,
-        func.count(PollVote.id).label('votes')
-    ).outerjoin(
-        PollVote, (Pizza.id == PollVote.pizza_id) & (PollVote.poll_id == poll.id)
-    ).filter(
-        Pizza.available == True
-    ).group_by(
-        Pizza.id
-    ).order_by(
-        func.count(PollVote.id).desc()
-    ).all()
+        return redirect(url_for('main.index'))
     
-    total_votes = sum([result.votes for result in vote_results])
-    
-    results = []
-    winner = None
-    
-    for pizza, votes in vote_results:
-        percentage = (votes / total_votes * 100) if total_votes > 0 else 0
-        result = {
-            'pizza': pizza,
-            'votes': votes,
-            'percentage': percentage
-        }
-        results.append(result)
-        
-        if not winner and votes > 0:
-            winner = pizza
+    results, total_votes, winner = build_poll_results(
+        menu_cache.get_pizzas(), get_tally(poll.id)
+    )
     
     return render_template('poll_results.html', 
                          poll=poll, 
@@ -230,76 +450,57 @@ def poll_results():
                          total_votes=total_votes,
                          winner=winner)
 
-@app.route('/demo')
+@views.route('/poll/results/stream')
+def poll_results_stream():
+    return Response(
+        services.poll_publisher.stream(),
+        mimetype='text/event-stream',
+        headers=SSE_HEADERS
+    )
+
+@views.route('/demo')
 def jinja_demo():
-    return render_template('jinja_demo.html')
+    return static_pages.render('jinja_demo.html')
 
-@app.route('/api/order', methods=['POST'])
+@views.route('/api/order', methods=['POST'])
 def create_order():
     try:
-        data = request.get_json()
-        
-        if not data or not data.get('items') or not data.get('customer'):
-            return jsonify({
-                'status': 'error',
-                'message': 'Неповні дані замовлення'
-            }), 400
-        
-        customer = data['customer']
-        items = data['items']
-        required_fields = ['name', 'phone', 'address']
-        for field in required_fields:
-            if not customer.get(field):
-                return jsonify({
-                    'status': 'error',
-                    'message': f'Поле "{field}" є обов\'язковим'
-                }), 400
-        
-        total_amount = 0
-        order = Order(
-            customer_name=customer['name'],
-            customer_phone=customer['phone'],
-            customer_address=customer['address'],
-            customer_email=customer.get('email', ''),
-            notes=customer.get('notes', ''),
-            status='pending'
-        )
-        
-        db.session.add(order)
-        db.session.flush()
-        
-        for item in items:
-            pizza = Pizza.query.get(item['pizza_id'])
-            if not pizza or not pizza.available:
-                return jsonify({
-                    'status': 'error',
-                    'message': f'Піца з ID {item["pizza_id"]} недоступна'
-                }), 400
-            
-            quantity = int(item.get('quantity', 1))
-            item_total = pizza.price * quantity
-            total_amount += item_total
-            
-            order_item = OrderItem(
-                order_id=order.id,
-                pizza_id=pizza.id,
-                quantity=quantity,
-                price=pizza.price,
-                total=item_total
-            )
-            db.session.add(order_item)
-        
-        order.total_amount = total_amount
-        
-        db.session.commit()
+        customer, lines = parse_order(request.get_json(silent=True))
+    except OrderValidationError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    if services.order_queue is not None:
+        return enqueue_order(customer, lines)
+
+    try:
+        # Читання цін і запис в одній транзакції під локом записувача
+        with write_lane:
+            items, total_amount = price_order(lines, load_available_prices(
+                [pizza_id for pizza_id, _ in lines]
+            ))
+            order = insert_order(customer, items, total_amount)
+            record_order(order.total_amount, order.created_at)
+            record_changes([order.id], 'pending')
+            db.session.commit()
+        services.kitchen_feed.notify()
+        popularity.expire()
         
         return jsonify({
             'status': 'success',
             'message': 'Замовлення успішно оформлено! Ми зв\'яжемося з вами найближчим часом.',
-            'order_id': f'ORD-{order.id:06d}',
+            'order_id': format_order_id(order.id),
             'total_amount': total_amount
         })
         
+    except OrderValidationError as e:
+        db.session.rollback()
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
     except Exception as e:
         db.session.rollback()
         return jsonify({
@@ -307,63 +508,242 @@ def create_order():
             'message': f'Помилка при оформленні замовлення: {str(e)}'
         }), 500
 
-@app.template_filter('format_price')
+def enqueue_order(customer, lines):
+    try:
+        items, total_amount = price_order(lines, menu_cache.get_snapshot().prices)
+    except OrderValidationError as e:
+        return jsonify({
+            'status': 'error',
+            'message': str(e)
+        }), 400
+
+    try:
+        order_id, created = services.order_queue.enqueue(
+            {'customer': customer, 'items': items, 'total_amount': total_amount},
+            idempotency_key=request.headers.get('Idempotency-Key')
+        )
+    except Exception as e:
+        return jsonify({
+            'status': 'error',
+            'message': f'Помилка при оформленні замовлення: {str(e)}'
+        }), 500
+
+    return jsonify({
+        'status': 'success',
+        'message': 'Замовлення успішно оформлено! Ми зв\'яжемося з вами найближчим часом.',
+        'order_id': format_order_id(order_id),
+        'total_amount': total_amount,
+        'queued': True,
+        'duplicate': not created
+    }), 202 if created else 200
+
+@views.route('/api/kitchen/orders')
+def kitchen_orders():
+    # Без курсора - активні замовлення; з курсором - лише зміни після нього,
+    # а з wait запит чекає на нове замовлення до wait секунд (long-poll)
+    if request.args.get('after') is None:
+        return jsonify(load_snapshot())
+
+    try:
+        after = int(request.args['after'])
+        wait = min(max(float(request.args.get('wait', 0)), 0), MAX_WAIT)
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'Некоректний курсор або час очікування'}), 400
+
+    feed = load_changes(after)
+    if feed['cursor'] == after and wait > 0:
+        # Поки екран чекає, з'єднання з базою повертається в пул
+        db.session.close()
+        if services.kitchen_feed.wait(after, wait):
+            feed = load_changes(after)
+    return jsonify(feed)
+
+@views.route('/api/kitchen/orders/<int:order_id>/status', methods=['POST'])
+def kitchen_order_status(order_id):
+    try:
+        status = parse_status(request.get_json(silent=True))
+        with write_lane:
+            previous = transition_order(order_id, status)
+            db.session.commit()
+    except KitchenError as e:
+        db.session.rollback()
+        return jsonify({'status': 'error', 'message': str(e)}), e.status_code
+    services.kitchen_feed.notify()
+
+    return jsonify({
+        'status': 'success',
+        'order_id': format_order_id(order_id),
+        'previous_status': previous,
+        'order_status': status
+    })
+
+@views.route('/api/poll/votes/buffer')
+def vote_buffer_status():
+    if services.vote_buffer is None:
+        return jsonify({'mode': current_app.config['POLL_VOTE_MODE']})
+
+    status = services.vote_buffer.get_status()
+    status['mode'] = current_app.config['POLL_VOTE_MODE']
+    return jsonify(status)
+
+@views.route('/api/weather/locations')
+def weather_locations_status():
+    if services.weather_scheduler is None:
+        return jsonify({'status': 'disabled'})
+    return jsonify(dict(services.weather_scheduler.get_status(), status='ok'))
+
+@views.route('/api/order/queue')
+def order_queue_status():
+    if services.order_queue is None:
+        return jsonify({'mode': current_app.config['ORDER_INGESTION_MODE'], 'depth': 0, 'lag_seconds': 0.0})
+
+    status = services.order_queue.get_status()
+    status['mode'] = current_app.config['ORDER_INGESTION_MODE']
+    return jsonify(status)
+
+@views.route('/api/admission')
+def admission_status():
+    return jsonify(admission.get_status())
+
+@views.route('/metrics')
+def metrics_endpoint():
+    if not current_app.config['METRICS_ENABLED']:
+        return page_not_found(None)
+
+    weather_stats = services.weather_service.get_cache_stats()
+    gauges = {
+        f'weather_cache_{name}': weather_stats[name]
+        for name in ('hits', 'stale_hits', 'misses', 'refreshes', 'refresh_errors')
+    }
+    gauges['weather_circuit_open'] = int(services.weather_service.circuit_breaker.is_open())
+    gauges['kitchen_feed_waiting'] = services.kitchen_feed.stats['waiting']
+    admission_status = admission.get_status()
+    for name in ('admitted', 'rate_limited', 'overloaded', 'tracked_keys', 'evicted_keys'):
+        gauges[f'admission_{name}'] = admission_status[name]
+    return Response(metrics.render(gauges), mimetype='text/plain; version=0.0.4')
+
+@views.app_template_filter('format_price')
 def format_price(price):
     return f"{price} грн"
 
-@app.template_global()
+@views.app_template_global()
 def get_current_year():
     from datetime import datetime
     return datetime.now().year
 
-@app.errorhandler(404)
+@views.app_errorhandler(404)
 def page_not_found(error):
-    return render_template('404.html'), 404
+    return static_pages.render('404.html', 404)
+
+@views.cli.command('upgrade-db')
+def upgrade_db_command():
+    result = upgrade_database()
+    print(f"Видалено повторних голосів: {result['removed_duplicate_votes']}")
+    print(f"Створено індексів: {', '.join(result['created_indexes']) or 'немає'}")
+    print(f"Видалено застарілих індексів: {', '.join(result['dropped_indexes']) or 'немає'}")
+    if result['search_index_created']:
+        print("Створено пошуковий індекс меню")
+
+@views.cli.command('rebuild-search-index')
+def rebuild_search_index_command():
+    with write_lane:
+        rebuild_search_index()
+        db.session.commit()
+    print("Пошуковий індекс меню перебудовано з таблиці піц")
+
+@views.cli.command('export-orders')
+@click.option('--format', 'export_format', type=click.Choice(['csv', 'ndjson']), default='csv')
+@click.option('--from', 'date_from', help='Початкова дата, РРРР-ММ-ДД')
+@click.option('--to', 'date_to', help='Кінцева дата включно, РРРР-ММ-ДД')
+@click.option('--gzip', 'compress', is_flag=True, help='Стискати gzip на льоту')
+@click.option('--output', type=click.Path(dir_okay=False), help='Файл (за замовчуванням stdout)')
+def export_orders_command(export_format, date_from, date_to, compress, output):
+    try:
+        start, end = parse_date_range(date_from, date_to)
+    except ExportError as e:
+        raise click.BadParameter(str(e))
+
+    stream = open(output, 'wb') if output else sys.stdout.buffer
+    try:
+        for chunk in export_chunks(export_format, start, end, compress):
+            stream.write(chunk)
+    finally:
+        if output:
+            stream.close()
+
+@views.cli.command('rebuild-poll-tally')
+def rebuild_poll_tally_command():
+    with write_lane:
+        rebuild_tally()
+        db.session.commit()
+    print("Підсумки опитувань перераховано з таблиці голосів")
+
+@views.cli.command('reconcile-stats')
+def reconcile_stats_command():
+    stats = reconcile_counters_locked()
+    print(f"Лічильники звірено: піц {stats['total_pizzas']}, замовлень {stats['total_orders']}")
 
-def init_database():
+@views.cli.command('init-db')
+def init_db_command():
+    # Одноразова підготовка бази перед запуском воркерів
+    upgrade_database()
+    if seed_database():
+        print("База даних ініціалізована з тестовими даними!")
+    else:
+        print("Схему бази даних оновлено")
+
+def init_database(app):
     with app.app_context():
-        db.create_all()
-        
-        if Pizza.query.count() == 0:
-            test_pizzas = [
-                Pizza(name='Маргарита', 
-                     ingredients='Томатний соус, моцарела, свіжий базилік, оливкова олія',
-                     price=250, category='classic', category_display='Класична', 
-                     size='30 см', popular=True),
-                Pizza(name='Пепероні',
-                     ingredients='Томатний соус, моцарела, пепероні, орегано',
-                     price=320, category='classic', category_display='Класична',
-                     size='30 см', popular=True),
-                Pizza(name='Гавайська',
-                     ingredients='Томатний соус, моцарела, шинка, ананас',
-                     price=280, category='classic', category_display='Класична',
-                     size='30 см', popular=False),
-                Pizza(name='Кватро Формаджі',
-                     ingredients='Білий соус, моцарела, горгонзола, пармезан, рікота',
-                     price=380, category='premium', category_display='Преміум',
-                     size='30 см', popular=False),
-                Pizza(name='М\'ясна',
-                     ingredients='Томатний соус, моцарела, пепероні, шинка, ковбаса, бекон',
-                     price=420, category='premium', category_display='Преміум',
-                     size='32 см', popular=True),
-                Pizza(name='Овочева',
-                     ingredients='Томатний соус, моцарела, помідори, перець, цибуля, гриби, оливки',
-                     price=300, category='vegetarian', category_display='Вегетаріанська',
-                     size='30 см', popular=False),
-            ]
-            
-            for pizza in test_pizzas:
-                db.session.add(pizza)
-            
-            poll = Poll(
-                title='Яка піца вам подобається найбільше?',
-                description='Оберіть свою улюблену піцу з нашого меню!'
-            )
-            db.session.add(poll)
-            
-            db.session.commit()
+        upgrade_database()
+        if seed_database():
             print("База даних ініціалізована з тестовими даними!")
 
+def seed_database():
+    if Pizza.query.count() > 0:
+        return False
+
+    test_pizzas = [
+        Pizza(name='Маргарита', 
+             ingredients='Томатний соус, моцарела, свіжий базилік, оливкова олія',
+             price=250, category='classic', category_display='Класична', 
+             size='30 см', popular=True),
+        Pizza(name='Пепероні',
+             ingredients='Томатний соус, моцарела, пепероні, орегано',
+             price=320, category='classic', category_display='Класична',
+             size='30 см', popular=True),
+        Pizza(name='Гавайська',
+             ingredients='Томатний соус, моцарела, шинка, ананас',
+             price=280, category='classic', category_display='Класична',
+             size='30 см', popular=False),
+        Pizza(name='Кватро Формаджі',
+             ingredients='Білий соус, моцарела, горгонзола, пармезан, рікота',
+             price=380, category='premium', category_display='Преміум',
+             size='30 см', popular=False),
+        Pizza(name='М\'ясна',
+             ingredients='Томатний соус, моцарела, пепероні, шинка, ковбаса, бекон',
+             price=420, category='premium', category_display='Преміум',
+             size='32 см', popular=True),
+        Pizza(name='Овочева',
+             ingredients='Томатний соус, моцарела, помідори, перець, цибуля, гриби, оливки',
+             price=300, category='vegetarian', category_display='Вегетаріанська',
+             size='30 см', popular=False),
+    ]
+    
+    for pizza in test_pizzas:
+        db.session.add(pizza)
+    
+    poll = Poll(
+        title='Яка піца вам подобається найбільше?',
+        description='Оберіть свою улюблену піцу з нашого меню!'
+    )
+    db.session.add(poll)
+    reconcile_counters()
+    
+    db.session.commit()
+    return True
+
 if __name__ == '__main__':
-    init_database()
+    # Сервер розробки в одному процесі, тож базу можна підготувати прямо тут
+    app = create_app()
+    init_database(app)
     app.run(debug=True)
@@ -0,0 +1,383 @@
+import asyncio
+import io
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlencode
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+from app import create_app, services, menu_cache, popularity, SEARCH_PARAMS
+from models import db, Pizza, CacheVersion, install_sqlite_pragmas
+from menu_cache import MENU_VERSION_KEY
+from kitchen_feed import MAX_WAIT
+from poll_stream import SSE_HEADERS
+from weather_service import parse_weather
+
+# Маршрути, яким потрібні лише погода та меню. Ці дані асинхронно підтягуються
+# в кеш процесу, після чого view виконується прямо в event loop без I/O.
+# Решта маршрутів працює як є, у пулі потоків.
+PREFETCH_ROUTES = {
+    '/': ('weather', 'menu'),
+    '/menu': ('menu', 'popularity'),
+    '/menu/cards': ('menu', 'popularity'),
+    '/api/pizzas': ('menu', 'popularity'),
+    '/order': (),
+    '/demo': (),
+}
+# З цими параметрами /api/pizzas шукає в базі (FTS5 або LIKE) - лише в пулі потоків
+THREAD_QUERY_PARAMS = {'/api/pizzas': SEARCH_PARAMS}
+# Long-poll кухні: очікування - корутина, у пул потоків іде вже готовий запит без wait
+LONG_POLL_ROUTES = {'/api/kitchen/orders'}
+# SSE результатів опитування: кожен глядач - корутина, а не потік пулу до самого відключення
+STREAM_ROUTES = {'/poll/results/stream'}
+
+class AsyncWeatherFetcher:
+    # Той самий кеш WeatherService, але запит до API йде через httpx.AsyncClient:
+    # поки API відповідає повільно, очікують корутини, а не потоки.
+
+    def __init__(self, service, pool_size=10):
+        self.service = service
+        self.pool_size = pool_size
+        self.client = None
+        self._inflight = None
+
+    async def start(self):
+        connect_timeout, read_timeout = self.service.timeout
+        self.client = httpx.AsyncClient(
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=self.pool_size)
+        )
+
+    async def close(self):
+        if self.client is not None:
+            await self.client.aclose()
+
+    async def ensure_weather(self):
+        cached, stale = self.service.peek(record=False)
+        if cached is not None:
+            if stale and self.service.begin_refresh():
+                asyncio.ensure_future(self._background_refresh())
+            return
+
+        # Single-flight: усі запити чекають на одне звернення до API
+        if self._inflight is None:
+            self._inflight = asyncio.ensure_future(self._refresh())
+        await asyncio.shield(self._inflight)
+
+    async def _background_refresh(self):
+        try:
+            await self._refresh()
+        finally:
+            self.service.end_refresh()
+
+    async def _refresh(self):
+        try:
+            started = time.monotonic()
+            result = await self.fetch()
+            self.service.store_result(result, time.monotonic() - started)
+        finally:
+            self._inflight = None
+
+    async def fetch(self):
+        service = self.service
+        if not service.circuit_breaker.allow_request():
+            return {
+                'success': False,
+                'error': 'Сервіс погоди тимчасово недоступний'
+            }
+
+        url, params = service.build_request('weather', {'q': f"{service.city},{service.country}"})
+        started = time.monotonic()
+        try:
+            response = await self.client.get(url, params=params)
+            response.raise_for_status()
+            result = parse_weather(response.json())
+        except httpx.HTTPError as e:
+            result = {'success': False, 'error': f'Помилка запиту до API: {str(e)}'}
+        except KeyError as e:
+            result = {'success': False, 'error': f'Неочікувана структура відповіді API: {str(e)}'}
+        except Exception as e:
+            result = {'success': False, 'error': f'Загальна помилка: {str(e)}'}
+
+        if service.on_upstream_call:
+            service.on_upstream_call(time.monotonic() - started, result.get('success', False))
+        if result.get('success'):
+            service.circuit_breaker.record_success()
+        else:
+            service.circuit_breaker.record_failure()
+        return result
+
+class AsyncMenuLoader:
+    # Перевірка версії меню і завантаження піц через асинхронний рушій (aiosqlite)
+
+    def __init__(self, flask_app, menu_cache, url):
+        self.flask_app = flask_app
+        self.menu_cache = menu_cache
+        self.engine = create_async_engine(url)
+        if flask_app.config['DB_PROFILE'] == 'production':
+            install_sqlite_pragmas(self.engine.sync_engine)
+        self.sessions = async_sessionmaker(self.engine, expire_on_commit=False)
+        self._lock = asyncio.Lock()
+
+    async def ensure_menu(self):
+        if not self.menu_cache.needs_check():
+            return
+        async with self._lock:
+            if not self.menu_cache.needs_check():
+                return
+            async with self.sessions() as session:
+                version = await session.scalar(
+                    select(CacheVersion.version).where(CacheVersion.name == MENU_VERSION_KEY)
+                ) or 0
+                pizzas = None
+                if version != self.menu_cache.version:
+                    pizzas = (await session.scalars(
+                        select(Pizza).where(Pizza.available == True).order_by(Pizza.id)
+                    )).all()
+            with self.flask_app.app_context():
+                self.menu_cache.install(version, pizzas)
+
+    async def close(self):
+        await self.engine.dispose()
+
+def build_environ(scope, body):
+    server = scope.get('server') or ('localhost', 80)
+    client = scope.get('client') or ('127.0.0.1', 0)
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': scope.get('root_path', '').encode('utf-8').decode('latin-1'),
+        'PATH_INFO': scope['path'].encode('utf-8').decode('latin-1'),
+        'QUERY_STRING': scope['query_string'].decode('latin-1'),
+        'SERVER_NAME': server[0],
+        'SERVER_PORT': str(server[1]),
+        'REMOTE_ADDR': client[0],
+        'REMOTE_PORT': str(client[1]),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(body),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    for name, value in scope['headers']:
+        name = name.decode('latin-1')
+        value = value.decode('latin-1')
+        if name == 'content-type':
+            environ['CONTENT_TYPE'] = value
+        elif name == 'content-length':
+            environ['CONTENT_LENGTH'] = value
+        else:
+            key = 'HTTP_' + name.upper().replace('-', '_')
+            environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+def response_start(status, headers):
+    return {
+        'type': 'http.response.start',
+        'status': int(status.split(' ', 1)[0]),
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers],
+    }
+
+class AsyncApp:
+    def __init__(self, flask_app, weather_fetcher=None, menu_loader=None, threads=16):
+        self.flask_app = flask_app
+        self.weather_fetcher = weather_fetcher
+        self.menu_loader = menu_loader
+        self.executor = ThreadPoolExecutor(threads, thread_name_prefix='wsgi')
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+            return
+        if scope['type'] != 'http':
+            return
+
+        body = await self._read_body(receive)
+        if scope['path'] in STREAM_ROUTES and scope['method'] == 'GET':
+            await self._stream_poll_results(receive, send)
+            return
+        environ = build_environ(scope, body)
+        if scope['path'] in LONG_POLL_ROUTES and scope['method'] == 'GET':
+            await self._await_long_poll(environ)
+        prefetch = PREFETCH_ROUTES.get(scope['path']) if scope['method'] in ('GET', 'HEAD') else None
+        if prefetch is not None and scope['path'] in THREAD_QUERY_PARAMS:
+            params = parse_qs(scope['query_string'].decode('latin-1'), keep_blank_values=True)
+            if any(name in params for name in THREAD_QUERY_PARAMS[scope['path']]):
+                prefetch = None
+        if prefetch is None:
+            await self._run_in_thread(environ, receive, send)
+            return
+
+        if 'weather' in prefetch and self.weather_fetcher is not None:
+            await self.weather_fetcher.ensure_weather()
+        if 'menu' in prefetch and self.menu_loader is not None:
+            await self.menu_loader.ensure_menu()
+        if 'popularity' in prefetch and popularity.needs_check():
+            # Дочитування нових продажів - короткий запит, але не в event loop
+            await asyncio.get_running_loop().run_in_executor(self.executor, self._refresh_popularity)
+        await self._run_inline(environ, send)
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if self.weather_fetcher is not None:
+                    await self.weather_fetcher.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                if self.weather_fetcher is not None:
+                    await self.weather_fetcher.close()
+                if self.menu_loader is not None:
+                    await self.menu_loader.close()
+                self.executor.shutdown(wait=False)
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def _stream_poll_results(self, receive, send):
+        headers = [('Content-Type', 'text/event-stream; charset=utf-8')] + list(SSE_HEADERS.items())
+        await send(response_start('200 OK', headers))
+        events = services.get(self.flask_app).poll_publisher.stream_async()
+        disconnected = asyncio.ensure_future(self._wait_disconnect(receive))
+        event = None
+        try:
+            while True:
+                event = asyncio.ensure_future(events.__anext__())
+                await asyncio.wait({event, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+                if not event.done():
+                    return
+                await send({'type': 'http.response.body', 'body': event.result().encode('utf-8'), 'more_body': True})
+        finally:
+            disconnected.cancel()
+            if event is not None and not event.done():
+                # Генератор закривається лише після того, як скасування до нього дійде
+                event.cancel()
+                await asyncio.gather(event, return_exceptions=True)
+            await events.aclose()
+
+    @staticmethod
+    async def _wait_disconnect(receive):
+        while (await receive())['type'] != 'http.disconnect':
+            pass
+
+    @staticmethod
+    async def _await_long_poll(environ):
+        params = parse_qs(environ['QUERY_STRING'], keep_blank_values=True)
+        if 'wait' not in params:
+            return
+        try:
+            after = int(params['after'][0])
+            wait = min(max(float(params['wait'][0]), 0), MAX_WAIT)
+        except (KeyError, ValueError):
+            # Некоректні параметри перевірить сам view
+            return
+        if wait > 0:
+            await services.kitchen_feed.wait_async(after, wait)
+        del params['wait']
+        environ['QUERY_STRING'] = urlencode(params, doseq=True)
+
+    def _refresh_popularity(self):
+        with self.flask_app.app_context():
+            popularity.get_snapshot()
+
+    @staticmethod
+    async def _read_body(receive):
+        chunks = []
+        while True:
+            message = await receive()
+            if message['type'] != 'http.request':
+                break
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body'):
+                break
+        return b''.join(chunks)
+
+    async def _run_inline(self, environ, send):
+        started = {}
+
+        def start_response(status, headers, exc_info=None):
+            started['message'] = response_start(status, headers)
+
+        result = self.flask_app(environ, start_response)
+        try:
+            body = b''.join(result)
+        finally:
+            if hasattr(result, 'close'):
+                result.close()
+        await send(started['message'])
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _run_in_thread(self, environ, receive, send):
+        loop = asyncio.get_running_loop()
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect():
+            await self._wait_disconnect(receive)
+            disconnected.set()
+
+        def send_from_thread(message):
+            asyncio.run_coroutine_threadsafe(send(message), loop).result()
+
+        def run():
+            started = {}
+
+            def start_response(status, headers, exc_info=None):
+                started['message'] = response_start(status, headers)
+
+            result = self.flask_app(environ, start_response)
+            try:
+                sent_start = False
+                # Потокові відповіді (експорт) передаються частинами, доки клієнт на зв'язку
+                for chunk in result:
+                    if disconnected.is_set():
+                        return
+                    if not sent_start:
+                        send_from_thread(started['message'])
+                        sent_start = True
+                    if chunk:
+                        send_from_thread({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+                if not sent_start:
+                    send_from_thread(started['message'])
+                send_from_thread({'type': 'http.response.body', 'body': b''})
+            finally:
+                if hasattr(result, 'close'):
+                    result.close()
+
+        watcher = asyncio.ensure_future(watch_disconnect())
+        try:
+            await loop.run_in_executor(self.executor, run)
+        finally:
+            watcher.cancel()
+
+def create_asgi_app(flask_app):
+    weather_fetcher = None
+    if not services.weather_prefetch_enabled:
+        # З планувальником погода вже завантажується у фоні
+        weather_fetcher = AsyncWeatherFetcher(services.weather_service)
+        services.weather_service.fetch_on_miss = False
+
+    menu_loader = None
+    with flask_app.app_context():
+        url = db.engine.url
+    if url.get_backend_name() == 'sqlite':
+        menu_loader = AsyncMenuLoader(flask_app, menu_cache, url.set(drivername='sqlite+aiosqlite'))
+
+    return AsyncApp(
+        flask_app, weather_fetcher, menu_loader,
+        threads=int(os.getenv('ASYNC_WSGI_THREADS', '16'))
+    )
+
+application = create_asgi_app(create_app())
+
+if __name__ == '__main__':
+    import uvicorn
+
+    host = os.getenv('HOST', '127.0.0.1')
+    port = int(os.getenv('PORT', '5000'))
+    print(f"ASGI-сервер запущено на http://{host}:{port}")
+    uvicorn.run(application, host=host, port=port, log_level=os.getenv('LOG_LEVEL', 'warning'))
@@ -0,0 +1,1109 @@
+import argparse
+import json
+import os
+import platform
+import random
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+from urllib.parse import parse_qs
+from wsgiref.simple_server import WSGIServer, WSGIRequestHandler
+
+import requests
+
+from weather_service import WeatherService
+from recommendations import weather_bucket, UNAVAILABLE_BUCKET
+from weather_scheduler import WeatherScheduler, Location
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FLASK_INIT_DB = [sys.executable, '-m', 'flask', '--app', 'app', 'init-db']
+
+FAKE_WEATHER = {
+    'main': {'temp': 12, 'humidity': 60, 'feels_like': 10},
+    'weather': [{'id': 500, 'description': 'легкий дощ', 'icon': '10d'}],
+    'wind': {'speed': 3},
+    'name': 'Kyiv'
+}
+
+class FakeWeatherHandler(BaseHTTPRequestHandler):
+    # mode: 'ok', 'error' або 'hang'; delay - затримка відповіді в секундах
+    mode = 'ok'
+    delay = 0
+    calls = 0
+
+    def do_GET(self):
+        FakeWeatherHandler.calls += 1
+        if self.mode == 'hang':
+            time.sleep(60)
+            return
+        if self.delay:
+            time.sleep(self.delay)
+        if self.mode == 'error':
+            self.send_response(503)
+            self.end_headers()
+            return
+
+        body = json.dumps(self.build_response()).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def build_response(self):
+        path, _, query = self.path.partition('?')
+        params = parse_qs(query)
+        if path.endswith('/group'):
+            # Груповий ендпоінт: по запису на кожен ID міста
+            ids = [int(city_id) for city_id in params['id'][0].split(',')]
+            return {'cnt': len(ids), 'list': [dict(FAKE_WEATHER, id=city_id, name=f'Місто {city_id}') for city_id in ids]}
+        city = params.get('q', ['Kyiv'])[0].split(',')[0]
+        return dict(FAKE_WEATHER, name=city)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_fake_weather_server():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), FakeWeatherHandler)
+    server.daemon_threads = True
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f'http://127.0.0.1:{server.server_port}'
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+def print_latency(name, latencies):
+    print(f"   {name}: n={len(latencies)} "
+          f"p50={percentile(latencies, 50) * 1000:.1f} мс "
+          f"p99={percentile(latencies, 99) * 1000:.1f} мс "
+          f"max={max(latencies) * 1000:.1f} мс")
+
+def create_test_app():
+    # Тимчасова база даних, щоб бенчмарки не змінювали instance/oderman.db
+    db_path = os.path.join(tempfile.mkdtemp(prefix='oderman-bench-'), 'bench.db')
+    os.environ['DATABASE_URL'] = f'sqlite:///{db_path}'
+    os.environ.setdefault('OPENWEATHER_BASE_URL', 'http://127.0.0.1:9')
+    # Бенчмарки пишуть з однієї адреси; ліміти перевіряє окремо bench_admission
+    os.environ.setdefault('RATE_LIMIT_ENABLED', '0')
+
+    import app as app_module
+    flask_app = app_module.create_app()
+    app_module.init_database(flask_app)
+    return SimpleNamespace(app=flask_app, menu_cache=app_module.menu_cache, services=app_module.services)
+
+def measure_rps(client, url, requests_count, headers=None):
+    started = time.perf_counter()
+    for _ in range(requests_count):
+        client.get(url, headers=headers)
+    return requests_count / (time.perf_counter() - started)
+
+def bench_weather_failing_upstream(requests_count=50):
+    print("🌧️ Погода при недоступному API...")
+    server, base_url = start_fake_weather_server()
+    try:
+        FakeWeatherHandler.mode = 'hang'
+        FakeWeatherHandler.calls = 0
+        service = WeatherService(
+            api_key='test', base_url=base_url,
+            cache_ttl=0, error_ttl=0,
+            connect_timeout=0.5, read_timeout=0.5,
+            failure_threshold=3, reset_timeout=30
+        )
+
+        latencies = []
+        fallbacks = 0
+        for _ in range(requests_count):
+            started = time.perf_counter()
+            weather = service.get_current_weather()
+            bucket = weather_bucket(weather, not service.circuit_breaker.is_open())
+            latencies.append(time.perf_counter() - started)
+            if bucket == UNAVAILABLE_BUCKET:
+                fallbacks += 1
+
+        print_latency('запит погоди + рекомендація', latencies)
+        print(f"   звернень до API: {FakeWeatherHandler.calls}, fallback-рекомендацій: {fallbacks}")
+        print(f"   стан circuit breaker: {service.circuit_breaker.state}")
+    finally:
+        FakeWeatherHandler.mode = 'ok'
+        server.shutdown()
+
+def bench_weather_cache(requests_count=1000):
+    print("\n☀️ Кешована погода при повільному API...")
+    server, base_url = start_fake_weather_server()
+    try:
+        FakeWeatherHandler.delay = 0.2
+        FakeWeatherHandler.calls = 0
+        service = WeatherService(api_key='test', base_url=base_url, cache_ttl=0.5)
+
+        latencies = []
+        for _ in range(requests_count):
+            started = time.perf_counter()
+            service.get_current_weather()
+            latencies.append(time.perf_counter() - started)
+            time.sleep(0.001)
+
+        print_latency('get_current_weather', latencies)
+        print(f"   звернень до API: {FakeWeatherHandler.calls}, статистика: {service.get_cache_stats()}")
+    finally:
+        FakeWeatherHandler.delay = 0
+        server.shutdown()
+
+def bench_weather_scheduler(grouped_count=30, named_count=10, requests_count=10000):
+    print(f"\n🗺️ Планувальник погоди: {grouped_count} міст з ID і {named_count} за назвою...")
+    server, base_url = start_fake_weather_server()
+    try:
+        FakeWeatherHandler.delay = 0.05
+        FakeWeatherHandler.calls = 0
+        locations = [Location(f'Місто {i}', 'UA', 700000 + i) for i in range(grouped_count)]
+        locations += [Location(f'Точка {i}', 'UA') for i in range(named_count)]
+        scheduler = WeatherScheduler(WeatherService(api_key='test', base_url=base_url), locations)
+
+        started = time.perf_counter()
+        scheduler.refresh()
+        elapsed = time.perf_counter() - started
+        print(f"   повне оновлення: {elapsed * 1000:.0f} мс, звернень до API: {FakeWeatherHandler.calls} "
+              f"(по одному на місто було б {len(locations)})")
+
+        keys = list(scheduler.locations)
+        latencies = []
+        for i in range(requests_count):
+            request_started = time.perf_counter()
+            scheduler.get_weather(keys[i % len(keys)])
+            latencies.append(time.perf_counter() - request_started)
+        print_latency('get_weather під час запиту', latencies)
+    finally:
+        FakeWeatherHandler.delay = 0
+        server.shutdown()
+
+def bench_api_pizzas(app_module, requests_count=2000):
+    print("\n🍕 /api/pizzas: до і після попередньої серіалізації...")
+    from flask import jsonify
+    from models import Pizza
+
+    app = app_module.app
+
+    def legacy_api_pizzas():
+        pizzas = Pizza.query.filter_by(available=True).all()
+        return jsonify([pizza.to_dict() for pizza in pizzas])
+
+    if 'legacy_api_pizzas' not in app.view_functions:
+        app.add_url_rule('/bench/legacy/api/pizzas', 'legacy_api_pizzas', legacy_api_pizzas)
+
+    client = app.test_client()
+    etag = client.get('/api/pizzas', headers={'Accept-Encoding': 'gzip'}).headers['ETag']
+
+    results = {
+        'до (SQL + jsonify)': measure_rps(client, '/bench/legacy/api/pizzas', requests_count),
+        'після (готові байти)': measure_rps(client, '/api/pizzas', requests_count),
+        'після (gzip)': measure_rps(client, '/api/pizzas', requests_count, {'Accept-Encoding': 'gzip'}),
+        'після (If-None-Match → 304)': measure_rps(
+            client, '/api/pizzas', requests_count,
+            {'Accept-Encoding': 'gzip', 'If-None-Match': etag}
+        ),
+    }
+    for name, rps in results.items():
+        print(f"   {name}: {rps:.0f} запитів/с")
+
+def seed_pizzas(app_module, count):
+    from models import db, Pizza
+    with app_module.app.app_context():
+        missing = count - Pizza.query.count()
+        for i in range(max(0, missing)):
+            db.session.add(Pizza(
+                name=f'Бенч піца {i}', ingredients='Томатний соус, моцарела',
+                price=200 + i % 100, category='classic', category_display='Класична'
+            ))
+        app_module.menu_cache.invalidate()
+        db.session.commit()
+        app_module.menu_cache.expire()
+
+def bench_template_cache(app_module, requests_count=300, pizzas_count=100):
+    print(f"\n🧩 Кеш фрагментів і статичних сторінок ({pizzas_count} піц)...")
+    seed_pizzas(app_module, pizzas_count)
+    app = app_module.app
+    client = app.test_client()
+
+    for url in ('/menu', '/menu/cards', '/poll', '/order', '/demo', '/no-such-page'):
+        timings = {}
+        for enabled in (False, True):
+            app.config['TEMPLATE_CACHE'] = enabled
+            client.get(url)
+            latencies = []
+            for _ in range(requests_count):
+                started = time.perf_counter()
+                client.get(url)
+                latencies.append(time.perf_counter() - started)
+            timings[enabled] = percentile(latencies, 50)
+        print(f"   {url}: {timings[False] * 1000:.2f} мс → {timings[True] * 1000:.2f} мс на запит "
+              f"(x{timings[False] / timings[True]:.1f})")
+    app.config['TEMPLATE_CACHE'] = True
+
+def bench_create_order(app_module, requests_count=100, cart_sizes=(1, 10, 50, 200)):
+    print("\n🛒 /api/order: затримка залежно від розміру кошика...")
+    seed_pizzas(app_module, max(cart_sizes))
+    client = app_module.app.test_client()
+    customer = {'name': 'Бенч', 'phone': '+380000000000', 'address': 'вул. Тестова, 1'}
+
+    for size in cart_sizes:
+        order = {
+            'customer': customer,
+            'items': [{'pizza_id': pizza_id, 'quantity': 1} for pizza_id in range(1, size + 1)]
+        }
+        latencies = []
+        for _ in range(requests_count):
+            started = time.perf_counter()
+            response = client.post('/api/order', json=order)
+            latencies.append(time.perf_counter() - started)
+            assert response.status_code == 200, response.get_json()
+        print_latency(f'{size} позицій', latencies)
+
+def bench_kitchen_feed(app_module, waiters=50, idle=2.0):
+    print(f"\n👨‍🍳 Екран кухні: {waiters} long-poll клієнтів чекають на нове замовлення...")
+    client = app_module.app.test_client()
+    feed = app_module.services.kitchen_feed
+    cursor = client.get('/api/kitchen/orders').get_json()['cursor']
+    woken_at = []
+
+    def wait_for_order():
+        response = app_module.app.test_client().get(f'/api/kitchen/orders?after={cursor}&wait=10')
+        woken_at.append((time.perf_counter(), len(response.get_json()['orders'])))
+
+    threads = [threading.Thread(target=wait_for_order) for _ in range(waiters)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.5)
+    checks = feed.stats['checks']
+    time.sleep(idle)
+    idle_checks = feed.stats['checks'] - checks
+    print(f"   у простої: {idle_checks / idle:.1f} запитів до бази/с на всіх {feed.stats['waiting']} клієнтів")
+
+    order = {
+        'customer': {'name': 'Бенч', 'phone': '+380000000000', 'address': 'вул. Тестова, 1'},
+        'items': [{'pizza_id': 1, 'quantity': 1}]
+    }
+    created = time.perf_counter()
+    assert client.post('/api/order', json=order).status_code == 200
+    for thread in threads:
+        thread.join()
+    print_latency('від замовлення до екрана', [finished - created for finished, _ in woken_at])
+    print(f"   отримали замовлення: {sum(1 for _, count in woken_at if count)} з {waiters}")
+
+def run_write_load(clients=16, duration=5.0):
+    app_module = create_test_app()
+    app = app_module.app
+    customer = {'name': 'Бенч', 'phone': '+380000000000', 'address': 'вул. Тестова, 1'}
+    order = {'customer': customer, 'items': [{'pizza_id': 1, 'quantity': 2}, {'pizza_id': 2}]}
+
+    latencies = []
+    errors = []
+    deadline = time.perf_counter() + duration
+
+    def worker(worker_id):
+        client = app.test_client()
+        counter = 0
+        while time.perf_counter() < deadline:
+            counter += 1
+            started = time.perf_counter()
+            if counter % 4 == 0:
+                response = client.post(
+                    '/poll/vote', data={'poll_id': 1, 'pizza_id': 1 + counter % 6},
+                    environ_base={'REMOTE_ADDR': f'10.{worker_id}.{counter // 250 % 250}.{counter % 250}'}
+                )
+                ok = response.status_code == 302
+            else:
+                response = client.post('/api/order', json=order)
+                ok = response.status_code == 200
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    return {
+        'profile': app.config['DB_PROFILE'],
+        'clients': clients,
+        'requests_per_sec': round(len(latencies) / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'errors': len(errors),
+    }
+
+def run_benchmark_subprocess(args, **env):
+    # Налаштування app читаються при імпорті, тож кожна конфігурація - окремий процес
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__)] + args,
+        env=dict(os.environ, **env), capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+def bench_db_profile():
+    print("\n🗄️ Замовлення та голоси з профілем SQLite і без нього...")
+    for profile in ('default', 'production'):
+        result = run_benchmark_subprocess(['--write-load'], DB_PROFILE=profile)
+        print(f"   {profile}: {result['requests_per_sec']} запитів/с, "
+              f"p50={result['p50_ms']} мс, p99={result['p99_ms']} мс, помилок: {result['errors']}")
+
+def run_vote_load(clients, votes_per_client=300):
+    app_module = create_test_app()
+    app = app_module.app
+    latencies = []
+    errors = []
+
+    def worker(worker_id):
+        client = app.test_client()
+        for i in range(votes_per_client):
+            started = time.perf_counter()
+            response = client.post(
+                '/poll/vote', data={'poll_id': 1, 'pizza_id': 1 + i % 6},
+                environ_base={'REMOTE_ADDR': f'10.{worker_id}.{i // 250}.{i % 250}'}
+            )
+            latencies.append(time.perf_counter() - started)
+            if response.status_code != 302 or response.location != '/poll/results':
+                errors.append(response.status_code)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if app_module.services.vote_buffer is not None:
+        app_module.services.vote_buffer.stop()
+    from models import PollVote
+    with app.app_context():
+        stored = PollVote.query.count()
+
+    return {
+        'mode': app.config['POLL_VOTE_MODE'],
+        'clients': clients,
+        'votes_per_sec': round(len(latencies) / elapsed, 1),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'stored': stored,
+        'errors': len(errors),
+    }
+
+def bench_votes(client_counts=(1, 8, 64)):
+    print("\n🗳️ Голоси: синхронний запис і буфер з пакетним записом...")
+    for mode in ('sync', 'buffered'):
+        for clients in client_counts:
+            seen_path = os.path.join(tempfile.mkdtemp(prefix='oderman-bench-'), 'votes.bloom')
+            result = run_benchmark_subprocess(
+                ['--vote-load', str(clients)],
+                POLL_VOTE_MODE=mode, POLL_VOTE_SEEN_PATH=seen_path, DB_PROFILE='production'
+            )
+            print(f"   {mode}, клієнтів {clients}: {result['votes_per_sec']} голосів/с, "
+                  f"p99={result['p99_ms']} мс, записано {result['stored']}, помилок: {result['errors']}")
+
+INDEX_BENCH_QUERIES = {
+    'доступні піци': 'SELECT * FROM pizza WHERE available = 1',
+    'замовлення в обробці': "SELECT COUNT(*) FROM \"order\" WHERE status = 'pending'",
+    'активне опитування': 'SELECT * FROM poll WHERE active = 1 LIMIT 1',
+    'голос з IP': 'SELECT id FROM poll_vote WHERE poll_id = :poll_id AND voter_ip = :voter_ip LIMIT 1',
+    'результати опитування': (
+        'SELECT pizza.id, COUNT(poll_vote.id) AS votes FROM pizza '
+        'LEFT OUTER JOIN poll_vote ON pizza.id = poll_vote.pizza_id AND poll_vote.poll_id = :poll_id '
+        'WHERE pizza.available = 1 GROUP BY pizza.id ORDER BY votes DESC'
+    ),
+}
+
+def time_queries(connection, params, repeat=5):
+    from sqlalchemy import text
+    timings = {}
+    for name, sql in INDEX_BENCH_QUERIES.items():
+        started = time.perf_counter()
+        for _ in range(repeat):
+            connection.execute(text(sql), params).fetchall()
+        timings[name] = (time.perf_counter() - started) / repeat
+    return timings
+
+def bench_indexes(votes_count=None, orders_count=None, polls_count=20, pizzas_count=50):
+    from sqlalchemy import create_engine, text
+    from models import db
+
+    votes_count = votes_count or int(os.getenv('BENCH_VOTES', '1000000'))
+    orders_count = orders_count or int(os.getenv('BENCH_ORDERS', '500000'))
+    print(f"\n📇 Індекси: {votes_count} голосів, {orders_count} замовлень...")
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='oderman-bench-'), 'indexes.db')
+    engine = create_engine(f'sqlite:///{db_path}')
+    db.metadata.create_all(engine)
+
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(text(f'DROP INDEX {index.name}'))
+
+        connection.execute(text(
+            'INSERT INTO pizza (name, ingredients, price, category, category_display, size, available) '
+            "VALUES (:name, 'Томатний соус', 250, 'classic', 'Класична', '30 см', :available)"
+        ), [{'name': f'Піца {i}', 'available': i % 10 != 0} for i in range(pizzas_count)])
+        connection.execute(text('INSERT INTO poll (title, active) VALUES (:title, :active)'), [
+            {'title': f'Опитування {i}', 'active': i == polls_count - 1} for i in range(polls_count)
+        ])
+        connection.execute(text(
+            'INSERT INTO poll_vote (poll_id, pizza_id, voter_ip) VALUES (:poll_id, :pizza_id, :voter_ip)'
+        ), [
+            {'poll_id': 1 + i % polls_count, 'pizza_id': 1 + i % pizzas_count,
+             'voter_ip': f'10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}'}
+            for i in range(votes_count)
+        ])
+        connection.execute(text(
+            'INSERT INTO "order" (customer_name, customer_phone, customer_address, total_amount, status) '
+            "VALUES ('Бенч', '+380000000000', 'вул. Тестова, 1', 500, :status)"
+        ), [{'status': 'pending' if i % 50 == 0 else 'delivered'} for i in range(orders_count)])
+
+    # Останній голосувальник активного опитування - найгірший випадок для повного скану
+    last_voter = votes_count - 1 - (votes_count - polls_count) % polls_count
+    params = {
+        'poll_id': polls_count,
+        'voter_ip': f'10.{last_voter // 65536 % 256}.{last_voter // 256 % 256}.{last_voter % 256}'
+    }
+    with engine.connect() as connection:
+        before = time_queries(connection, params)
+
+    with engine.begin() as connection:
+        for table in db.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(connection)
+        connection.execute(text('ANALYZE'))
+
+    with engine.connect() as connection:
+        after = time_queries(connection, params)
+
+    for name in INDEX_BENCH_QUERIES:
+        print(f"   {name}: {before[name] * 1000:.2f} мс → {after[name] * 1000:.2f} мс")
+
+SEARCH_BENCH_NAMES = ('Маргарита', 'Пепероні', 'Гавайська', 'Кватро Формаджі', "М'ясна", 'Овочева',
+                      'Барбекю', 'Діабола', 'Капрічоза', 'Кальцоне', 'Морська', 'Грибна')
+SEARCH_BENCH_INGREDIENTS = (
+    'томатний соус', 'білий соус', 'моцарела', 'пармезан', 'горгонзола', 'рікота', 'фета', 'чедер',
+    'пепероні', 'шинка', 'бекон', 'салямі', 'ковбаса', 'курка', 'телятина', 'креветки', 'мідії',
+    'лосось', 'тунець', 'ананас', 'гриби', 'печериці', 'оливки', 'маслини', 'каперси', 'цибуля',
+    'перець', 'халапеньо', 'помідори', 'черрі', 'рукола', 'шпинат', 'базилік', 'орегано', 'часник',
+    'кукурудза', 'броколі', 'баклажан', 'цукіні', 'трюфель', 'песто', 'мед', 'горіхи', 'груша',
+)
+SEARCH_BENCH_CATEGORIES = ('classic', 'premium', 'vegetarian', 'spicy', 'seafood')
+SEARCH_BENCH_QUERIES = {
+    'рідкісна назва': {'q': '73519'},
+    'два рідкісні інгредієнти': {'q': 'трюфель груша'},
+    'префікс назви': {'q': 'пепер'},
+    'часте слово + фільтри': {'q': 'моцарела', 'category': 'premium', 'max_price': 300},
+    'лише фільтри': {'category': 'seafood', 'max_price': 200},
+}
+
+def bench_search(catalogue_size=None, repeat=20):
+    from flask import Flask
+    from sqlalchemy import text, or_
+    from models import db, Pizza
+    from pizza_search import SEARCH_SCHEMA, search_pizzas
+
+    catalogue_size = catalogue_size or int(os.getenv('BENCH_SEARCH_PIZZAS', '100000'))
+    print(f"\n🔎 Пошук у меню: {catalogue_size} піц...")
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix='oderman-bench-'), 'search.db')
+    search_app = Flask('bench_search')
+    search_app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
+    db.init_app(search_app)
+
+    rng = random.Random(42)
+    rows = [{
+        'name': f'{rng.choice(SEARCH_BENCH_NAMES)} {i}',
+        'ingredients': ', '.join(rng.sample(SEARCH_BENCH_INGREDIENTS, rng.randint(4, 7))).capitalize(),
+        'price': rng.randrange(150, 600, 10),
+        'category': rng.choice(SEARCH_BENCH_CATEGORIES),
+        'category_display': 'Бенч',
+        'size': '30 см',
+        'available': i % 20 != 0,
+    } for i in range(catalogue_size)]
+
+    with search_app.app_context():
+        db.create_all()
+        for statement in SEARCH_SCHEMA:
+            db.session.execute(text(statement))
+        started = time.perf_counter()
+        db.session.execute(Pizza.__table__.insert(), rows)
+        db.session.commit()
+        print(f"   вставка з оновленням індексу тригерами: {time.perf_counter() - started:.1f} с")
+        db.session.execute(text('ANALYZE'))
+
+        # Те, що робить клієнт без серверного пошуку: все меню в JSON
+        started = time.perf_counter()
+        full_menu = json.dumps([pizza.to_dict() for pizza in Pizza.query.filter_by(available=True).all()],
+                               ensure_ascii=False).encode('utf-8')
+        print(f"   повне меню: {len(full_menu) / 1024 / 1024:.1f} МБ JSON, "
+              f"{(time.perf_counter() - started) * 1000:.0f} мс на сервері")
+
+        # LIKE не ранжує і зупиняється на перших 50 збігах; FTS5 сортує всі збіги за bm25
+        for name, params in SEARCH_BENCH_QUERIES.items():
+            timings = {}
+            for mode in ('LIKE', 'FTS5'):
+                latencies = []
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    if mode == 'FTS5':
+                        results, _ = search_pizzas(params.get('q', ''), params.get('category'),
+                                                   params.get('max_price'))
+                    else:
+                        query = Pizza.query.filter(Pizza.available == True)
+                        if params.get('category'):
+                            query = query.filter(Pizza.category == params['category'])
+                        if params.get('max_price'):
+                            query = query.filter(Pizza.price <= params['max_price'])
+                        for term in params.get('q', '').split():
+                            query = query.filter(or_(Pizza.name.like(f'%{term}%'),
+                                                     Pizza.ingredients.like(f'%{term}%')))
+                        results = query.order_by(Pizza.id).limit(50).all()
+                    latencies.append(time.perf_counter() - started)
+                    db.session.rollback()
+                timings[mode] = percentile(latencies, 50)
+            page_bytes = len(json.dumps([pizza.to_dict() for pizza in results], ensure_ascii=False).encode('utf-8'))
+            print(f"   {name}: LIKE {timings['LIKE'] * 1000:.2f} мс → FTS5 {timings['FTS5'] * 1000:.2f} мс, "
+                  f"сторінка {page_bytes / 1024:.1f} КБ")
+
+SUITE_SCALES = {
+    'small': {'pizzas': 20, 'orders': 2000, 'votes': 5000},
+    'medium': {'pizzas': 100, 'orders': 50000, 'votes': 100000},
+    'large': {'pizzas': 500, 'orders': 500000, 'votes': 1000000},
+}
+SUITE_CUSTOMER = {'name': 'Бенч', 'phone': '+380000000000', 'address': 'вул. Тестова, 1'}
+
+def voter_ip(index):
+    return f'10.{index // 65536 % 256}.{index // 256 % 256}.{index % 256}'
+
+def seed_suite_data(app_module, scale, seed):
+    from datetime import datetime, timedelta
+    from sqlalchemy import insert, select
+    from models import db, Pizza, Order, OrderItem, Poll, PollVote
+    from order_service import next_order_id
+    from poll_tally import rebuild_tally
+    from admin_stats import reconcile_counters, rebuild_sales_buckets
+
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    with app_module.app.app_context():
+        existing = Pizza.query.count()
+        db.session.execute(insert(Pizza), [
+            {'name': f'Бенч піца {i}', 'ingredients': 'Томатний соус, моцарела',
+             'price': rng.randrange(150, 500), 'category': 'classic',
+             'category_display': 'Класична', 'size': '30 см', 'available': rng.random() > 0.1}
+            for i in range(max(0, scale['pizzas'] - existing))
+        ])
+        pizza_ids = [pizza_id for (pizza_id,) in db.session.query(Pizza.id).filter_by(available=True)]
+        prices = dict(db.session.query(Pizza.id, Pizza.price))
+
+        # Пачками, щоб великі масштаби не тримали все в пам'яті
+        for start in range(0, scale['orders'], 10000):
+            count = min(10000, scale['orders'] - start)
+            first_id = db.session.execute(select(next_order_id())).scalar()
+            orders, items = [], []
+            for order_id in range(first_id, first_id + count):
+                lines = [(rng.choice(pizza_ids), rng.randint(1, 3)) for _ in range(rng.randint(1, 4))]
+                total = sum(prices[pizza_id] * quantity for pizza_id, quantity in lines)
+                orders.append({
+                    'id': order_id, 'customer_name': 'Бенч', 'customer_phone': '+380000000000',
+                    'customer_address': 'вул. Тестова, 1', 'total_amount': total,
+                    'status': rng.choice(('pending', 'delivered', 'delivered', 'cancelled')),
+                    'created_at': now - timedelta(seconds=rng.randrange(30 * 24 * 3600)),
+                })
+                items.extend({
+                    'order_id': order_id, 'pizza_id': pizza_id, 'quantity': quantity,
+                    'price': prices[pizza_id], 'total': prices[pizza_id] * quantity
+                } for pizza_id, quantity in lines)
+            db.session.execute(insert(Order), orders)
+            db.session.execute(insert(OrderItem), items)
+
+        poll = Poll.query.filter_by(active=True).first()
+        for start in range(0, scale['votes'], 50000):
+            db.session.execute(insert(PollVote), [
+                {'poll_id': poll.id, 'pizza_id': rng.choice(pizza_ids), 'voter_ip': voter_ip(i)}
+                for i in range(start, min(start + 50000, scale['votes']))
+            ])
+        db.session.commit()
+
+        rebuild_tally(poll.id)
+        rebuild_sales_buckets()
+        reconcile_counters()
+        app_module.menu_cache.invalidate()
+        db.session.commit()
+        app_module.menu_cache.expire()
+        return poll.id, pizza_ids
+
+def build_suite_scenarios(poll_id, pizza_ids, seed, votes_offset):
+    rng = random.Random(seed + 1)
+    vote_counter = iter(range(votes_offset, votes_offset + 10 ** 9))
+
+    def order_request(client):
+        lines = [{'pizza_id': rng.choice(pizza_ids), 'quantity': rng.randint(1, 3)}
+                 for _ in range(rng.randint(1, 5))]
+        response = client.post('/api/order', json={'customer': SUITE_CUSTOMER, 'items': lines})
+        return response.status_code == 200
+
+    def vote_request(client):
+        response = client.post(
+            '/poll/vote', data={'poll_id': poll_id, 'pizza_id': rng.choice(pizza_ids)},
+            environ_base={'REMOTE_ADDR': voter_ip(next(vote_counter))}
+        )
+        return response.status_code == 302 and response.location == '/poll/results'
+
+    def get_request(url, headers=None):
+        return lambda client: client.get(url, headers=headers).status_code == 200
+
+    return {
+        'index': get_request('/'),
+        'menu': get_request('/menu'),
+        'api_pizzas': get_request('/api/pizzas', {'Accept-Encoding': 'gzip'}),
+        'api_order': order_request,
+        'poll_vote': vote_request,
+        'poll_results': get_request('/poll/results'),
+        'admin': get_request('/admin'),
+    }
+
+def run_scenario(client, request_fn, requests_count, warmup):
+    for _ in range(warmup):
+        request_fn(client)
+
+    latencies = []
+    errors = 0
+    started = time.perf_counter()
+    for _ in range(requests_count):
+        request_started = time.perf_counter()
+        if not request_fn(client):
+            errors += 1
+        latencies.append(time.perf_counter() - request_started)
+    elapsed = time.perf_counter() - started
+
+    return {
+        'requests': requests_count,
+        'requests_per_sec': round(requests_count / elapsed, 1),
+        'p50_ms': round(percentile(latencies, 50) * 1000, 3),
+        'p95_ms': round(percentile(latencies, 95) * 1000, 3),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 3),
+        'errors': errors,
+    }
+
+def run_suite(scale_name, seed, requests_count, warmup, only=None, overrides=None):
+    scale = dict(SUITE_SCALES[scale_name], **(overrides or {}))
+    server, base_url = start_fake_weather_server()
+    os.environ['OPENWEATHER_BASE_URL'] = base_url
+    try:
+        app_module = create_test_app()
+        seed_started = time.perf_counter()
+        poll_id, pizza_ids = seed_suite_data(app_module, scale, seed)
+        seed_seconds = time.perf_counter() - seed_started
+
+        client = app_module.app.test_client()
+        scenarios = build_suite_scenarios(poll_id, pizza_ids, seed, scale['votes'])
+        results = {}
+        for name, request_fn in scenarios.items():
+            if only and name not in only:
+                continue
+            results[name] = run_scenario(client, request_fn, requests_count, warmup)
+            print(f"   {name}: {results[name]['requests_per_sec']} запитів/с, "
+                  f"p50={results[name]['p50_ms']} мс, p95={results[name]['p95_ms']} мс, "
+                  f"p99={results[name]['p99_ms']} мс, помилок: {results[name]['errors']}")
+    finally:
+        server.shutdown()
+
+    return {
+        'meta': {
+            'scale': scale_name,
+            'dataset': scale,
+            'seed': seed,
+            'requests': requests_count,
+            'warmup': warmup,
+            'seed_seconds': round(seed_seconds, 2),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'created_at': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        },
+        'results': results,
+    }
+
+def compare_results(current, baseline, threshold):
+    # Регресія: пропускна здатність впала або p95 зросла більше ніж на threshold
+    regressions = []
+    for name, result in current['results'].items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            continue
+        rps_change = result['requests_per_sec'] / previous['requests_per_sec'] - 1
+        p95_change = result['p95_ms'] / previous['p95_ms'] - 1 if previous['p95_ms'] else 0.0
+        regressed = rps_change < -threshold or p95_change > threshold or result['errors'] > previous['errors']
+        print(f"   {'❌' if regressed else '✅'} {name}: запитів/с {rps_change:+.1%}, p95 {p95_change:+.1%}")
+        if regressed:
+            regressions.append(name)
+    return regressions
+
+def run_suite_command(args):
+    overrides = {key: value for key, value in
+                 (('pizzas', args.pizzas), ('orders', args.orders), ('votes', args.votes))
+                 if value is not None}
+    print(f"📊 Набір бенчмарків: масштаб {args.scale}, seed {args.seed}, {args.requests} запитів на сценарій\n")
+    report = run_suite(args.scale, args.seed, args.requests, args.warmup, args.only, overrides)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+        print(f"\nРезультати збережено в {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        if baseline['meta']['dataset'] != report['meta']['dataset']:
+            print("⚠️ Базовий прогін зроблено на іншому наборі даних")
+        print(f"\nПорівняння з {args.baseline} (поріг {args.threshold:.0%}):")
+        regressions = compare_results(report, baseline, args.threshold)
+        if regressions:
+            print(f"\nРегресії: {', '.join(regressions)}")
+            return 1
+    return 0
+
+class PooledWSGIServer(WSGIServer):
+    # Звичайний синхронний режим: фіксована кількість робочих потоків, як у gunicorn --threads.
+    # Черга з'єднань як у gunicorn: з типовими 5 клієнт чекає на повтор SYN цілу секунду.
+    request_queue_size = 2048
+
+    def __init__(self, address, threads):
+        super().__init__(address, QuietRequestHandler)
+        self.pool = ThreadPoolExecutor(threads)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+class QuietRequestHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def serve_sync(port, threads):
+    app_module = create_test_app()
+    server = PooledWSGIServer(('127.0.0.1', port), threads)
+    server.set_app(app_module.app)
+    server.serve_forever()
+
+def wait_for_server(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f'Сервер {url} не запустився')
+
+def run_http_load(base_url, paths, clients, duration):
+    latencies = {path: [] for path in paths}
+    errors = []
+    deadline = time.monotonic() + duration
+
+    def worker(offset):
+        session = requests.Session()
+        index = offset
+        while time.monotonic() < deadline:
+            path = paths[index % len(paths)]
+            index += 1
+            started = time.perf_counter()
+            try:
+                ok = session.get(base_url + path, timeout=30).status_code == 200
+            except requests.RequestException:
+                ok = False
+            latencies[path].append(time.perf_counter() - started)
+            if not ok:
+                errors.append(path)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return latencies, errors
+
+def bench_async_mode(clients=64, duration=6.0, upstream_delay=2.0, sync_threads=8, port=5081):
+    # API погоди довго відповідає помилкою, а помилка кешується лише на секунду:
+    # запити до / регулярно чекають на API, решта маршрутів від погоди не залежить
+    print(f"\n⚡ Синхронний і асинхронний режим: {clients} клієнтів, API погоди відповідає {upstream_delay:.0f} с...")
+    weather_server, weather_url = start_fake_weather_server()
+    FakeWeatherHandler.mode = 'error'
+    FakeWeatherHandler.delay = upstream_delay
+    paths = ['/', '/menu', '/api/pizzas']
+    commands = {
+        f'sync ({sync_threads} потоків)': [sys.executable, os.path.abspath(__file__), '--serve-sync', str(port)],
+        'async (ASGI)': [sys.executable, os.path.join(BENCH_DIR, 'asgi.py')],
+    }
+    try:
+        for name, command in commands.items():
+            db_path = os.path.join(tempfile.mkdtemp(prefix='oderman-bench-'), 'bench.db')
+            env = dict(
+                os.environ, DATABASE_URL=f'sqlite:///{db_path}', OPENWEATHER_BASE_URL=weather_url,
+                PORT=str(port), WSGI_THREADS=str(sync_threads),
+                WEATHER_ERROR_TTL='1', WEATHER_FAILURE_THRESHOLD='1000000'
+            )
+            subprocess.run(FLASK_INIT_DB, env=env, cwd=BENCH_DIR, stdout=subprocess.DEVNULL, check=True)
+            process = subprocess.Popen(command, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            try:
+                base_url = f'http://127.0.0.1:{port}'
+                wait_for_server(base_url + '/api/pizzas')
+                latencies, errors = run_http_load(base_url, paths, clients, duration)
+            finally:
+                process.terminate()
+                process.wait()
+
+            total = sum(len(values) for values in latencies.values())
+            print(f"   {name}: {total / duration:.0f} запитів/с, помилок: {len(errors)}")
+            for path in paths:
+                print_latency(path, latencies[path])
+    finally:
+        FakeWeatherHandler.mode = 'ok'
+        FakeWeatherHandler.delay = 0
+        weather_server.shutdown()
+
+def bench_popularity(orders_count=200000, requests_count=200):
+    from datetime import datetime, timedelta
+    from sqlalchemy import func, select
+    from models import db, Order, OrderItem
+    from popularity import PopularityTracker, WINDOWS
+
+    print(f"\n📈 Популярність за 1 год / 24 год / 7 днів: {orders_count} замовлень за 30 днів...")
+    app_module = create_test_app()
+    seed_suite_data(app_module, {'pizzas': 100, 'orders': orders_count, 'votes': 0}, 42)
+    client = app_module.app.test_client()
+
+    with app_module.app.app_context():
+        latencies = []
+        for _ in range(20):
+            started = time.perf_counter()
+            for seconds in WINDOWS.values():
+                db.session.execute(
+                    select(OrderItem.pizza_id, func.sum(OrderItem.quantity))
+                    .join(Order, OrderItem.order_id == Order.id)
+                    .where(Order.created_at >= datetime.utcnow() - timedelta(seconds=seconds))
+                    .group_by(OrderItem.pizza_id)
+                ).all()
+            latencies.append(time.perf_counter() - started)
+        print_latency('GROUP BY на кожен запит', latencies)
+
+        tracker = PopularityTracker()
+        started = time.perf_counter()
+        tracker.get_snapshot()
+        print(f"   перебудова кільцевого буфера: {(time.perf_counter() - started) * 1000:.0f} мс, "
+              f"позицій {tracker.stats['items']}")
+
+        latencies = []
+        for _ in range(20):
+            client.post('/api/order', json={
+                'customer': SUITE_CUSTOMER, 'items': [{'pizza_id': 1, 'quantity': 2}, {'pizza_id': 2}]
+            })
+            tracker.expire()
+            started = time.perf_counter()
+            tracker.get_snapshot()
+            latencies.append(time.perf_counter() - started)
+        print_latency('дочитування нового замовлення', latencies)
+
+    client.get('/api/pizzas?sort=trending')
+    latencies = []
+    for _ in range(requests_count):
+        started = time.perf_counter()
+        assert client.get('/api/pizzas?sort=trending').status_code == 200
+        latencies.append(time.perf_counter() - started)
+    print_latency('/api/pizzas?sort=trending', latencies)
+
+def run_write_flood(base_url, clients, deadline):
+    statuses = Counter()
+    order = {
+        'customer': {'name': 'Бот', 'phone': '+380000000000', 'address': 'вул. Тестова, 1'},
+        'items': [{'pizza_id': 1, 'quantity': 1}]
+    }
+
+    def worker():
+        session = requests.Session()
+        while time.monotonic() < deadline:
+            try:
+                statuses[session.post(base_url + '/api/order', json=order, timeout=30).status_code] += 1
+            except requests.RequestException:
+                statuses['error'] += 1
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    return threads, statuses
+
+def bench_admission(flood_clients=32, readers=4, duration=5.0, port=5082):
+    print(f"\n🛡️ Читання під час повені записів: {flood_clients} клієнтів шлють замовлення...")
+    paths = ['/api/pizzas', '/menu']
+    modes = {
+        'без обмежень': {'RATE_LIMIT_ENABLED': '0'},
+        'ліміт на IP': {'RATE_LIMIT_ENABLED': '1'},
+        'лише ліміт одночасних записів': {
+            'RATE_LIMIT_ENABLED': '1', 'ORDER_RATE_PER_MINUTE': '1000000', 'ORDER_RATE_BURST': '1000000'
+        },
+    }
+    for name, overrides in modes.items():
+        db_path = os.path.join(tempfile.mkdtemp(prefix='oderman-bench-'), 'bench.db')
+        env = dict(
+            os.environ, DATABASE_URL=f'sqlite:///{db_path}', DB_PROFILE='production',
+            PORT=str(port), WSGI_THREADS='16', **overrides
+        )
+        subprocess.run(FLASK_INIT_DB, env=env, cwd=BENCH_DIR, stdout=subprocess.DEVNULL, check=True)
+        process = subprocess.Popen([sys.executable, os.path.abspath(__file__), '--serve-sync', str(port)],
+                                   env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            base_url = f'http://127.0.0.1:{port}'
+            wait_for_server(base_url + '/api/pizzas')
+            quiet, _ = run_http_load(base_url, paths, readers, duration / 2)
+            flood, statuses = run_write_flood(base_url, flood_clients, time.monotonic() + duration)
+            latencies, errors = run_http_load(base_url, paths, readers, duration)
+            for thread in flood:
+                thread.join()
+        finally:
+            process.terminate()
+            process.wait()
+
+        print(f"   {name}: відповіді на замовлення {dict(sorted(statuses.items(), key=str))}, "
+              f"помилок читання: {len(errors)}")
+        print_latency('читання без навантаження', [value for path in paths for value in quiet[path]])
+        print_latency('читання під час повені', [value for path in paths for value in latencies[path]])
+
+def run_startup_probe(initialize):
+    # Виконується в окремому процесі-"воркері": від імпорту до першої відповіді
+    started = time.perf_counter()
+    import app as app_module
+    imported = time.perf_counter()
+    flask_app = app_module.create_app()
+    created = time.perf_counter()
+    if initialize:
+        app_module.init_database(flask_app)
+    initialized = time.perf_counter()
+
+    client = flask_app.test_client()
+    first_requests = {}
+    for path in ('/api/pizzas', '/'):
+        request_started = time.perf_counter()
+        assert client.get(path).status_code == 200
+        first_requests[path] = time.perf_counter() - request_started
+    return {
+        'import': imported - started,
+        'create_app': created - imported,
+        'init_db': initialized - created,
+        'first_requests': first_requests,
+        'ready': time.perf_counter() - started,
+    }
+
+def bench_startup(workers=4, scale_name='medium'):
+    print(f"\n🚀 Старт воркерів: {workers} одночасно, база масштабу {scale_name}...")
+    weather_server, weather_url = start_fake_weather_server()
+    os.environ['OPENWEATHER_BASE_URL'] = weather_url
+    try:
+        app_module = create_test_app()
+        seed_suite_data(app_module, SUITE_SCALES[scale_name], 42)
+
+        modes = {
+            'до (init_database у кожному воркері)': ['--startup-probe', '--init-db'],
+            'після (фабрика, схема через flask init-db)': ['--startup-probe'],
+        }
+        for name, extra in modes.items():
+            started = time.perf_counter()
+            processes = [
+                subprocess.Popen([sys.executable, os.path.abspath(__file__)] + extra,
+                                 stdout=subprocess.PIPE, text=True)
+                for _ in range(workers)
+            ]
+            results = [json.loads(process.communicate()[0].strip().splitlines()[-1]) for process in processes]
+            elapsed = time.perf_counter() - started
+
+            average = lambda key: sum(result[key] for result in results) / len(results) * 1000
+            first = lambda path: sum(result['first_requests'][path] for result in results) / len(results) * 1000
+            print(f"   {name}: усі воркери готові за {elapsed:.2f} с")
+            print(f"      імпорт {average('import'):.0f} мс, create_app {average('create_app'):.1f} мс, "
+                  f"init_database {average('init_db'):.0f} мс, перший /api/pizzas {first('/api/pizzas'):.0f} мс, "
+                  f"перший / {first('/'):.0f} мс, до готовності {average('ready'):.0f} мс")
+    finally:
+        weather_server.shutdown()
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description='Бенчмарки Oderman')
+    parser.add_argument('--suite', action='store_true', help='Набір бенчмарків ендпоінтів з JSON-звітом')
+    parser.add_argument('--scale', choices=SUITE_SCALES, default='small')
+    parser.add_argument('--pizzas', type=int)
+    parser.add_argument('--orders', type=int)
+    parser.add_argument('--votes', type=int)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--warmup', type=int, default=20)
+    parser.add_argument('--only', nargs='+', help='Запустити лише вказані сценарії')
+    parser.add_argument('--output', help='Файл для JSON-звіту')
+    parser.add_argument('--baseline', help='JSON-звіт попереднього прогону для порівняння')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Допустиме погіршення, частка')
+    parser.add_argument('--write-load', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--serve-sync', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--vote-load', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--startup-probe', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--init-db', action='store_true', help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+if __name__ == '__main__':
+    args = parse_args(sys.argv[1:])
+    if args.write_load:
+        print(json.dumps(run_write_load()))
+        sys.exit(0)
+    if args.vote_load:
+        print(json.dumps(run_vote_load(args.vote_load)))
+        sys.exit(0)
+    if args.startup_probe:
+        print(json.dumps(run_startup_probe(args.init_db)))
+        sys.exit(0)
+    if args.serve_sync:
+        serve_sync(args.serve_sync, int(os.getenv('WSGI_THREADS', '8')))
+        sys.exit(0)
+    if args.suite:
+        sys.exit(run_suite_command(args))
+
+    print("Початок бенчмарків Oderman\n")
+
+    bench_weather_failing_upstream()
+    bench_weather_cache()
+    bench_weather_scheduler()
+
+    app_module = create_test_app()
+    bench_api_pizzas(app_module)
+    bench_template_cache(app_module)
+    bench_create_order(app_module)
+    bench_kitchen_feed(app_module)
+    bench_db_profile()
+    bench_async_mode()
+    bench_admission()
+    bench_votes()
+    bench_indexes()
+    bench_search()
+    bench_popularity()
+    bench_startup()
+
+    print("\nБенчмарки завершено!")
@@ -0,0 +1,23 @@
+import pytest
+
+import app as app_module
+
+@pytest.fixture
+def make_app(tmp_path):
+    # Окрема база, черга і фільтр голосів на кожен тест; ліміти запитів вимкнені
+    def make(**config):
+        settings = {
+            'SQLALCHEMY_DATABASE_URI': f"sqlite:///{tmp_path / 'oderman.db'}",
+            'ORDER_QUEUE_PATH': str(tmp_path / 'order_queue.db'),
+            'POLL_VOTE_SEEN_PATH': str(tmp_path / 'poll_votes.bloom'),
+            'RATE_LIMIT_ENABLED': False,
+        }
+        settings.update(config)
+        app = app_module.create_app(settings)
+        app_module.init_database(app)
+        return app
+    return make
+
+@pytest.fixture
+def app(make_app):
+    return make_app()
@@ -0,0 +1,80 @@
+import hashlib
+import threading
+from datetime import date
+
+from flask import current_app, request, render_template
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+def template_cache_enabled():
+    # У режимі debug шаблони редагуються на льоту, тож кеш лише заважав би
+    return current_app.config.get('TEMPLATE_CACHE', True) and not current_app.debug
+
+class FragmentCacheExtension(Extension):
+    # {% cache "назва", ключ... %}...{% endcache %}
+    # Для кожної назви зберігається лише остання версія фрагмента: коли ключ
+    # (наприклад, версія меню) змінюється, старий HTML просто замінюється.
+    tags = {'cache'}
+
+    def __init__(self, environment):
+        super().__init__(environment)
+        environment.extend(fragment_cache={}, fragment_cache_stats={'hits': 0, 'misses': 0})
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        args = [parser.parse_expression()]
+        while parser.stream.skip_if('comma'):
+            args.append(parser.parse_expression())
+
+        body = parser.parse_statements(['name:endcache'], drop_needle=True)
+        return nodes.CallBlock(
+            self.call_method('_render_cached', [nodes.List(args)]), [], [], body
+        ).set_lineno(lineno)
+
+    def _render_cached(self, args, caller):
+        if not template_cache_enabled():
+            return caller()
+
+        name, key = args[0], tuple(args[1:])
+        cache = self.environment.fragment_cache
+        stats = self.environment.fragment_cache_stats
+        cached = cache.get(name)
+        if cached is not None and cached[0] == key:
+            stats['hits'] += 1
+            return cached[1]
+
+        stats['misses'] += 1
+        html = caller()
+        cache[name] = (key, html)
+        return html
+
+class StaticPageCache:
+    # Сторінки без даних із бази рендеряться один раз і віддаються готовими байтами.
+    # Ключ містить endpoint (від нього залежить активний пункт меню) і рік у футері.
+
+    def __init__(self):
+        self._pages = {}
+        self._lock = threading.Lock()
+
+    def render(self, template_name, status=200):
+        if not template_cache_enabled():
+            return render_template(template_name), status
+
+        key = (template_name, request.endpoint, date.today().year)
+        page = self._pages.get(key)
+        if page is None:
+            with self._lock:
+                page = self._pages.get(key)
+                if page is None:
+                    body = render_template(template_name).encode('utf-8')
+                    page = (body, hashlib.sha256(body).hexdigest()[:32])
+                    self._pages[key] = page
+
+        body, etag = page
+        response = current_app.response_class(body, status=status, mimetype='text/html')
+        response.set_etag(etag)
+        return response.make_conditional(request)
+
+    def clear(self):
+        with self._lock:
+            self._pages.clear()
@@ -0,0 +1,226 @@
+import threading
+import time
+
+from sqlalchemy import func, insert, select, update
+from sqlalchemy.orm import selectinload
+
+from models import db, Order, OrderItem, OrderChange
+from admin_stats import add_to_counters
+from order_service import format_order_id
+
+# Дозволені переходи статусів на кухні
+STATUS_TRANSITIONS = {
+    'pending': {'preparing', 'cancelled'},
+    'preparing': {'ready', 'cancelled'},
+    'ready': {'delivering', 'delivered'},
+    'delivering': {'delivered'},
+    'delivered': set(),
+    'cancelled': set(),
+}
+ACTIVE_STATUSES = ('pending', 'preparing', 'ready')
+FEED_PAGE_SIZE = 200
+MAX_WAIT = 30
+
+class KitchenError(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
+def record_changes(order_ids, status):
+    # У тій самій транзакції, що й зміна замовлення: кухня не побачить незакомічене
+    if order_ids:
+        db.session.execute(insert(OrderChange), [
+            {'order_id': order_id, 'status': status} for order_id in order_ids
+        ])
+
+def current_sequence():
+    return db.session.execute(select(func.max(OrderChange.id))).scalar() or 0
+
+def serialize_order(order):
+    return {
+        'id': order.id,
+        'number': format_order_id(order.id),
+        'status': order.status,
+        'created_at': order.created_at.isoformat() if order.created_at else None,
+        'customer_name': order.customer_name,
+        'delivery_type': order.delivery_type,
+        'delivery_time': order.delivery_time,
+        'notes': order.notes or order.order_comment or '',
+        'items': [
+            {'pizza_id': item.pizza_id, 'name': item.pizza.name, 'quantity': item.quantity}
+            for item in order.items
+        ],
+    }
+
+def load_orders(order_ids):
+    # Позиції та назви піц - одним додатковим запитом на всю сторінку
+    orders = Order.query.options(
+        selectinload(Order.items).joinedload(OrderItem.pizza)
+    ).filter(Order.id.in_(order_ids)).all()
+    return {order.id: order for order in orders}
+
+def load_snapshot():
+    # Перше підключення екрана: усі активні замовлення і курсор, з якого продовжувати
+    sequence = current_sequence()
+    orders = Order.query.options(
+        selectinload(Order.items).joinedload(OrderItem.pizza)
+    ).filter(Order.status.in_(ACTIVE_STATUSES)).order_by(Order.id).all()
+    return {
+        'cursor': sequence,
+        'orders': [serialize_order(order) for order in orders],
+        'has_more': False,
+    }
+
+def load_changes(after, limit=FEED_PAGE_SIZE):
+    changes = db.session.execute(
+        select(OrderChange.id, OrderChange.order_id)
+        .where(OrderChange.id > after)
+        .order_by(OrderChange.id)
+        .limit(limit + 1)
+    ).all()
+    has_more = len(changes) > limit
+    changes = changes[:limit]
+    if not changes:
+        return {'cursor': after, 'orders': [], 'has_more': False}
+
+    # Кілька змін одного замовлення згортаються в його поточний стан
+    latest = {}
+    for change_id, order_id in changes:
+        latest.pop(order_id, None)
+        latest[order_id] = change_id
+    orders = load_orders(list(latest))
+    return {
+        'cursor': changes[-1].id,
+        'orders': [serialize_order(orders[order_id]) for order_id in latest if order_id in orders],
+        'has_more': has_more,
+    }
+
+def parse_status(data):
+    if not isinstance(data, dict) or not isinstance(data.get('status'), str):
+        raise KitchenError('Некоректні дані: очікується {"status": "..."}')
+    return data['status']
+
+def transition_order(order_id, status):
+    if status not in STATUS_TRANSITIONS:
+        raise KitchenError(f'Невідомий статус "{status}"')
+
+    current = db.session.execute(select(Order.status).where(Order.id == order_id)).scalar()
+    if current is None:
+        raise KitchenError(f'Замовлення {format_order_id(order_id)} не знайдено', 404)
+    if status not in STATUS_TRANSITIONS.get(current, ()):
+        raise KitchenError(f'Неможливо змінити статус з "{current}" на "{status}"', 409)
+
+    # Умова на попередній статус: два екрани не змінять замовлення одночасно
+    result = db.session.execute(
+        update(Order)
+        .where(Order.id == order_id, Order.status == current)
+        .values(status=status)
+    )
+    if result.rowcount != 1:
+        raise KitchenError('Статус замовлення вже змінено з іншого екрана', 409)
+
+    record_changes([order_id], status)
+    if current == 'pending':
+        add_to_counters(pending_orders=-1)
+    return current
+
+class KitchenFeed:
+    # Один фоновий потік на процес стежить за max(order_change.id) і будить усіх,
+    # хто чекає в long-poll. Зміни з цього процесу будять його одразу через
+    # notify(), з інших воркерів - не пізніше ніж за check_interval. Скільки б
+    # екранів не чекало, база отримує один дешевий запит за інтервал.
+    # В ASGI-режимі екрани чекають у event loop (wait_async), не займаючи потоків.
+
+    def __init__(self, app, check_interval=0.5):
+        self.app = app
+        self.check_interval = check_interval
+
+        self._condition = threading.Condition()
+        self._dirty = threading.Event()
+        self._sequence = None
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self._async_waiters = set()
+        self.stats = {'checks': 0, 'wakeups': 0, 'waiting': 0}
+
+    def notify(self):
+        self._dirty.set()
+        self._ensure_started()
+
+    def wait(self, after, timeout):
+        self._ensure_started()
+        with self._condition:
+            self.stats['waiting'] += 1
+            try:
+                return self._condition.wait_for(lambda: self._has_changes(after), timeout)
+            finally:
+                self.stats['waiting'] -= 1
+
+    async def wait_async(self, after, timeout):
+        # asyncio потрібен лише в asgi.py - не на шляху старту звичайного воркера
+        import asyncio
+
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+
+        def wake():
+            loop.call_soon_threadsafe(event.set)
+
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            self._async_waiters.add(wake)
+            self.stats['waiting'] += 1
+        try:
+            # Курсор клієнта може бути попереду (зміни з іншого воркера) - чекаємо далі
+            while not self._has_changes(after):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                event.clear()
+                try:
+                    await asyncio.wait_for(event.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+            return True
+        finally:
+            with self._condition:
+                self._async_waiters.discard(wake)
+                self.stats['waiting'] -= 1
+
+    def _has_changes(self, after):
+        return self._sequence is not None and self._sequence > after
+
+    def get_status(self):
+        return dict(self.stats, sequence=self._sequence)
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                with self.app.app_context():
+                    try:
+                        sequence = current_sequence()
+                    finally:
+                        db.session.remove()
+            except Exception:
+                sequence = None
+            self.stats['checks'] += 1
+
+            if sequence is not None and sequence != self._sequence:
+                with self._condition:
+                    self._sequence = sequence
+                    self.stats['wakeups'] += 1
+                    self._condition.notify_all()
+                    for wake in self._async_waiters:
+                        wake()
+
+            self._dirty.wait(self.check_interval)
+            self._dirty.clear()
@@ -0,0 +1,116 @@
+import gzip
+import hashlib
+import threading
+import time
+
+from flask import current_app
+from sqlalchemy import select
+from sqlalchemy.dialects.sqlite import insert
+
+from models import db, Pizza, CacheVersion
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+MENU_VERSION_KEY = 'menu'
+
+def get_version(name):
+    version = db.session.execute(
+        select(CacheVersion.version).where(CacheVersion.name == name)
+    ).scalar()
+    return version or 0
+
+def bump_version(name):
+    # Атомарний інкремент у поточній транзакції, щоб усі воркери побачили зміну
+    db.session.execute(
+        insert(CacheVersion)
+        .values(name=name, version=1)
+        .on_conflict_do_update(
+            index_elements=[CacheVersion.name],
+            set_={'version': CacheVersion.version + 1}
+        )
+    )
+
+class MenuSnapshot:
+    def __init__(self, version, pizzas, prices):
+        self.version = version
+        self.pizzas = pizzas
+        self.prices = prices
+        self.by_id = {pizza['id']: pizza for pizza in pizzas}
+
+        # Готові байти для /api/pizzas: серіалізуємо та стискаємо один раз на версію меню
+        self.json_body = (current_app.json.dumps(pizzas) + '\n').encode('utf-8')
+        self.gzip_body = gzip.compress(self.json_body, compresslevel=9, mtime=0)
+        self.br_body = brotli.compress(self.json_body) if brotli else None
+        self.etag = hashlib.sha256(self.json_body).hexdigest()[:32]
+
+    def encoded_body(self, accept_encodings):
+        # Кожне кодування - окреме представлення зі своїм сильним ETag
+        if self.br_body is not None and accept_encodings['br']:
+            return self.br_body, 'br', f'{self.etag}-br'
+        if accept_encodings['gzip']:
+            return self.gzip_body, 'gzip', f'{self.etag}-gzip'
+        return self.json_body, None, self.etag
+
+class MenuCache:
+    def __init__(self, check_interval=2.0):
+        self.check_interval = check_interval
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def get_snapshot(self):
+        if not self.needs_check():
+            return self._snapshot
+
+        with self._lock:
+            if not self.needs_check():
+                return self._snapshot
+
+            snapshot = self._snapshot
+            version = get_version(MENU_VERSION_KEY)
+            if snapshot is None or snapshot.version != version:
+                snapshot = self._build(version, Pizza.query.filter_by(available=True).order_by(Pizza.id).all())
+                self._snapshot = snapshot
+            self._checked_at = time.monotonic()
+            return snapshot
+
+    def needs_check(self):
+        return self._snapshot is None or time.monotonic() - self._checked_at >= self.check_interval
+
+    @property
+    def version(self):
+        return self._snapshot.version if self._snapshot is not None else None
+
+    def install(self, version, pizzas=None):
+        # Для завантажувачів поза сесією Flask-SQLAlchemy (асинхронний режим):
+        # версію й рядки піц вони читають самі, кеш лише приймає результат.
+        # Поки вони читали, запит з пулу потоків міг уже перебудувати знімок:
+        # тоді старіша версія чи версія без піц його не замінює
+        with self._lock:
+            snapshot = self._snapshot
+            if pizzas is not None and (snapshot is None or version > snapshot.version):
+                snapshot = self._build(version, pizzas)
+                self._snapshot = snapshot
+            if snapshot is not None and snapshot.version >= version:
+                self._checked_at = time.monotonic()
+            return snapshot
+
+    def get_pizzas(self):
+        return self.get_snapshot().pizzas
+
+    def invalidate(self):
+        bump_version(MENU_VERSION_KEY)
+
+    def expire(self):
+        self._checked_at = 0.0
+
+    @staticmethod
+    def _build(version, pizzas):
+        return MenuSnapshot(
+            version,
+            [pizza.to_dict() for pizza in pizzas],
+            {pizza.id: pizza.price for pizza in pizzas}
+        )
@@ -0,0 +1,283 @@
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from datetime import datetime
+
+from flask import g, has_request_context, request, before_render_template, template_rendered
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+QUANTILES = (0.5, 0.95, 0.99)
+PREFIX = 'oderman'
+
+class Histogram:
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q):
+        # Та сама лінійна інтерполяція в межах кошика, що й histogram_quantile у Prometheus
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        cumulative = 0
+        for index, count in enumerate(self.counts):
+            if cumulative + count >= rank and count:
+                if index == len(self.buckets):
+                    return self.buckets[-1]
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index]
+                return lower + (upper - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.buckets[-1]
+
+class SlowRequestProfiler:
+    # Фоновий потік кожні interval секунд знімає стеки потоків, що обробляють запити.
+    # Якщо запит виявився повільним, стеки пишуться у файл у "folded"-форматі
+    # (flamegraph.pl, speedscope). Працює з потоковим сервером, не з gevent.
+
+    def __init__(self, threshold, output_dir, interval=0.005):
+        self.threshold = threshold
+        self.output_dir = output_dir
+        self.interval = interval
+        self.written = 0
+
+        self._active = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def begin(self):
+        self._ensure_started()
+        ident = threading.get_ident()
+        with self._lock:
+            self._active[ident] = Counter()
+        return ident
+
+    def end(self, ident, duration, label):
+        with self._lock:
+            stacks = self._active.pop(ident, None)
+        if not stacks or duration < self.threshold:
+            return None
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{label}-{int(duration * 1000)}ms.folded"
+        path = os.path.join(self.output_dir, name)
+        with open(path, 'w') as file:
+            for stack, count in stacks.items():
+                file.write(f'{stack} {count}\n')
+        self.written += 1
+        return path
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.interval)
+            frames = sys._current_frames()
+            with self._lock:
+                for ident, stacks in self._active.items():
+                    frame = frames.get(ident)
+                    if frame is not None:
+                        stacks[self._collapse(frame)] += 1
+
+    @staticmethod
+    def _collapse(frame):
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f'{code.co_name}({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+            frame = frame.f_back
+        return ';'.join(reversed(names))
+
+class Metrics:
+    # Таймери маршрутів, SQL, шаблонів і погоди. Значення накопичуються в пам'яті
+    # процесу і віддаються на /metrics у текстовому форматі Prometheus.
+
+    def __init__(self, profiler=None):
+        self.profiler = profiler
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def init_app(self, app, engine):
+        app.before_request(self._before_request)
+        app.after_request(self._after_request)
+        app.teardown_request(self._teardown_request)
+        before_render_template.connect(self._before_render, app)
+        template_rendered.connect(self._after_render, app)
+        # Рушій саме цього застосунку: SQL інших застосунків процесу сюди не потрапляє
+        event.listen(engine, 'before_cursor_execute', self._before_cursor_execute)
+        event.listen(engine, 'after_cursor_execute', self._after_cursor_execute)
+
+    def observe(self, name, labels, value, buckets=LATENCY_BUCKETS):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    def inc(self, name, labels, value=1):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe_weather_upstream(self, duration, success):
+        self.observe('weather_upstream_seconds', {'outcome': 'success' if success else 'error'}, duration)
+
+    def add_phase(self, phase, duration):
+        if has_request_context() and 'metrics_phases' in g:
+            g.metrics_phases[phase] = g.metrics_phases.get(phase, 0.0) + duration
+
+    def timer(self, phase):
+        return _PhaseTimer(self, phase)
+
+    def _before_request(self):
+        g.metrics_started = time.perf_counter()
+        g.metrics_phases = {}
+        g.metrics_sql_queries = 0
+        g.metrics_render_started = []
+        if self.profiler is not None:
+            g.metrics_profile_ident = self.profiler.begin()
+
+    def _after_request(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        duration = time.perf_counter() - started
+        endpoint = request.endpoint or 'unmatched'
+        phases = g.metrics_phases
+
+        self.observe('http_request_duration_seconds', {'endpoint': endpoint, 'method': request.method}, duration)
+        self.inc('http_requests_total', {
+            'endpoint': endpoint, 'method': request.method, 'status': str(response.status_code)
+        })
+        self.observe('sql_queries_per_request', {'endpoint': endpoint}, g.metrics_sql_queries, COUNT_BUCKETS)
+        for phase, phase_duration in phases.items():
+            self.observe('request_phase_seconds', {'endpoint': endpoint, 'phase': phase}, phase_duration)
+
+        timing = [f'total;dur={duration * 1000:.1f}']
+        timing.extend(f'{phase};dur={value * 1000:.1f}' for phase, value in phases.items())
+        response.headers['Server-Timing'] = ', '.join(timing)
+
+        if self.profiler is not None and 'metrics_profile_ident' in g:
+            if self.profiler.end(g.pop('metrics_profile_ident'), duration, endpoint):
+                self.inc('slow_request_profiles_total', {'endpoint': endpoint})
+        return response
+
+    def _teardown_request(self, error):
+        # after_request не викликався (виняток у іншому обробнику) - знімаємо потік з профілювання
+        if self.profiler is not None and 'metrics_profile_ident' in g:
+            self.profiler.end(g.pop('metrics_profile_ident'), 0.0, 'error')
+
+    def _before_render(self, sender, template, context, **extra):
+        if has_request_context() and 'metrics_render_started' in g:
+            g.metrics_render_started.append(time.perf_counter())
+
+    def _after_render(self, sender, template, context, **extra):
+        if not has_request_context() or not g.get('metrics_render_started'):
+            return
+        duration = time.perf_counter() - g.metrics_render_started.pop()
+        self.observe('template_render_seconds', {'template': template.name or 'string'}, duration)
+        # Вкладені render_template вже враховані в зовнішньому шаблоні
+        if not g.metrics_render_started:
+            self.add_phase('template', duration)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        # Час старту - на контексті виконання, а не на з'єднанні: невдалий запит
+        # (IntegrityError при повторному голосі) не лишає нічого в пулі
+        if context is not None:
+            context.metrics_query_started = time.perf_counter()
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        started = getattr(context, 'metrics_query_started', None)
+        if started is None:
+            return
+        duration = time.perf_counter() - started
+        in_request = has_request_context() and 'metrics_sql_queries' in g
+        source = 'request' if in_request else 'background'
+        self.inc('sql_queries_total', {'source': source})
+        self.inc('sql_seconds_total', {'source': source}, duration)
+        if in_request:
+            g.metrics_sql_queries += 1
+            self.add_phase('sql', duration)
+
+    def render(self, extra_gauges=None):
+        with self._lock:
+            histograms = {key: (h.buckets, list(h.counts), h.sum, h.count, [h.quantile(q) for q in QUANTILES])
+                          for key, h in self._histograms.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        for name in sorted({key[0] for key in counters}):
+            lines.append(f'# TYPE {PREFIX}_{name} counter')
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{PREFIX}_{name}{_format_labels(labels)} {_format_value(value)}')
+
+        for name in sorted({key[0] for key in histograms}):
+            series = sorted((labels, data) for (metric, labels), data in histograms.items() if metric == name)
+            lines.append(f'# TYPE {PREFIX}_{name} histogram')
+            for labels, (buckets, counts, total, count, _) in series:
+                cumulative = 0
+                for bound, bucket_count in zip(buckets, counts):
+                    cumulative += bucket_count
+                    lines.append(f'{PREFIX}_{name}_bucket{_format_labels(labels + (("le", _format_value(bound)),))} {cumulative}')
+                lines.append(f'{PREFIX}_{name}_bucket{_format_labels(labels + (("le", "+Inf"),))} {count}')
+                lines.append(f'{PREFIX}_{name}_sum{_format_labels(labels)} {_format_value(total)}')
+                lines.append(f'{PREFIX}_{name}_count{_format_labels(labels)} {count}')
+
+            # Готові p50/p95/p99, щоб не рахувати їх вручну без Prometheus
+            lines.append(f'# TYPE {PREFIX}_{name}_quantile gauge')
+            for labels, (_, _, _, _, quantiles) in series:
+                for q, value in zip(QUANTILES, quantiles):
+                    lines.append(f'{PREFIX}_{name}_quantile{_format_labels(labels + (("quantile", str(q)),))} {_format_value(value)}')
+
+        for name, value in sorted((extra_gauges or {}).items()):
+            lines.append(f'# TYPE {PREFIX}_{name} gauge')
+            lines.append(f'{PREFIX}_{name} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+class _PhaseTimer:
+    def __init__(self, metrics, phase):
+        self.metrics = metrics
+        self.phase = phase
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metrics.add_phase(self.phase, time.perf_counter() - self.started)
+        return False
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    escaped = (
+        f'{key}="' + str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+        for key, value in labels
+    )
+    return '{' + ','.join(escaped) + '}'
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(round(value, 6))
+    return str(value)
@@ -0,0 +1,64 @@
+from sqlalchemy import text
+
+from models import db, Order, PollVote, PollTally, SalesBucket, StatCounter
+from poll_tally import rebuild_tally
+from admin_stats import rebuild_sales_buckets, reconcile_counters, RECONCILED_AT
+from pizza_search import ensure_search_index
+
+def remove_duplicate_votes():
+    # Унікальний індекс не створиться, якщо в старій базі вже є повторні голоси
+    result = db.session.execute(text(
+        'DELETE FROM poll_vote WHERE id NOT IN '
+        '(SELECT MIN(id) FROM poll_vote GROUP BY poll_id, voter_ip)'
+    ))
+    return result.rowcount
+
+# Індекси, які замінив ключ пагінації coalesce(created_at, епоха): лише сповільнюють запис
+OBSOLETE_INDEXES = ['ix_pizza_created_at_id', 'ix_order_created_at_id']
+
+def drop_obsolete_indexes():
+    dropped = []
+    for name in OBSOLETE_INDEXES:
+        exists = db.session.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = :name"), {'name': name}
+        ).first()
+        if exists:
+            db.session.execute(text(f'DROP INDEX {name}'))
+            dropped.append(name)
+    return dropped
+
+def create_missing_indexes():
+    created = []
+    for table in db.metadata.sorted_tables:
+        existing = {
+            row[1] for row in db.session.execute(text(f'PRAGMA index_list("{table.name}")'))
+        }
+        for index in table.indexes:
+            if index.name not in existing:
+                index.create(db.session.connection())
+                created.append(index.name)
+    return created
+
+def upgrade_database():
+    db.create_all()
+    removed_votes = remove_duplicate_votes()
+    created = create_missing_indexes()
+    dropped = drop_obsolete_indexes()
+    search_index_created = ensure_search_index()
+    # Таблиця підсумків щойно з'явилась у старій базі - заповнюємо її з голосів
+    if PollTally.query.first() is None and PollVote.query.first() is not None:
+        rebuild_tally()
+    if SalesBucket.query.first() is None and Order.query.first() is not None:
+        rebuild_sales_buckets()
+    # Лічильники адмінки ще не звірялись - без цього дашборд показав би нулі
+    if db.session.get(StatCounter, RECONCILED_AT) is None:
+        reconcile_counters()
+    db.session.commit()
+    db.session.execute(text('ANALYZE'))
+    db.session.commit()
+    return {
+        'removed_duplicate_votes': removed_votes,
+        'created_indexes': created,
+        'dropped_indexes': dropped,
+        'search_index_created': search_index_created,
+    }
@@ -1,8 +1,70 @@
+from flask import current_app, has_app_context
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event
 from datetime import datetime
+import threading
 
 db = SQLAlchemy()
 
+SQLITE_PRODUCTION_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'busy_timeout': 5000,
+    'mmap_size': 268435456,
+    'cache_size': -20000,
+    'temp_store': 'MEMORY',
+}
+
+def sqlite_engine_options(profile):
+    if profile != 'production':
+        return {}
+    return {
+        'pool_size': 10,
+        'max_overflow': 20,
+        'pool_timeout': 30,
+        'pool_recycle': 3600,
+        'connect_args': {'timeout': 30, 'check_same_thread': False},
+    }
+
+def install_sqlite_pragmas(engine, pragmas=SQLITE_PRODUCTION_PRAGMAS):
+    @event.listens_for(engine, 'connect')
+    def set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+class WriteLane:
+    # Один записувач на застосунок: SQLite все одно серіалізує записи,
+    # а черга на локі дешевша за очікування на busy_timeout. Лок живе в
+    # app.extensions, тож production-застосунок не вмикає його для інших.
+
+    def init_app(self, app, enabled=False):
+        app.extensions['oderman_write_lane'] = threading.Lock() if enabled else None
+
+    @staticmethod
+    def _lock():
+        return current_app.extensions.get('oderman_write_lane') if has_app_context() else None
+
+    def __enter__(self):
+        lock = self._lock()
+        if lock is not None:
+            lock.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        lock = self._lock()
+        if lock is not None:
+            lock.release()
+        return False
+
+write_lane = WriteLane()
+
+def created_key(created_at):
+    # Ключ пагінації: рядок без дати стоїть там, де стояв би рядок з датою епохи.
+    # Вираз той самий в індексі й у запиті - інакше SQLite не використає індекс.
+    return db.func.coalesce(created_at, db.literal_column("'1970-01-01 00:00:00.000000'"))
+
 class Pizza(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
@@ -17,6 +79,12 @@ class Pizza(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    __table_args__ = (
+        db.Index('ix_pizza_available', 'available'),
+        db.Index('ix_pizza_created_key_id', created_key(created_at), 'id'),
+        db.Index('ix_pizza_category_price', 'category', 'price'),
+    )
+
     def __repr__(self):
         return f'<Pizza {self.name}>'
 
@@ -52,9 +120,31 @@ class Order(db.Model):
 
     items = db.relationship('OrderItem', backref='order', lazy=True, cascade='all, delete-orphan')
 
+    __table_args__ = (
+        db.Index('ix_order_status_created_at', 'status', 'created_at'),
+        db.Index('ix_order_created_key_id', created_key(created_at), 'id'),
+        db.Index('ix_order_status_created_key_id', 'status', created_key(created_at), 'id'),
+    )
+
     def __repr__(self):
         return f'<Order {self.id}>'
 
+class OrderChange(db.Model):
+    # Журнал змін замовлень для кухні: id - монотонний курсор синхронізації
+    id = db.Column(db.Integer, primary_key=True)
+    order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
+    status = db.Column(db.String(20), nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        db.Index('ix_order_change_order_id', 'order_id'),
+        # AUTOINCREMENT не використовує повторно id видалених рядків, тож курсор не повертається назад
+        {'sqlite_autoincrement': True},
+    )
+
+    def __repr__(self):
+        return f'<OrderChange {self.id}: {self.order_id} -> {self.status}>'
+
 class OrderItem(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     order_id = db.Column(db.Integer, db.ForeignKey('order.id'), nullable=False)
@@ -65,6 +155,11 @@ class OrderItem(db.Model):
 
     pizza = db.relationship('Pizza', backref='order_items')
 
+    __table_args__ = (
+        db.Index('ix_order_item_order_id', 'order_id'),
+        db.Index('ix_order_item_pizza_id', 'pizza_id'),
+    )
+
     def __repr__(self):
         return f'<OrderItem {self.pizza.name} x{self.quantity}>'
 
@@ -76,6 +171,10 @@ class Poll(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     votes = db.relationship('PollVote', backref='poll', lazy=True)
 
+    __table_args__ = (
+        db.Index('ix_poll_active', 'active'),
+    )
+
     def __repr__(self):
         return f'<Poll {self.title}>'
 
@@ -87,5 +186,49 @@ class PollVote(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     pizza = db.relationship('Pizza', backref='poll_votes')
 
+    __table_args__ = (
+        # Один голос з IP в опитуванні гарантує сама база
+        db.Index('uq_poll_vote_poll_voter', 'poll_id', 'voter_ip', unique=True),
+        db.Index('ix_poll_vote_poll_pizza', 'poll_id', 'pizza_id'),
+    )
+
     def __repr__(self):
         return f'<PollVote {self.pizza.name}>'
+
+class CacheVersion(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<CacheVersion {self.name}={self.version}>'
+
+class IdReservation(db.Model):
+    # Останній ID, зарезервований чергою замовлень: вставки повз чергу йдуть після нього
+    name = db.Column(db.String(50), primary_key=True)
+    last_id = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<IdReservation {self.name}={self.last_id}>'
+
+class PollTally(db.Model):
+    poll_id = db.Column(db.Integer, db.ForeignKey('poll.id'), primary_key=True)
+    pizza_id = db.Column(db.Integer, db.ForeignKey('pizza.id'), primary_key=True)
+    votes = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<PollTally {self.poll_id}/{self.pizza_id}={self.votes}>'
+
+class StatCounter(db.Model):
+    name = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Float, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<StatCounter {self.name}={self.value}>'
+
+class SalesBucket(db.Model):
+    hour = db.Column(db.DateTime, primary_key=True)
+    orders = db.Column(db.Integer, nullable=False, default=0)
+    revenue = db.Column(db.Float, nullable=False, default=0.0)
+
+    def __repr__(self):
+        return f'<SalesBucket {self.hour}: {self.orders}>'
@@ -0,0 +1,132 @@
+import csv
+import io
+import json
+import zlib
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from models import db, Pizza, Order, OrderItem, created_key
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+CSV_COLUMNS = [
+    'order_id', 'created_at', 'status', 'customer_name', 'customer_phone',
+    'customer_email', 'customer_address', 'total_amount',
+    'pizza_id', 'pizza_name', 'quantity', 'price', 'item_total'
+]
+CHUNK_SIZE = 64 * 1024
+FETCH_SIZE = 1000
+
+class ExportError(Exception):
+    pass
+
+def parse_date_range(date_from, date_to):
+    try:
+        start = datetime.fromisoformat(date_from) if date_from else None
+        end = datetime.fromisoformat(date_to) if date_to else None
+    except ValueError:
+        raise ExportError('Дата має бути у форматі РРРР-ММ-ДД')
+
+    # Дата без часу в "to" означає весь цей день включно
+    if end is not None and len(date_to) == 10:
+        end += timedelta(days=1)
+    return start, end
+
+def iter_order_rows(start=None, end=None):
+    query = select(
+        Order.id, Order.created_at, Order.status, Order.customer_name,
+        Order.customer_phone, Order.customer_email, Order.customer_address,
+        Order.total_amount, OrderItem.pizza_id, Pizza.name,
+        OrderItem.quantity, OrderItem.price, OrderItem.total
+    ).outerjoin(OrderItem, OrderItem.order_id == Order.id) \
+        .outerjoin(Pizza, Pizza.id == OrderItem.pizza_id) \
+        .order_by(Order.id, OrderItem.id)
+    # Діапазон - за ключем пагінації, щоб спрацював той самий індекс
+    if start is not None:
+        query = query.where(created_key(Order.created_at) >= start)
+    if end is not None:
+        query = query.where(created_key(Order.created_at) < end, Order.created_at.isnot(None))
+
+    # Курсор на боці бази: рядки читаються порціями, а не всі одразу
+    result = db.session.execute(
+        query.execution_options(stream_results=True, yield_per=FETCH_SIZE)
+    )
+    for row in result:
+        yield row
+
+def iter_csv_lines(rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(CSV_COLUMNS)
+    for row in rows:
+        values = list(row)
+        values[1] = values[1].isoformat() if values[1] else ''
+        writer.writerow(values)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+def iter_ndjson_lines(rows):
+    # Рядки відсортовані за order_id, тож позиції одного замовлення йдуть підряд
+    current = None
+    for row in rows:
+        if current is None or current['order_id'] != row[0]:
+            if current is not None:
+                yield json.dumps(current, ensure_ascii=False) + '\n'
+            current = {
+                'order_id': row[0],
+                'created_at': row[1].isoformat() if row[1] else None,
+                'status': row[2],
+                'customer_name': row[3],
+                'customer_phone': row[4],
+                'customer_email': row[5],
+                'customer_address': row[6],
+                'total_amount': row[7],
+                'items': []
+            }
+        if row[8] is None:
+            continue
+        current['items'].append({
+            'pizza_id': row[8],
+            'pizza_name': row[9],
+            'quantity': row[10],
+            'price': row[11],
+            'total': row[12]
+        })
+    if current is not None:
+        yield json.dumps(current, ensure_ascii=False) + '\n'
+
+def export_chunks(export_format, start=None, end=None, compress=False):
+    # Формат перевіряємо одразу, а не при першому next() генератора
+    if export_format not in EXPORT_FORMATS:
+        raise ExportError(f'Непідтримуваний формат: {export_format}')
+    return _generate_chunks(export_format, start, end, compress)
+
+def _generate_chunks(export_format, start, end, compress):
+    rows = iter_order_rows(start, end)
+    lines = iter_csv_lines(rows) if export_format == 'csv' else iter_ndjson_lines(rows)
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31) if compress else None
+
+    pending = []
+    pending_size = 0
+    for line in lines:
+        data = line.encode('utf-8')
+        pending.append(data)
+        pending_size += len(data)
+        if pending_size >= CHUNK_SIZE:
+            chunk = b''.join(pending)
+            pending, pending_size = [], 0
+            chunk = compressor.compress(chunk) if compressor else chunk
+            if chunk:
+                yield chunk
+
+    chunk = b''.join(pending)
+    if compressor:
+        chunk = compressor.compress(chunk) + compressor.flush()
+    if chunk:
+        yield chunk
+
+def export_filename(export_format, compress=False):
+    name = f"orders-{datetime.utcnow().strftime('%Y%m%d-%H%M%S')}.{export_format}"
+    return f'{name}.gz' if compress else name
@@ -0,0 +1,242 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import insert
+from sqlalchemy.exc import IntegrityError
+
+from models import db, Order, OrderItem, write_lane
+from admin_stats import record_orders
+from kitchen_feed import record_changes
+from order_service import format_order_id, reserve_order_ids
+
+QUEUE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS order_queue (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    idempotency_key TEXT UNIQUE,
+    payload TEXT NOT NULL,
+    order_id INTEGER,
+    status TEXT NOT NULL DEFAULT 'pending',
+    enqueued_at REAL NOT NULL,
+    processed_at REAL
+);
+CREATE INDEX IF NOT EXISTS ix_order_queue_status_id ON order_queue (status, id);
+CREATE TABLE IF NOT EXISTS order_id_block (
+    id INTEGER PRIMARY KEY CHECK (id = 1),
+    next_id INTEGER NOT NULL,
+    last_id INTEGER NOT NULL
+);
+"""
+
+class OrderQueue:
+    # Номер замовлення видається з блоку, зарезервованого в основній базі
+    # (order_service.reserve_order_ids): вставки повз чергу завжди йдуть після
+    # блоку, тож номер, який отримав клієнт, ніхто інший не займе. Блок спільний
+    # для всіх воркерів із цим файлом черги, основна база пишеться раз на блок.
+
+    def __init__(self, path, batch_size=200, poll_interval=0.2, retention=24 * 3600,
+                 id_block_size=100, on_written=None):
+        self.path = path
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.id_block_size = id_block_size
+        self.on_written = on_written
+
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self.stats = {
+            'enqueued': 0,
+            'duplicates': 0,
+            'written': 0,
+            'batches': 0,
+            'errors': 0,
+            'last_error': None,
+        }
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        connection = self._connection()
+        connection.executescript(QUEUE_SCHEMA)
+        columns = {row[1] for row in connection.execute('PRAGMA table_info(order_queue)')}
+        if 'order_id' not in columns:
+            # Черга, створена до резервування номерів: там номер замовлення - це id у черзі
+            connection.execute('ALTER TABLE order_queue ADD COLUMN order_id INTEGER')
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=FULL')
+            self._local.connection = connection
+        return connection
+
+    def enqueue(self, payload, idempotency_key=None):
+        connection = self._connection()
+        # BEGIN IMMEDIATE серіалізує воркери: повтор з тим самим ключем
+        # бачить перший запис, а номер з блоку видається рівно один раз
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            if idempotency_key:
+                row = connection.execute(
+                    'SELECT COALESCE(order_id, id) FROM order_queue WHERE idempotency_key = ?',
+                    (idempotency_key,)
+                ).fetchone()
+                if row:
+                    connection.execute('ROLLBACK')
+                    self.stats['duplicates'] += 1
+                    return row[0], False
+
+            order_id = self._take_order_id(connection)
+            connection.execute(
+                'INSERT INTO order_queue (idempotency_key, payload, order_id, enqueued_at) VALUES (?, ?, ?, ?)',
+                (idempotency_key, json.dumps(payload, ensure_ascii=False), order_id, time.time())
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        self.stats['enqueued'] += 1
+        self._wakeup.set()
+        return order_id, True
+
+    def _take_order_id(self, connection):
+        row = connection.execute('SELECT next_id, last_id FROM order_id_block').fetchone()
+        if row is None or row[0] > row[1]:
+            row = reserve_order_ids(self.id_block_size)
+        connection.execute(
+            'INSERT OR REPLACE INTO order_id_block (id, next_id, last_id) VALUES (1, ?, ?)',
+            (row[0] + 1, row[1])
+        )
+        return row[0]
+
+    def drain_once(self):
+        connection = self._connection()
+        rows = connection.execute(
+            "SELECT id, payload, enqueued_at, order_id FROM order_queue "
+            "WHERE status = 'pending' ORDER BY id LIMIT ?",
+            (self.batch_size,)
+        ).fetchall()
+        if not rows:
+            return 0
+
+        ids = [row[0] for row in rows]
+        targets = [row[3] or row[0] for row in rows]
+        # Після падіння частина пачки могла вже потрапити в основну базу: зарезервований
+        # номер не займе ніхто інший, тож наявний рядок з ним - це саме це замовлення
+        existing = {
+            order_id: (phone, total_amount, created_at)
+            for order_id, phone, total_amount, created_at in db.session.query(
+                Order.id, Order.customer_phone, Order.total_amount, Order.created_at
+            ).filter(Order.id.in_(targets)).all()
+        }
+
+        orders = []
+        items = []
+        for queue_id, payload, enqueued_at, assigned_id in rows:
+            data = json.loads(payload)
+            customer = data['customer']
+            created_at = datetime.utcfromtimestamp(enqueued_at)
+            order_id = assigned_id or queue_id
+            if order_id in existing:
+                if assigned_id or existing[order_id] == (customer['phone'], data['total_amount'], created_at):
+                    continue
+                # Рядок зі старої черги, чий номер тим часом зайняли повз неї: записуємо
+                # під новим номером, зафіксованим у черзі до коміту, а не губимо
+                order_id = reserve_order_ids(1)[0]
+                connection.execute('UPDATE order_queue SET order_id = ? WHERE id = ?', (order_id, queue_id))
+                self.stats['last_error'] = (
+                    f'Номер {format_order_id(queue_id)} вже зайнятий, замовлення записано як {format_order_id(order_id)}'
+                )
+            orders.append({
+                'id': order_id,
+                'customer_name': customer['name'],
+                'customer_phone': customer['phone'],
+                'customer_address': customer['address'],
+                'customer_email': customer.get('email', ''),
+                'notes': customer.get('notes', ''),
+                'status': 'pending',
+                'total_amount': data['total_amount'],
+                'created_at': created_at,
+            })
+            items.extend(dict(item, order_id=order_id) for item in data['items'])
+
+        try:
+            with write_lane:
+                if orders:
+                    db.session.execute(insert(Order), orders)
+                    db.session.execute(insert(OrderItem), items)
+                    record_orders([(order['created_at'], order['total_amount']) for order in orders])
+                    record_changes([order['id'] for order in orders], 'pending')
+                db.session.commit()
+        except IntegrityError:
+            # Інший воркер записав цю пачку одночасно з нами - наступний прохід її відфільтрує
+            db.session.rollback()
+            return 0
+
+        placeholders = ','.join('?' * len(ids))
+        connection.execute(
+            f"UPDATE order_queue SET status = 'done', processed_at = ? WHERE id IN ({placeholders})",
+            [time.time()] + ids
+        )
+        self.stats['written'] += len(orders)
+        self.stats['batches'] += 1
+        if orders and self.on_written:
+            self.on_written()
+        return len(rows)
+
+    def prune(self):
+        self._connection().execute(
+            "DELETE FROM order_queue WHERE status = 'done' AND processed_at < ?",
+            (time.time() - self.retention,)
+        )
+
+    def get_status(self):
+        connection = self._connection()
+        depth, oldest = connection.execute(
+            "SELECT COUNT(*), MIN(enqueued_at) FROM order_queue WHERE status = 'pending'"
+        ).fetchone()
+        status = dict(self.stats)
+        status['depth'] = depth
+        status['lag_seconds'] = round(time.time() - oldest, 3) if oldest else 0.0
+        return status
+
+    def start(self, app):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, args=(app,), daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, app):
+        last_prune = 0.0
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+            with app.app_context():
+                try:
+                    # Після перезапуску спершу дочищаємо все, що лишилось у черзі
+                    while self.drain_once() and not self._stopping.is_set():
+                        pass
+                    if time.monotonic() - last_prune > 3600:
+                        self.prune()
+                        last_prune = time.monotonic()
+                except Exception as e:
+                    db.session.rollback()
+                    self.stats['errors'] += 1
+                    self.stats['last_error'] = str(e)
+                    time.sleep(1)
+                finally:
+                    db.session.remove()
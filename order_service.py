@@ -0,0 +1,111 @@
+from sqlalchemy import func, insert, select
+from sqlalchemy.dialects import sqlite
+
+from models import db, Pizza, Order, OrderItem, IdReservation, write_lane
+
+REQUIRED_CUSTOMER_FIELDS = ['name', 'phone', 'address']
+MAX_QUANTITY = 1000
+ORDER_ID_RESERVATION = 'order'
+
+class OrderValidationError(Exception):
+    pass
+
+def parse_order(data):
+    if not isinstance(data, dict) or not data.get('items') or not data.get('customer'):
+        raise OrderValidationError('Неповні дані замовлення')
+
+    customer = data['customer']
+    if not isinstance(customer, dict):
+        raise OrderValidationError('Некоректні дані клієнта')
+    if not isinstance(data['items'], list):
+        raise OrderValidationError('Некоректна позиція замовлення')
+    for field in REQUIRED_CUSTOMER_FIELDS:
+        if not customer.get(field):
+            raise OrderValidationError(f'Поле "{field}" є обов\'язковим')
+
+    lines = []
+    for item in data['items']:
+        if not isinstance(item, dict):
+            raise OrderValidationError('Некоректна позиція замовлення')
+        try:
+            pizza_id = int(item['pizza_id'])
+            quantity = int(item.get('quantity', 1))
+        except (KeyError, TypeError, ValueError):
+            raise OrderValidationError('Некоректна позиція замовлення')
+
+        if quantity < 1 or quantity > MAX_QUANTITY:
+            raise OrderValidationError(f'Некоректна кількість для піци з ID {pizza_id}')
+        lines.append((pizza_id, quantity))
+
+    return customer, lines
+
+def load_available_prices(pizza_ids):
+    # Один запит з IN замість окремого SELECT на кожну позицію
+    rows = db.session.query(Pizza.id, Pizza.price).filter(
+        Pizza.id.in_(set(pizza_ids)),
+        Pizza.available == True
+    ).all()
+    return {pizza_id: price for pizza_id, price in rows}
+
+def price_order(lines, prices):
+    items = []
+    total_amount = 0
+    for pizza_id, quantity in lines:
+        price = prices.get(pizza_id)
+        if price is None:
+            raise OrderValidationError(f'Піца з ID {pizza_id} недоступна')
+
+        item_total = price * quantity
+        total_amount += item_total
+        items.append({
+            'pizza_id': pizza_id,
+            'quantity': quantity,
+            'price': price,
+            'total': item_total
+        })
+    return items, total_amount
+
+def next_order_id():
+    # Наступний ID після наявних замовлень і після блоку, зарезервованого чергою.
+    # Підзапит у самій вставці: паралельний воркер не отримає той самий ID
+    last_order = select(func.max(Order.id)).scalar_subquery()
+    reserved = select(IdReservation.last_id).where(
+        IdReservation.name == ORDER_ID_RESERVATION
+    ).scalar_subquery()
+    return func.max(func.coalesce(last_order, 0), func.coalesce(reserved, 0)) + 1
+
+def reserve_order_ids(count):
+    # Блок номерів для черги: після коміту жодна вставка повз чергу його не займе
+    last_id = next_order_id() + (count - 1)
+    with write_lane:
+        last_id = db.session.execute(
+            sqlite.insert(IdReservation)
+            .values(name=ORDER_ID_RESERVATION, last_id=last_id)
+            .on_conflict_do_update(index_elements=[IdReservation.name], set_={'last_id': last_id})
+            .returning(IdReservation.last_id)
+        ).scalar()
+        db.session.commit()
+    return last_id - count + 1, last_id
+
+def insert_order(customer, items, total_amount):
+    order = Order(
+        id=next_order_id(),
+        customer_name=customer['name'],
+        customer_phone=customer['phone'],
+        customer_address=customer['address'],
+        customer_email=customer.get('email', ''),
+        notes=customer.get('notes', ''),
+        status='pending',
+        total_amount=total_amount
+    )
+    db.session.add(order)
+    db.session.flush()
+
+    db.session.execute(
+        insert(OrderItem),
+        [dict(item, order_id=order.id) for item in items]
+    )
+    return order
+
+def format_order_id(order_id):
+    return f'ORD-{order_id:06d}'
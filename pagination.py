@@ -0,0 +1,54 @@
+from datetime import datetime
+
+from sqlalchemy import literal, or_
+
+from models import db, created_key
+
+EPOCH = datetime(1970, 1, 1)
+DEFAULT_PER_PAGE = 50
+MAX_PER_PAGE = 200
+
+def encode_cursor(created_at, row_id):
+    return f'{(created_at or EPOCH).isoformat()}_{row_id}'
+
+def decode_cursor(value):
+    if not value:
+        return None
+    try:
+        created_at, row_id = value.rsplit('_', 1)
+        return datetime.fromisoformat(created_at), int(row_id)
+    except ValueError:
+        return None
+
+def parse_per_page(value):
+    try:
+        per_page = int(value)
+    except (TypeError, ValueError):
+        return DEFAULT_PER_PAGE
+    return max(1, min(per_page, MAX_PER_PAGE))
+
+def keyset_page(query, model, cursor=None, per_page=DEFAULT_PER_PAGE, descending=False):
+    # Позиція сторінки задається парою (created_at, id), тож глибина сторінки
+    # не впливає на вартість запиту, на відміну від OFFSET. Рядки без дати
+    # йдуть як рядки з датою епохи, а не випадають з порівняння з NULL.
+    created_at = created_key(model.created_at)
+    position = decode_cursor(cursor)
+    if position is not None:
+        # Розгорнуте порівняння пар: за індексом по виразу SQLite шукає лише так
+        bound = literal(position[0], db.DateTime)
+        if descending:
+            query = query.filter(created_at <= bound, or_(created_at < bound, model.id < position[1]))
+        else:
+            query = query.filter(created_at >= bound, or_(created_at > bound, model.id > position[1]))
+
+    if descending:
+        query = query.order_by(created_at.desc(), model.id.desc())
+    else:
+        query = query.order_by(created_at, model.id)
+
+    rows = query.limit(per_page + 1).all()
+    next_cursor = None
+    if len(rows) > per_page:
+        last = rows[per_page - 1]
+        next_cursor = encode_cursor(last.created_at, last.id)
+    return rows[:per_page], next_cursor
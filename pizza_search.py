@@ -0,0 +1,132 @@
+import math
+import re
+
+from flask import current_app
+from sqlalchemy import select, text, column
+from sqlalchemy.exc import OperationalError
+
+from models import db, Pizza
+from pagination import DEFAULT_PER_PAGE
+
+SEARCH_TABLE = 'pizza_fts'
+# Збіг у назві важить більше, ніж збіг у складі
+RANK_FUNCTION = 'bm25(10.0, 1.0)'
+
+# Зовнішній вміст: текст зберігається лише в таблиці pizza, FTS5 тримає тільки індекс.
+# Префіксні індекси пришвидшують пошук за першими літерами ("пеп" -> "пепероні").
+SEARCH_SCHEMA = [
+    f'''CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+        name, ingredients,
+        content='pizza', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+    )''',
+    f'''CREATE TRIGGER pizza_fts_insert AFTER INSERT ON pizza BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, name, ingredients) VALUES (new.id, new.name, new.ingredients);
+    END''',
+    f'''CREATE TRIGGER pizza_fts_delete AFTER DELETE ON pizza BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, ingredients)
+        VALUES ('delete', old.id, old.name, old.ingredients);
+    END''',
+    f'''CREATE TRIGGER pizza_fts_update AFTER UPDATE OF name, ingredients ON pizza BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, name, ingredients)
+        VALUES ('delete', old.id, old.name, old.ingredients);
+        INSERT INTO {SEARCH_TABLE}(rowid, name, ingredients) VALUES (new.id, new.name, new.ingredients);
+    END''',
+    f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rank) VALUES ('rank', '{RANK_FUNCTION}')",
+]
+
+# Позначка в app.extensions, що індекс у базі застосунку вже знайдено, -
+# щоб не перевіряти sqlite_master на кожен запит
+INDEXED_EXTENSION = 'oderman_search_indexed'
+
+class SearchError(ValueError):
+    pass
+
+def search_index_exists():
+    if current_app.extensions.get(INDEXED_EXTENSION):
+        return True
+    exists = db.session.execute(
+        text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {'name': SEARCH_TABLE}
+    ).first() is not None
+    if exists:
+        current_app.extensions[INDEXED_EXTENSION] = True
+    return exists
+
+def ensure_search_index():
+    # Індекс і тригери створюються разом з таблицею pizza і далі оновлюються
+    # в тій самій транзакції, що й зміни в адмінці
+    if search_index_exists():
+        return False
+    try:
+        with db.session.begin_nested():
+            for statement in SEARCH_SCHEMA:
+                db.session.execute(text(statement))
+    except OperationalError:
+        # SQLite зібрано без FTS5 - пошук працюватиме через LIKE
+        return False
+    rebuild_search_index()
+    return True
+
+def rebuild_search_index():
+    db.session.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+
+def build_match_expression(query):
+    # Кожне слово - окрема фраза з префіксним пошуком; лапки не дають
+    # користувачу зламати запит синтаксисом FTS5 (AND, NEAR, * тощо)
+    terms = [term.replace('"', '') for term in query.split()]
+    return ' '.join(f'"{term}"*' for term in terms if re.search(r'\w', term))
+
+def parse_search_params(args):
+    query = (args.get('q') or '').strip()
+    category = (args.get('category') or '').strip() or None
+
+    max_price = None
+    if args.get('max_price'):
+        try:
+            max_price = float(args['max_price'])
+        except ValueError:
+            raise SearchError('Некоректна максимальна ціна')
+        # nan та inf проходять float(), але дають порожню сторінку замість помилки
+        if not math.isfinite(max_price):
+            raise SearchError('Некоректна максимальна ціна')
+
+    try:
+        page = int(args.get('page', 1))
+    except ValueError:
+        raise SearchError('Некоректний номер сторінки')
+    if page < 1:
+        raise SearchError('Некоректний номер сторінки')
+    return query, category, max_price, page
+
+def search_pizzas(query='', category=None, max_price=None, page=1, per_page=DEFAULT_PER_PAGE):
+    statement = select(Pizza).where(Pizza.available == True)
+    if category:
+        statement = statement.where(Pizza.category == category)
+    if max_price is not None:
+        statement = statement.where(Pizza.price <= max_price)
+
+    match = build_match_expression(query)
+    if match and search_index_exists():
+        matches = text(
+            f'SELECT rowid AS pizza_id, rank FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :match'
+        ).bindparams(match=match).columns(column('pizza_id'), column('rank')).subquery('matches')
+        statement = (
+            statement.join(matches, matches.c.pizza_id == Pizza.id)
+            .order_by(matches.c.rank, Pizza.id)
+        )
+    elif match:
+        for term in query.split():
+            pattern = f'%{term}%'
+            statement = statement.where(Pizza.name.like(pattern) | Pizza.ingredients.like(pattern))
+        statement = statement.order_by(Pizza.id)
+    elif query:
+        # У запиті лише розділові знаки - збігів немає
+        return [], None
+    else:
+        statement = statement.order_by(Pizza.id)
+
+    # Ранжування однаково рахує всі збіги, тож сторінки за номером, а не курсором
+    rows = db.session.scalars(statement.offset((page - 1) * per_page).limit(per_page + 1)).all()
+    next_page = page + 1 if len(rows) > per_page else None
+    return rows[:per_page], next_page
@@ -0,0 +1,156 @@
+import json
+import threading
+import time
+
+from models import db, Poll
+from poll_tally import get_tally, build_poll_results
+
+SSE_HEADERS = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+
+class PollResultsPublisher:
+    # Один фоновий потік рахує результати і ділиться готовим повідомленням з усіма
+    # клієнтами. Клієнти лише чекають на Condition, тож під gevent кожне з'єднання
+    # коштує один greenlet, а не потік.
+
+    def __init__(self, app, menu_cache, interval=0.3, check_interval=1.0, heartbeat=15):
+        self.app = app
+        self.menu_cache = menu_cache
+        self.interval = interval
+        self.check_interval = check_interval
+        self.heartbeat = heartbeat
+
+        self._condition = threading.Condition()
+        self._dirty = threading.Event()
+        self._version = 0
+        self._payload = None
+        self._async_waiters = set()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.stats = {'publishes': 0, 'subscribers': 0}
+
+    def notify(self):
+        self._dirty.set()
+        self._ensure_started()
+
+    def stream(self):
+        self._ensure_started()
+        version = 0
+        with self._condition:
+            self.stats['subscribers'] += 1
+        # Новий клієнт отримує свіжий стан, навіть якщо потік простоював
+        self._dirty.set()
+        try:
+            yield f'retry: {int(self.heartbeat * 1000)}\n\n'
+            while True:
+                with self._condition:
+                    if self._version == version:
+                        self._condition.wait(self.heartbeat)
+                    current_version, payload = self._version, self._payload
+
+                if current_version != version and payload is not None:
+                    version = current_version
+                    yield f'event: results\nid: {version}\ndata: {payload}\n\n'
+                else:
+                    yield ': keepalive\n\n'
+        finally:
+            with self._condition:
+                self.stats['subscribers'] -= 1
+
+    async def stream_async(self):
+        # Те саме для asgi.py: клієнт чекає як корутина в event loop і не займає потік пулу
+        import asyncio
+
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+
+        def wake():
+            loop.call_soon_threadsafe(event.set)
+
+        version = 0
+        with self._condition:
+            self._async_waiters.add(wake)
+            self.stats['subscribers'] += 1
+        # Новий клієнт отримує свіжий стан, навіть якщо потік простоював
+        self._dirty.set()
+        try:
+            yield f'retry: {int(self.heartbeat * 1000)}\n\n'
+            while True:
+                event.clear()
+                if self._version == version:
+                    try:
+                        await asyncio.wait_for(event.wait(), self.heartbeat)
+                    except asyncio.TimeoutError:
+                        pass
+                with self._condition:
+                    current_version, payload = self._version, self._payload
+
+                if current_version != version and payload is not None:
+                    version = current_version
+                    yield f'event: results\nid: {version}\ndata: {payload}\n\n'
+                else:
+                    yield ': keepalive\n\n'
+        finally:
+            with self._condition:
+                self._async_waiters.discard(wake)
+                self.stats['subscribers'] -= 1
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            # Голоси з інших воркерів підхоплюємо періодичною перевіркою, але лише
+            # поки є підписники; без них потік спить до notify() або нового клієнта
+            with self._condition:
+                idle = self.stats['subscribers'] == 0
+            self._dirty.wait(None if idle else self.check_interval)
+            self._dirty.clear()
+            try:
+                payload = self._build_payload()
+            except Exception:
+                payload = None
+
+            if payload is not None and payload != self._payload:
+                with self._condition:
+                    self._payload = payload
+                    self._version += 1
+                    self.stats['publishes'] += 1
+                    self._condition.notify_all()
+                    for wake in self._async_waiters:
+                        wake()
+
+            # Пачка голосів за цей час злиється в одне оновлення
+            time.sleep(self.interval)
+
+    def _build_payload(self):
+        with self.app.app_context():
+            try:
+                poll = Poll.query.filter_by(active=True).first()
+                if not poll:
+                    return None
+                results, total_votes, winner = build_poll_results(
+                    self.menu_cache.get_pizzas(), get_tally(poll.id)
+                )
+            finally:
+                db.session.remove()
+
+        return json.dumps({
+            'poll_id': poll.id,
+            'total_votes': total_votes,
+            'winner': winner['name'] if winner else None,
+            'results': [
+                {
+                    'pizza_id': result['pizza']['id'],
+                    'name': result['pizza']['name'],
+                    'votes': result['votes'],
+                    'percentage': round(result['percentage'], 1)
+                }
+                for result in results
+            ]
+        }, ensure_ascii=False)
@@ -0,0 +1,53 @@
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert
+
+from models import db, PollVote, PollTally
+
+def increment_tally(poll_id, pizza_id, count=1):
+    db.session.execute(
+        insert(PollTally)
+        .values(poll_id=poll_id, pizza_id=pizza_id, votes=count)
+        .on_conflict_do_update(
+            index_elements=[PollTally.poll_id, PollTally.pizza_id],
+            set_={'votes': PollTally.votes + count}
+        )
+    )
+
+def rebuild_tally(poll_id=None):
+    delete = PollTally.__table__.delete()
+    counts = select(PollVote.poll_id, PollVote.pizza_id, func.count(PollVote.id)) \
+        .group_by(PollVote.poll_id, PollVote.pizza_id)
+    if poll_id is not None:
+        delete = delete.where(PollTally.poll_id == poll_id)
+        counts = counts.where(PollVote.poll_id == poll_id)
+
+    db.session.execute(delete)
+    db.session.execute(
+        insert(PollTally).from_select(['poll_id', 'pizza_id', 'votes'], counts)
+    )
+
+def get_tally(poll_id):
+    rows = db.session.execute(
+        select(PollTally.pizza_id, PollTally.votes).where(PollTally.poll_id == poll_id)
+    ).all()
+    return {pizza_id: votes for pizza_id, votes in rows}
+
+def build_poll_results(pizzas, tally):
+    # Лише доступні піци, як і в попередньому GROUP BY з фільтром available
+    counted = [(pizza, tally.get(pizza['id'], 0)) for pizza in pizzas]
+    counted.sort(key=lambda pair: pair[1], reverse=True)
+
+    total_votes = sum(votes for _, votes in counted)
+    results = []
+    winner = None
+    for pizza, votes in counted:
+        percentage = (votes / total_votes * 100) if total_votes > 0 else 0
+        results.append({
+            'pizza': pizza,
+            'votes': votes,
+            'percentage': percentage
+        })
+        if not winner and votes > 0:
+            winner = pizza
+
+    return results, total_votes, winner
@@ -0,0 +1,201 @@
+import hashlib
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import func, select
+
+from models import db, Order, OrderItem, created_key
+
+EPOCH = datetime(1970, 1, 1)
+BUCKET_SECONDS = 300
+WINDOWS = {'1h': 3600, '24h': 86400, '7d': 7 * 86400}
+# Вага кожного вікна в оцінці "у тренді"; продажі зводяться до швидкості за добу
+TRENDING_WEIGHTS = {'1h': 0.5, '24h': 0.3, '7d': 0.2}
+STREAM_BATCH = 2000
+
+def to_bucket(moment):
+    return int((moment - EPOCH).total_seconds()) // BUCKET_SECONDS
+
+class PopularitySnapshot:
+    def __init__(self, version, sales, ranking, top_size):
+        self.version = version
+        self.sales = sales
+        self.ranking = ranking
+        self.position = {pizza_id: index for index, pizza_id in enumerate(ranking)}
+        self.top_size = top_size
+        self._popular = None
+        self._body = None
+
+    def popular_ids(self, menu_snapshot):
+        # Топ серед піц, що зараз є в меню: знята з продажу не забирає місце в топі.
+        # Порожньо, поки за тиждень не було продажів: тоді сторінки показують ручну позначку
+        cached = self._popular
+        if cached is None or cached[0] != menu_snapshot.version:
+            ids = frozenset([pizza_id for pizza_id in self.ranking if pizza_id in menu_snapshot.by_id][:self.top_size])
+            cached = self._popular = (menu_snapshot.version, ids)
+        return cached[1]
+
+    def is_popular(self, pizza, menu_snapshot):
+        popular_ids = self.popular_ids(menu_snapshot)
+        if popular_ids:
+            return pizza['id'] in popular_ids
+        return pizza['popular']
+
+    def trending_body(self, menu_snapshot):
+        # Готові байти для /api/pizzas?sort=trending: одна серіалізація на пару версій меню й продажів
+        cached = self._body
+        if cached is None or cached[0] != menu_snapshot.version:
+            pizzas = [
+                dict(pizza, popular=self.is_popular(pizza, menu_snapshot), sales=self.sales_for(pizza['id']))
+                for pizza in self.sort(menu_snapshot.pizzas)
+            ]
+            body = (current_app.json.dumps(pizzas) + '\n').encode('utf-8')
+            cached = self._body = (menu_snapshot.version, body, hashlib.sha256(body).hexdigest()[:32])
+        return cached[1], cached[2]
+
+    def sort(self, pizzas):
+        last = len(self.ranking)
+        return sorted(pizzas, key=lambda pizza: (self.position.get(pizza['id'], last), pizza['id']))
+
+    def sales_for(self, pizza_id):
+        return {window: self.sales[window].get(pizza_id, 0) for window in WINDOWS}
+
+class PopularityTracker:
+    # Продажі кожної піци за 1 год / 24 год / 7 днів у кільцевому буфері
+    # 5-хвилинних кошиків. Суми вікон оновлюються інкрементно: нові позиції
+    # замовлень додаються, кошики, що випали з вікна, віднімаються. Позиції
+    # підтягуються з order_item за id, більшим за останній прочитаний, тож
+    # замовлення з інших воркерів і з черги враховуються без GROUP BY.
+    # Повна перебудова - один потоковий прохід по позиціях за останній тиждень.
+
+    def __init__(self, check_interval=2.0, top_size=3):
+        self.check_interval = check_interval
+        self.top_size = top_size
+        self.slot_count = WINDOWS['7d'] // BUCKET_SECONDS
+        self.window_slots = {window: seconds // BUCKET_SECONDS for window, seconds in WINDOWS.items()}
+
+        self._slots = [None] * self.slot_count
+        self._totals = {window: Counter() for window in WINDOWS}
+        self._head = None
+        self._last_item_id = None
+        self._version = 0
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.stats = {'rebuilds': 0, 'items': 0}
+
+    def get_snapshot(self):
+        if not self.needs_check():
+            return self._snapshot
+
+        with self._lock:
+            if not self.needs_check():
+                return self._snapshot
+
+            changed = self._advance(to_bucket(datetime.utcnow()))
+            if self._last_item_id is None:
+                self._rebuild()
+                changed = True
+            else:
+                changed = self._catch_up() or changed
+            if changed or self._snapshot is None:
+                self._version += 1
+                self._snapshot = self._build_snapshot()
+            self._checked_at = time.monotonic()
+            return self._snapshot
+
+    def needs_check(self):
+        return self._snapshot is None or time.monotonic() - self._checked_at >= self.check_interval
+
+    def expire(self):
+        # Після коміту замовлення в цьому процесі - підтягнути його одразу
+        self._checked_at = 0.0
+
+    def _rebuild(self):
+        self._slots = [None] * self.slot_count
+        self._totals = {window: Counter() for window in WINDOWS}
+        self._head = to_bucket(datetime.utcnow())
+
+        last_item_id = db.session.execute(select(func.max(OrderItem.id))).scalar() or 0
+        cutoff = datetime.utcnow() - timedelta(seconds=WINDOWS['7d'])
+        rows = db.session.execute(
+            select(OrderItem.pizza_id, OrderItem.quantity, Order.created_at)
+            .join(Order, OrderItem.order_id == Order.id)
+            .where(created_key(Order.created_at) >= cutoff, OrderItem.id <= last_item_id)
+            .execution_options(yield_per=STREAM_BATCH)
+        )
+        for pizza_id, quantity, created_at in rows:
+            self._add(pizza_id, quantity, created_at)
+        self._last_item_id = last_item_id
+        self.stats['rebuilds'] += 1
+
+    def _catch_up(self):
+        rows = db.session.execute(
+            select(OrderItem.id, OrderItem.pizza_id, OrderItem.quantity, Order.created_at)
+            .join(Order, OrderItem.order_id == Order.id)
+            .where(OrderItem.id > self._last_item_id)
+            .order_by(OrderItem.id)
+        ).all()
+        for item_id, pizza_id, quantity, created_at in rows:
+            self._add(pizza_id, quantity, created_at)
+            self._last_item_id = item_id
+        return bool(rows)
+
+    def _add(self, pizza_id, quantity, created_at):
+        bucket = to_bucket(created_at or datetime.utcnow())
+        if bucket > self._head:
+            # Годинник іншого воркера трохи попереду
+            self._advance(bucket)
+        age = self._head - bucket
+        if age >= self.slot_count:
+            return
+
+        index = bucket % self.slot_count
+        slot = self._slots[index]
+        if slot is None or slot[0] != bucket:
+            slot = self._slots[index] = (bucket, Counter())
+        slot[1][pizza_id] += quantity
+        for window, length in self.window_slots.items():
+            if age < length:
+                self._totals[window][pizza_id] += quantity
+        self.stats['items'] += 1
+
+    def _advance(self, bucket):
+        if self._head is None or bucket <= self._head:
+            return False
+        if bucket - self._head >= self.slot_count:
+            # Тиждень без запитів - усі вікна порожні
+            changed = any(self._totals.values())
+            self._slots = [None] * self.slot_count
+            self._totals = {window: Counter() for window in WINDOWS}
+            self._head = bucket
+            return changed
+
+        changed = False
+        for head in range(self._head + 1, bucket + 1):
+            # Кошик head - length щойно вийшов з вікна довжини length
+            for window, length in self.window_slots.items():
+                slot = self._slots[(head - length) % self.slot_count]
+                if slot is None or slot[0] != head - length:
+                    continue
+                totals = self._totals[window]
+                for pizza_id, quantity in slot[1].items():
+                    totals[pizza_id] -= quantity
+                    if totals[pizza_id] <= 0:
+                        del totals[pizza_id]
+                changed = True
+        self._head = bucket
+        return changed
+
+    def _build_snapshot(self):
+        sales = {window: dict(totals) for window, totals in self._totals.items()}
+        scores = Counter()
+        for window, weight in TRENDING_WEIGHTS.items():
+            per_day = 86400 / WINDOWS[window]
+            for pizza_id, quantity in sales[window].items():
+                scores[pizza_id] += weight * quantity * per_day
+        ranking = sorted(scores, key=lambda pizza_id: (-scores[pizza_id], -sales['7d'].get(pizza_id, 0), pizza_id))
+        return PopularitySnapshot(self._version, sales, ranking, self.top_size)
@@ -0,0 +1,104 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+from flask import flash, g, jsonify, redirect, request, url_for
+
+class TokenBuckets:
+    # Відро токенів на кожен ключ (IP). Таблиця обмежена max_keys: найдавніше
+    # використане відро витісняється, тож пам'ять не росте з кількістю адрес.
+    # Витіснене відро при поверненні клієнта починається повним.
+
+    def __init__(self, rate, burst, max_keys=100000):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self.evicted = 0
+
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def take(self, key, now=None):
+        # 0 - токен видано, інакше - через скільки секунд з'явиться наступний
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                tokens = self.burst
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._buckets.move_to_end(key)
+                tokens = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+
+            if tokens >= 1:
+                self._buckets[key] = (tokens - 1, now)
+                return 0.0
+            self._buckets[key] = (tokens, now)
+            return (1 - tokens) / self.rate
+
+class AdmissionControl:
+    # Захист маршрутів запису: спершу ліміт запитів з одного IP (429), потім
+    # загальна кількість одночасних записів (503). Зайві запити відхиляються
+    # до будь-якого звернення до бази, тож повінь записів не забирає потоки
+    # і з'єднання у читання.
+
+    def __init__(self, app):
+        self.stats = {'admitted': 0, 'rate_limited': 0, 'overloaded': 0}
+        self.enabled = app.config['RATE_LIMIT_ENABLED']
+        self.limits = {
+            endpoint: TokenBuckets(per_minute / 60, burst, app.config['RATE_LIMIT_MAX_KEYS'])
+            for endpoint, (per_minute, burst) in app.config['RATE_LIMITS'].items()
+        }
+        # HTML-форми отримують flash і redirect на цю сторінку, API - JSON
+        self.redirects = app.config['RATE_LIMIT_REDIRECTS']
+        self.concurrency = app.config['WRITE_CONCURRENCY']
+        self.queue_timeout = app.config['WRITE_QUEUE_TIMEOUT']
+        self._slots = threading.BoundedSemaphore(self.concurrency)
+        app.before_request(self._before_request)
+        app.teardown_request(self._teardown_request)
+
+    def get_status(self):
+        return dict(
+            self.stats,
+            enabled=self.enabled,
+            concurrency=self.concurrency,
+            tracked_keys=sum(len(buckets) for buckets in self.limits.values()),
+            evicted_keys=sum(buckets.evicted for buckets in self.limits.values())
+        )
+
+    def _before_request(self):
+        buckets = self.limits.get(request.endpoint)
+        if not self.enabled or buckets is None or request.method != 'POST':
+            return None
+
+        retry_after = buckets.take(request.remote_addr)
+        if retry_after:
+            self.stats['rate_limited'] += 1
+            return self._reject(429, 'Забагато запитів, спробуйте пізніше', retry_after)
+
+        if not self._slots.acquire(timeout=self.queue_timeout):
+            self.stats['overloaded'] += 1
+            return self._reject(503, 'Сервер перевантажений, спробуйте за мить', 1)
+        g.admission_slot = True
+        self.stats['admitted'] += 1
+        return None
+
+    def _teardown_request(self, error):
+        if g.pop('admission_slot', False):
+            self._slots.release()
+
+    def _reject(self, status_code, message, retry_after):
+        if request.endpoint in self.redirects:
+            flash(message, 'warning')
+            response = redirect(url_for(self.redirects[request.endpoint]))
+        else:
+            response = jsonify({'status': 'error', 'message': message})
+            response.status_code = status_code
+        response.headers['Retry-After'] = str(max(1, math.ceil(retry_after)))
+        return response
@@ -0,0 +1,145 @@
+import threading
+from itertools import product
+
+# Групи погодних умов за кодами OpenWeather: https://openweathermap.org/weather-conditions
+CONDITION_GROUPS = ('thunderstorm', 'drizzle', 'rain', 'snow', 'atmosphere', 'clear', 'clouds', 'unknown')
+TEMPERATURE_BANDS = ('cold', 'mild', 'hot')
+UNAVAILABLE_BUCKET = ('unavailable', None)
+
+# Порядок важливий: для кожної комбінації умов і температури береться перше правило, що підходить
+RECOMMENDATION_RULES = [
+    {
+        'bands': {'hot'},
+        'title': '🌞 Спекотна погода!',
+        'message': 'В таку жару рекомендуємо легкі піци з овочами та свіжими інгредієнтами.',
+        'reason': 'Легка та освіжаюча',
+        'pizzas': ['Овочева'],
+        'category': 'vegetarian',
+    },
+    {
+        'bands': {'cold'},
+        'title': '❄️ Холодно на вулиці!',
+        'message': 'Зігрійтеся нашими ситними м\'ясними піцами!',
+        'reason': 'Ситна та зігрівальна',
+        'pizzas': ['М\'ясна'],
+        'category': 'premium',
+    },
+    {
+        'groups': {'thunderstorm', 'drizzle', 'rain'},
+        'title': '🌧️ Дощова погода!',
+        'message': 'В дощову погоду немає нічого кращого за класичну піцу з доставкою додому!',
+        'reason': 'Класика для затишку',
+        'pizzas': ['Пепероні'],
+        'category': 'classic',
+    },
+    {
+        'groups': {'snow'},
+        'title': '❄️ Сніжна погода!',
+        'message': 'Снігопад - ідеальний час для гарячої піци з багатьма сирами!',
+        'reason': 'Гаряча та сирна',
+        'pizzas': ['Кватро Формаджі'],
+        'category': 'premium',
+    },
+    {
+        'groups': {'clouds', 'atmosphere'},
+        'title': '☁️ Хмарна погода!',
+        'message': 'Похмурий день стане яскравішим з нашою яскравою піцою!',
+        'reason': 'Яскрава та смачна',
+        'pizzas': ['Гавайська'],
+        'category': 'classic',
+    },
+    {
+        'title': '🌤️ Чудова погода!',
+        'message': 'В таку погоду ідеально підійде наша популярна піца!',
+        'reason': 'Класична та улюблена',
+        'pizzas': ['Маргарита'],
+        'category': 'classic',
+    },
+]
+
+FALLBACK_RULE = {
+    'title': '🍕 Завжди гарний час для піци!',
+    'message': 'Незалежно від погоди, наші піци завжди смачні!',
+    'pizzas': ['Маргарита'],
+    'category': None,
+}
+
+def condition_group(condition_id):
+    if condition_id is None:
+        return 'unknown'
+    if condition_id == 800:
+        return 'clear'
+    return {2: 'thunderstorm', 3: 'drizzle', 5: 'rain', 6: 'snow', 7: 'atmosphere', 8: 'clouds'}.get(
+        condition_id // 100, 'unknown'
+    )
+
+def temperature_band(temperature):
+    if temperature >= 25:
+        return 'hot'
+    if temperature <= 5:
+        return 'cold'
+    return 'mild'
+
+def weather_bucket(weather_data, weather_available=True):
+    if not weather_available or not weather_data.get('success'):
+        return UNAVAILABLE_BUCKET
+    return (
+        condition_group(weather_data.get('condition_id')),
+        temperature_band(weather_data.get('temperature', 20))
+    )
+
+def compile_rules(rules):
+    table = {UNAVAILABLE_BUCKET: FALLBACK_RULE}
+    for group, band in product(CONDITION_GROUPS, TEMPERATURE_BANDS):
+        table[(group, band)] = next(
+            rule for rule in rules
+            if group in rule.get('groups', (group,)) and band in rule.get('bands', (band,))
+        )
+    return table
+
+def resolve_pizza(rule, pizzas):
+    # Бажана піца за назвою, інакше популярна з тієї ж категорії, інакше будь-яка з меню
+    by_name = {pizza['name']: pizza for pizza in pizzas}
+    for name in rule['pizzas']:
+        if name in by_name:
+            return by_name[name]
+
+    candidates = [pizza for pizza in pizzas if pizza['category'] == rule['category']] or pizzas
+    popular = [pizza for pizza in candidates if pizza['popular']]
+    return (popular or candidates or [None])[0]
+
+class PizzaRecommender:
+    def __init__(self, rules=RECOMMENDATION_RULES):
+        self.table = compile_rules(rules)
+        # (версія меню, {кошик погоди: рекомендація}) - замінюється цілком при зміні меню
+        self._memo = (None, {})
+        self._lock = threading.Lock()
+
+    def recommend(self, weather_data, menu_snapshot, weather_available=True):
+        bucket = weather_bucket(weather_data, weather_available)
+        version, memo = self._memo
+        if version == menu_snapshot.version and bucket in memo:
+            return memo[bucket]
+
+        with self._lock:
+            version, memo = self._memo
+            if version != menu_snapshot.version:
+                # Нова версія меню - попередні рекомендації можуть посилатися на зняті піци
+                memo = {}
+                self._memo = (menu_snapshot.version, memo)
+            recommendation = memo.get(bucket)
+            if recommendation is None:
+                recommendation = self._build(self.table[bucket], menu_snapshot.pizzas)
+                memo[bucket] = recommendation
+            return recommendation
+
+    @staticmethod
+    def _build(rule, pizzas):
+        pizza = resolve_pizza(rule, pizzas)
+        recommendation = {'title': rule['title'], 'message': rule['message']}
+        if pizza is not None:
+            recommendation['recommended_pizza'] = pizza['name']
+            recommendation['pizza_id'] = pizza['id']
+            if rule.get('reason'):
+                recommendation['reason'] = rule['reason']
+        return recommendation
@@ -0,0 +1,16 @@
+from gevent import monkey
+monkey.patch_all()
+
+import os
+from gevent.pywsgi import WSGIServer
+
+from app import create_app
+
+# Режим для тисяч відкритих SSE-з'єднань /poll/results/stream:
+# кожен клієнт - greenlet, а не окремий потік.
+if __name__ == '__main__':
+    app = create_app()
+    host = os.getenv('HOST', '127.0.0.1')
+    port = int(os.getenv('PORT', '5000'))
+    print(f"gevent-сервер запущено на http://{host}:{port}")
+    WSGIServer((host, port), app).serve_forever()
@@ -0,0 +1,174 @@
+import atexit
+import os
+import threading
+
+from flask import current_app, has_app_context
+
+from weather_scheduler import WeatherScheduler, parse_locations
+from poll_stream import PollResultsPublisher
+from vote_buffer import VoteBuffer
+from order_queue import OrderQueue
+from kitchen_feed import KitchenFeed
+from admin_stats import CounterReconciler
+
+class AppBound:
+    # Об'єкт зі станом (кеш, ліміти, сервіси) створюється для кожного застосунку
+    # і живе в app.extensions. Модульна змінна лише перенаправляє звернення до
+    # екземпляра поточного застосунку, а поза контекстом - до останнього створеного.
+
+    def __init__(self, name, factory):
+        self._name = name
+        self._factory = factory
+        self._default_app = None
+
+    def init_app(self, app):
+        app.extensions[self._name] = self._factory(app)
+        self._default_app = app
+        return app.extensions[self._name]
+
+    def get(self, app=None):
+        if app is None:
+            app = current_app._get_current_object() if has_app_context() else self._default_app
+        return app.extensions[self._name]
+
+    def __getattr__(self, name):
+        return getattr(self.get(), name)
+
+class Services:
+    # Сервіси, що залежать від конфігурації, створюються при першому зверненні,
+    # а не при імпорті: новий воркер стартує за мить, а сервіс, який йому
+    # не знадобився (погода, черга замовлень), не коштує нічого.
+
+    def __init__(self, app, metrics, menu_cache):
+        self.app = app
+        self.metrics = metrics
+        self.menu_cache = menu_cache
+        self._instances = {}
+        self._lock = threading.RLock()
+        self._background_started = False
+        app.before_request(self.start_background)
+
+    def start_background(self):
+        # Фонові потоки запускаються з першим запитом воркера: черга дочищає
+        # замовлення після перезапуску, планувальник підтягує погоду,
+        # лічильники адмінки періодично звіряються з таблицями
+        if self._background_started:
+            return
+        with self._lock:
+            if self._background_started:
+                return
+            self._background_started = True
+            self.weather_scheduler
+            self.order_queue
+            self.counter_reconciler
+
+    @property
+    def weather_prefetch_enabled(self):
+        # " " чи ";" теж вимикають попереднє завантаження, а не ламають кожен запит
+        return bool(parse_locations(os.getenv('PIZZERIA_LOCATIONS', '')))
+
+    @property
+    def weather_service(self):
+        return self._get('weather_service', self._create_weather_service)
+
+    @property
+    def weather_scheduler(self):
+        return self._get('weather_scheduler', self._create_weather_scheduler)
+
+    @property
+    def poll_publisher(self):
+        return self._get('poll_publisher', self._create_poll_publisher)
+
+    @property
+    def vote_buffer(self):
+        return self._get('vote_buffer', self._create_vote_buffer)
+
+    @property
+    def kitchen_feed(self):
+        return self._get('kitchen_feed', self._create_kitchen_feed)
+
+    @property
+    def order_queue(self):
+        return self._get('order_queue', self._create_order_queue)
+
+    @property
+    def counter_reconciler(self):
+        return self._get('counter_reconciler', self._create_counter_reconciler)
+
+    def _get(self, name, factory):
+        if name in self._instances:
+            return self._instances[name]
+        with self._lock:
+            if name not in self._instances:
+                self._instances[name] = factory()
+            return self._instances[name]
+
+    def _create_weather_service(self):
+        # requests імпортується лише тоді, коли погода справді потрібна
+        from weather_service import WeatherService
+
+        return WeatherService(
+            api_key=os.getenv('OPENWEATHER_API_KEY', 'demo-key'),
+            city=os.getenv('PIZZERIA_CITY', 'Kyiv'),
+            country=os.getenv('PIZZERIA_COUNTRY', 'UA'),
+            base_url=os.getenv('OPENWEATHER_BASE_URL', 'https://api.openweathermap.org/data/2.5'),
+            cache_ttl=int(os.getenv('WEATHER_CACHE_TTL', '600')),
+            error_ttl=int(os.getenv('WEATHER_ERROR_TTL', '60')),
+            connect_timeout=float(os.getenv('WEATHER_CONNECT_TIMEOUT', '3.05')),
+            read_timeout=float(os.getenv('WEATHER_READ_TIMEOUT', '5')),
+            failure_threshold=int(os.getenv('WEATHER_FAILURE_THRESHOLD', '3')),
+            reset_timeout=int(os.getenv('WEATHER_RESET_TIMEOUT', '30')),
+            on_upstream_call=self.metrics.observe_weather_upstream
+        )
+
+    def _create_weather_scheduler(self):
+        if not self.weather_prefetch_enabled:
+            return None
+        scheduler = WeatherScheduler(
+            self.weather_service, parse_locations(os.getenv('PIZZERIA_LOCATIONS')),
+            interval=int(os.getenv('WEATHER_PREFETCH_INTERVAL', os.getenv('WEATHER_CACHE_TTL', '600'))),
+            snapshot_path=os.getenv('WEATHER_SNAPSHOT_PATH', os.path.join(self.app.instance_path, 'weather_snapshot.json')),
+            max_workers=int(os.getenv('WEATHER_PREFETCH_WORKERS', '4'))
+        )
+        scheduler.start()
+        return scheduler
+
+    def _create_poll_publisher(self):
+        return PollResultsPublisher(
+            self.app, self.menu_cache,
+            interval=float(os.getenv('POLL_STREAM_INTERVAL', '0.3'))
+        )
+
+    def _create_kitchen_feed(self):
+        return KitchenFeed(
+            self.app, check_interval=float(os.getenv('KITCHEN_FEED_CHECK_INTERVAL', '0.5'))
+        )
+
+    def _create_vote_buffer(self):
+        if self.app.config['POLL_VOTE_MODE'] != 'buffered':
+            return None
+        vote_buffer = VoteBuffer(
+            self.app, self.app.config['POLL_VOTE_SEEN_PATH'],
+            flush_interval=float(os.getenv('POLL_VOTE_FLUSH_INTERVAL', '0.2')),
+            flush_size=int(os.getenv('POLL_VOTE_FLUSH_SIZE', '500')),
+            on_flush=self.poll_publisher.notify
+        )
+        # Голоси з буфера дописуються в базу при штатній зупинці процесу
+        atexit.register(vote_buffer.stop)
+        return vote_buffer
+
+    def _create_order_queue(self):
+        if self.app.config['ORDER_INGESTION_MODE'] != 'queue':
+            return None
+        order_queue = OrderQueue(
+            self.app.config['ORDER_QUEUE_PATH'],
+            id_block_size=int(os.getenv('ORDER_QUEUE_ID_BLOCK', '100')),
+            on_written=self.kitchen_feed.notify
+        )
+        order_queue.start(self.app)
+        return order_queue
+
+    def _create_counter_reconciler(self):
+        reconciler = CounterReconciler(self.app, interval=self.app.config['STATS_RECONCILE_INTERVAL'])
+        reconciler.start()
+        return reconciler
@@ -0,0 +1,75 @@
+import time
+
+from app import services
+from models import db, Order, OrderItem
+from order_queue import OrderQueue
+from order_service import format_order_id
+
+CUSTOMER = {'name': 'Тест', 'phone': '+380123456789', 'address': 'вул. Тестова, 1'}
+
+def payload(phone=CUSTOMER['phone']):
+    return {
+        'customer': dict(CUSTOMER, phone=phone),
+        'items': [{'pizza_id': 1, 'quantity': 2, 'price': 250.0, 'total': 500.0}],
+        'total_amount': 500.0,
+    }
+
+def post_order(client, key=None, name=CUSTOMER['name']):
+    headers = {'Idempotency-Key': key} if key else {}
+    return client.post('/api/order', headers=headers, json={
+        'customer': dict(CUSTOMER, name=name), 'items': [{'pizza_id': 1, 'quantity': 1}]
+    })
+
+def wait_drained(app, timeout=5):
+    queue = services.get(app).order_queue
+    deadline = time.monotonic() + timeout
+    while queue.get_status()['depth'] and time.monotonic() < deadline:
+        time.sleep(0.05)
+    assert queue.get_status()['depth'] == 0
+
+def test_replay_after_crash_does_not_duplicate(app, tmp_path):
+    with app.app_context():
+        queue = OrderQueue(str(tmp_path / 'replay.db'))
+        order_ids = [queue.enqueue(payload(f'+38000000000{i}'))[0] for i in range(3)]
+        assert queue.drain_once() == 3
+
+        # Падіння між комітом в основну базу і status = 'done'
+        queue._connection().execute("UPDATE order_queue SET status = 'pending'")
+        assert queue.drain_once() == 3
+        assert queue.drain_once() == 0
+
+        assert sorted(order_id for (order_id,) in db.session.query(Order.id)) == order_ids
+        assert OrderItem.query.count() == 3
+        assert queue.stats['written'] == 3
+
+def test_retry_with_same_idempotency_key(make_app):
+    app = make_app(ORDER_INGESTION_MODE='queue')
+    client = app.test_client()
+
+    first = post_order(client, key='order-1')
+    retry = post_order(client, key='order-1')
+    other = post_order(client, key='order-2')
+    assert first.status_code == 202 and not first.get_json()['duplicate']
+    assert retry.status_code == 200 and retry.get_json()['duplicate']
+    assert retry.get_json()['order_id'] == first.get_json()['order_id']
+    assert other.get_json()['order_id'] != first.get_json()['order_id']
+
+    wait_drained(app)
+    with app.app_context():
+        assert Order.query.count() == 2
+
+def test_queued_ids_never_reused_by_sync_worker(make_app):
+    queued = make_app(ORDER_INGESTION_MODE='queue')
+    direct = make_app(ORDER_INGESTION_MODE='sync')
+
+    promised = {}
+    for app, name in [(queued, 'Аліса'), (direct, 'Богдан'), (queued, 'Вікторія'), (direct, 'Галина')]:
+        response = post_order(app.test_client(), name=name)
+        assert response.status_code in (200, 202)
+        promised[name] = response.get_json()['order_id']
+
+    assert len(set(promised.values())) == 4
+    wait_drained(queued)
+    with direct.app_context():
+        stored = {order.customer_name: format_order_id(order.id) for order in Order.query}
+    assert stored == promised
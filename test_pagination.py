@@ -0,0 +1,60 @@
+from datetime import datetime
+
+from sqlalchemy import update
+
+from models import db, Order, Pizza
+from pagination import EPOCH, keyset_page, encode_cursor, decode_cursor
+
+def add_orders(created_at_values):
+    for index, created_at in enumerate(created_at_values):
+        db.session.add(Order(
+            customer_name=f'Клієнт {index}', customer_phone='+380123456789',
+            customer_address='вул. Тестова, 1', total_amount=100,
+            status='pending' if index % 2 else 'delivered', created_at=created_at
+        ))
+    db.session.flush()
+    # Старі рядки без дати: default ORM не дає вставити NULL, тож обнуляємо окремо
+    db.session.execute(update(Order).where(Order.customer_name.in_(
+        [f'Клієнт {index}' for index, value in enumerate(created_at_values) if value is None]
+    )).values(created_at=None))
+    db.session.commit()
+
+def walk(query, model, per_page, descending=False):
+    seen, cursor = [], None
+    while True:
+        rows, cursor = keyset_page(query, model, cursor=cursor, per_page=per_page, descending=descending)
+        seen.extend(row.id for row in rows)
+        if cursor is None:
+            return seen
+
+def expected(rows, descending=False):
+    ordered = sorted(rows, key=lambda row: (row.created_at or EPOCH, row.id))
+    return [row.id for row in (reversed(ordered) if descending else ordered)]
+
+def test_cursor_for_row_without_created_at():
+    assert decode_cursor(encode_cursor(None, 7)) == (EPOCH, 7)
+
+def test_pages_cover_rows_with_null_created_at(app):
+    same_moment = datetime(2025, 3, 1, 12, 0)
+    with app.app_context():
+        add_orders([None, same_moment, None, datetime(2025, 1, 1), same_moment, None, datetime(2025, 5, 1)])
+        orders = Order.query.all()
+
+        for per_page in (1, 2, 3, 50):
+            assert walk(Order.query, Order, per_page) == expected(orders)
+            assert walk(Order.query, Order, per_page, descending=True) == expected(orders, descending=True)
+
+        delivered = Order.query.filter(Order.status == 'delivered')
+        assert walk(delivered, Order, 2, descending=True) == expected(delivered.all(), descending=True)
+
+def test_admin_pages_with_null_created_at(app):
+    with app.app_context():
+        add_orders([None, None, datetime(2025, 1, 1)])
+        db.session.execute(update(Pizza).where(Pizza.id <= 2).values(created_at=None))
+        db.session.commit()
+
+    client = app.test_client()
+    for url in ['/admin/orders?per_page=1', '/admin/orders?per_page=1&status=delivered', '/admin/pizzas?per_page=1']:
+        response = client.get(url)
+        assert response.status_code == 200
+        assert 'cursor=' in response.get_data(as_text=True)
@@ -0,0 +1,11 @@
+import pytest
+
+from pizza_search import SearchError, parse_search_params
+
+@pytest.mark.parametrize('max_price', ['nan', 'inf', '-inf', 'abc'])
+def test_invalid_max_price_rejected(max_price):
+    with pytest.raises(SearchError):
+        parse_search_params({'max_price': max_price})
+
+def test_max_price_parsed():
+    assert parse_search_params({'max_price': '250.5', 'page': '2'}) == ('', None, 250.5, 2)
@@ -0,0 +1,33 @@
+import time
+
+from poll_stream import PollResultsPublisher
+
+def make_publisher(app):
+    publisher = PollResultsPublisher(app, menu_cache=None, interval=0.01, check_interval=0.05)
+    calls = []
+    publisher._build_payload = lambda: calls.append(time.monotonic()) or str(len(calls))
+    return publisher, calls
+
+def test_idle_publisher_skips_periodic_checks(app):
+    publisher, calls = make_publisher(app)
+    publisher.notify()
+    time.sleep(0.3)
+    # Без підписників лише одна перебудова на notify(), без опитування бази
+    assert len(calls) == 1
+
+def test_subscriber_resumes_periodic_checks(app):
+    publisher, calls = make_publisher(app)
+    publisher.notify()
+    time.sleep(0.1)
+
+    stream = publisher.stream()
+    next(stream)
+    assert next(stream).startswith('event: results')
+    time.sleep(0.3)
+    assert len(calls) > 2
+
+    stream.close()
+    time.sleep(0.1)
+    idle_calls = len(calls)
+    time.sleep(0.3)
+    assert len(calls) == idle_calls
@@ -0,0 +1,68 @@
+from sqlalchemy import func
+
+from app import menu_cache
+from models import db, Pizza, PollVote, PollTally
+from poll_tally import get_tally, build_poll_results, rebuild_tally
+
+def vote(client, pizza_id, voter):
+    return client.post('/poll/vote', data={'poll_id': 1, 'pizza_id': pizza_id},
+                       environ_base={'REMOTE_ADDR': f'10.0.0.{voter}'})
+
+def group_by_results(poll_id):
+    # Запит, яким /poll/results рахував голоси до таблиці підсумків
+    rows = db.session.query(Pizza, func.count(PollVote.id).label('votes')).outerjoin(
+        PollVote, (Pizza.id == PollVote.pizza_id) & (PollVote.poll_id == poll_id)
+    ).filter(Pizza.available == True).group_by(Pizza.id).order_by(func.count(PollVote.id).desc()).all()
+
+    total_votes = sum(votes for _, votes in rows)
+    winner = next((pizza.id for pizza, votes in rows if votes > 0), None)
+    results = [
+        (pizza.id, votes, (votes / total_votes * 100) if total_votes > 0 else 0)
+        for pizza, votes in rows
+    ]
+    return results, total_votes, winner
+
+def tally_results(poll_id):
+    results, total_votes, winner = build_poll_results(menu_cache.get_pizzas(), get_tally(poll_id))
+    return (
+        [(result['pizza']['id'], result['votes'], result['percentage']) for result in results],
+        total_votes,
+        winner['id'] if winner else None
+    )
+
+def test_results_match_group_by_query(app):
+    client = app.test_client()
+    with app.app_context():
+        assert tally_results(1) == group_by_results(1)
+
+    voter = 0
+    for pizza_id, count in [(1, 5), (2, 3), (3, 2), (6, 1)]:
+        for _ in range(count):
+            voter += 1
+            assert vote(client, pizza_id, voter).status_code == 302
+    # Повторний голос з тієї ж адреси не рахується ні там, ні там
+    vote(client, 2, 1)
+
+    with app.app_context():
+        assert tally_results(1) == group_by_results(1)
+        assert tally_results(1)[1] == 11
+
+        # Знята з продажу піца зникає з результатів, як і з фільтром available
+        db.session.get(Pizza, 6).available = False
+        menu_cache.invalidate()
+        db.session.commit()
+        menu_cache.expire()
+        assert tally_results(1) == group_by_results(1)
+        assert 6 not in [pizza_id for pizza_id, _, _ in tally_results(1)[0]]
+
+def test_rebuild_matches_incremental_tally(app):
+    client = app.test_client()
+    for voter, pizza_id in enumerate([1, 1, 2, 3, 3, 3, 4]):
+        vote(client, pizza_id, voter)
+
+    with app.app_context():
+        incremental = get_tally(1)
+        db.session.execute(PollTally.__table__.delete())
+        rebuild_tally()
+        db.session.commit()
+        assert get_tally(1) == incremental == {1: 2, 2: 1, 3: 3, 4: 1}
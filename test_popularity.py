@@ -0,0 +1,74 @@
+from collections import namedtuple
+from datetime import timedelta
+
+from popularity import EPOCH, BUCKET_SECONDS, PopularityTracker, PopularitySnapshot
+
+HEAD = 6_000_000
+MenuSnapshot = namedtuple('MenuSnapshot', 'version by_id')
+
+def at_bucket(bucket):
+    return EPOCH + timedelta(seconds=bucket * BUCKET_SECONDS + 1)
+
+def make_tracker():
+    tracker = PopularityTracker()
+    tracker._head = HEAD
+    return tracker
+
+def totals(tracker):
+    return {window: dict(counter) for window, counter in tracker._totals.items()}
+
+def test_sales_leave_each_window_at_its_boundary():
+    tracker = make_tracker()
+    tracker._add(1, 2, at_bucket(HEAD))
+    tracker._add(2, 3, at_bucket(HEAD - 20))
+    assert totals(tracker) == {'1h': {1: 2}, '24h': {1: 2, 2: 3}, '7d': {1: 2, 2: 3}}
+
+    # Година - 12 кошиків: на 11-му продаж ще у вікні, на 12-му вже ні
+    assert not tracker._advance(HEAD + 11)
+    assert totals(tracker)['1h'] == {1: 2}
+    assert tracker._advance(HEAD + 12)
+    assert totals(tracker)['1h'] == {}
+
+    assert tracker._advance(HEAD + 288 - 20)
+    assert totals(tracker)['24h'] == {1: 2}
+    assert tracker._advance(HEAD + 288)
+    assert totals(tracker)['24h'] == {}
+    assert totals(tracker)['7d'] == {1: 2, 2: 3}
+
+    assert tracker._advance(HEAD + 2016 - 20)
+    assert totals(tracker)['7d'] == {1: 2}
+    assert tracker._advance(HEAD + 2016)
+    assert totals(tracker) == {'1h': {}, '24h': {}, '7d': {}}
+
+def test_reused_slot_does_not_resurrect_old_sales():
+    tracker = make_tracker()
+    tracker._add(1, 5, at_bucket(HEAD))
+    tracker._advance(HEAD + tracker.slot_count - 1)
+    # Той самий індекс кільця через тиждень: старий кошик замінюється, а не доповнюється
+    tracker._advance(HEAD + tracker.slot_count)
+    tracker._add(1, 1, at_bucket(HEAD + tracker.slot_count))
+    assert totals(tracker) == {'1h': {1: 1}, '24h': {1: 1}, '7d': {1: 1}}
+
+    tracker._advance(HEAD + tracker.slot_count + 12)
+    assert totals(tracker) == {'1h': {}, '24h': {1: 1}, '7d': {1: 1}}
+
+def test_jump_longer_than_a_week_clears_everything():
+    tracker = make_tracker()
+    tracker._add(1, 5, at_bucket(HEAD - 3))
+    assert tracker._advance(HEAD + 5000)
+    assert totals(tracker) == {'1h': {}, '24h': {}, '7d': {}}
+    assert not tracker._advance(HEAD + 10000)
+
+def test_late_sales_outside_the_week_are_ignored():
+    tracker = make_tracker()
+    tracker._add(1, 5, at_bucket(HEAD - tracker.slot_count))
+    assert totals(tracker) == {'1h': {}, '24h': {}, '7d': {}}
+
+def test_popular_ids_skip_pizzas_off_the_menu():
+    snapshot = PopularitySnapshot(1, {'1h': {}, '24h': {}, '7d': {}}, [5, 4, 3, 2, 1], top_size=3)
+    full_menu = MenuSnapshot(1, {pizza_id: {} for pizza_id in range(1, 6)})
+    assert snapshot.popular_ids(full_menu) == {5, 4, 3}
+
+    without_five = MenuSnapshot(2, {pizza_id: {} for pizza_id in range(1, 5)})
+    assert snapshot.popular_ids(without_five) == {4, 3, 2}
+    assert snapshot.is_popular({'id': 2, 'popular': False}, without_five)
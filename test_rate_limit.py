@@ -0,0 +1,22 @@
+def test_vote_limit_redirects_with_flash(make_app):
+    app = make_app(RATE_LIMIT_ENABLED=True,
+                   RATE_LIMITS={'main.poll_vote': (1, 1), 'main.create_order': (1, 1)})
+    client = app.test_client()
+
+    client.post('/poll/vote', data={'poll_id': 1, 'pizza_id': 1})
+    response = client.post('/poll/vote', data={'poll_id': 1, 'pizza_id': 2})
+    # Форма отримує redirect назад на опитування, а не JSON-сторінку
+    assert response.status_code == 302
+    assert response.headers['Location'].endswith('/poll')
+    assert 'Retry-After' in response.headers
+    assert 'Забагато запитів' in client.get('/poll').get_data(as_text=True)
+
+def test_order_limit_keeps_json(make_app):
+    app = make_app(RATE_LIMIT_ENABLED=True,
+                   RATE_LIMITS={'main.poll_vote': (1, 1), 'main.create_order': (1, 1)})
+    client = app.test_client()
+
+    client.post('/api/order', json={})
+    response = client.post('/api/order', json={})
+    assert response.status_code == 429
+    assert response.get_json()['status'] == 'error'
@@ -0,0 +1,57 @@
+import os
+
+from app import services
+from models import db, PollVote
+from poll_tally import get_tally
+from vote_buffer import VoteBuffer
+
+def vote(client, pizza_id, voter):
+    return client.post('/poll/vote', data={'poll_id': 1, 'pizza_id': pizza_id},
+                       environ_base={'REMOTE_ADDR': voter})
+
+def test_duplicate_voters_rejected_with_buffer(make_app, monkeypatch):
+    # Фоновий потік не скидає буфер сам: момент запису в базу задає тест
+    monkeypatch.setenv('POLL_VOTE_FLUSH_INTERVAL', '60')
+    app = make_app(POLL_VOTE_MODE='buffered')
+    client = app.test_client()
+
+    assert vote(client, 1, '10.0.0.1').headers['Location'].endswith('/poll/results')
+    # Голос ще в буфері
+    assert vote(client, 2, '10.0.0.1').headers['Location'].endswith('/poll')
+    assert vote(client, 2, '10.0.0.2').headers['Location'].endswith('/poll/results')
+
+    buffer_status = client.get('/api/poll/votes/buffer').get_json()
+    assert buffer_status['accepted'] == 2 and buffer_status['duplicates'] == 1
+
+    with app.app_context():
+        assert services.vote_buffer.flush() == 2
+    # Голос уже в базі: Bloom-фільтр спрацьовує, точна перевірка знаходить рядок
+    assert vote(client, 3, '10.0.0.2').headers['Location'].endswith('/poll')
+
+    with app.app_context():
+        assert get_tally(1) == {1: 1, 2: 1}
+        assert PollVote.query.count() == 2
+
+def test_stop_flushes_pending_votes(app, tmp_path):
+    seen_path = str(tmp_path / 'seen.bloom')
+    buffer = VoteBuffer(app, seen_path, flush_interval=60, flush_size=1000, capacity=1000)
+    with app.app_context():
+        for index in range(5):
+            assert buffer.submit(1, 1 + index % 2, f'10.0.1.{index}')
+        assert not buffer.submit(1, 2, '10.0.1.0')
+        assert PollVote.query.count() == 0
+        db.session.remove()
+
+    buffer.stop()
+
+    with app.app_context():
+        assert PollVote.query.count() == 5
+        assert get_tally(1) == {1: 3, 2: 2}
+    assert os.path.exists(seen_path)
+
+    # Після перезапуску фільтр з файла пам'ятає тих, хто вже голосував
+    restarted = VoteBuffer(app, seen_path, flush_interval=60, capacity=1000)
+    restarted.load_seen()
+    with app.app_context():
+        assert not restarted.submit(1, 2, '10.0.1.3')
+    restarted.stop()
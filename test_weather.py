@@ -0,0 +1,139 @@
+import threading
+import time
+
+import pytest
+
+from benchmark import FakeWeatherHandler, start_fake_weather_server
+from weather_service import WeatherService, CircuitBreaker
+from weather_scheduler import WeatherScheduler, Location
+
+@pytest.fixture
+def fake_api():
+    server, base_url = start_fake_weather_server()
+    FakeWeatherHandler.mode = 'ok'
+    FakeWeatherHandler.delay = 0
+    FakeWeatherHandler.calls = 0
+    yield base_url
+    FakeWeatherHandler.mode = 'ok'
+    FakeWeatherHandler.delay = 0
+    server.shutdown()
+
+def make_service(base_url, **options):
+    settings = dict(api_key='test', base_url=base_url, connect_timeout=0.5, read_timeout=0.5)
+    settings.update(options)
+    return WeatherService(**settings)
+
+def test_circuit_opens_after_failures_and_half_opens(fake_api):
+    FakeWeatherHandler.mode = 'error'
+    service = make_service(fake_api, failure_threshold=3, reset_timeout=0.3)
+
+    for _ in range(3):
+        assert not service.fetch_weather()['success']
+    assert service.circuit_breaker.state == CircuitBreaker.OPEN
+    assert FakeWeatherHandler.calls == 3
+
+    # Поки коло розімкнене, API не викликається
+    assert service.fetch_weather()['error'] == 'Сервіс погоди тимчасово недоступний'
+    assert FakeWeatherHandler.calls == 3
+
+    # Після паузи - один пробний запит; невдалий знову розмикає коло
+    time.sleep(0.35)
+    assert not service.fetch_weather()['success']
+    assert FakeWeatherHandler.calls == 4
+    assert service.circuit_breaker.state == CircuitBreaker.OPEN
+
+    time.sleep(0.35)
+    FakeWeatherHandler.mode = 'ok'
+    assert service.circuit_breaker.allow_request()
+    assert service.circuit_breaker.state == CircuitBreaker.HALF_OPEN
+    assert not service.circuit_breaker.allow_request()
+    service.circuit_breaker.record_failure()
+
+    time.sleep(0.35)
+    assert service.fetch_weather()['success']
+    assert service.circuit_breaker.state == CircuitBreaker.CLOSED
+
+def test_fallback_is_fast_while_upstream_hangs(fake_api):
+    FakeWeatherHandler.mode = 'hang'
+    service = make_service(
+        fake_api, cache_ttl=0, error_ttl=0,
+        connect_timeout=0.2, read_timeout=0.2, failure_threshold=3, reset_timeout=30
+    )
+
+    for _ in range(3):
+        service.get_current_weather()
+    assert service.circuit_breaker.is_open()
+
+    latencies = []
+    for _ in range(50):
+        started = time.perf_counter()
+        weather = service.get_current_weather()
+        latencies.append(time.perf_counter() - started)
+        assert not weather['success']
+    assert max(latencies) < 0.05
+    assert FakeWeatherHandler.calls == 3
+
+def test_cold_cache_single_flight(fake_api):
+    FakeWeatherHandler.delay = 0.3
+    service = make_service(fake_api, cache_ttl=60)
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(service.get_current_weather())) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(results) == 20
+    assert all(result['success'] for result in results)
+    assert FakeWeatherHandler.calls == 1
+
+def test_stale_value_served_while_one_refresh_runs(fake_api):
+    service = make_service(fake_api, cache_ttl=0.2)
+    assert service.get_current_weather()['success']
+    time.sleep(0.25)
+
+    FakeWeatherHandler.delay = 0.3
+    latencies = []
+    for _ in range(20):
+        started = time.perf_counter()
+        assert service.get_current_weather()['success']
+        latencies.append(time.perf_counter() - started)
+    assert max(latencies) < 0.05
+
+    time.sleep(0.5)
+    assert FakeWeatherHandler.calls == 2
+    assert service.get_cache_stats()['refreshes'] == 2
+
+def test_scheduler_fetches_cities_with_group_request(fake_api):
+    locations = [Location(f'Місто {i}', 'UA', 700000 + i) for i in range(3)]
+    locations.append(Location('Львів', 'UA'))
+    scheduler = WeatherScheduler(make_service(fake_api), locations)
+
+    scheduler.refresh()
+
+    # Три міста з ID - один груповий запит, місто за назвою - окремий
+    assert FakeWeatherHandler.calls == 2
+    assert scheduler.stats['group_requests'] == 1
+    for i in range(3):
+        weather = scheduler.get_weather(locations[i].key)
+        assert weather['success']
+        assert weather['city'] == f'Місто {700000 + i}'
+    assert scheduler.get_weather(locations[3].key)['city'] == 'Львів'
+
+def test_scheduler_survives_failed_initial_refresh(fake_api):
+    scheduler = WeatherScheduler(make_service(fake_api), [Location('Київ', 'UA')], interval=0.2)
+    scheduler.refresh_initial = lambda: 1 / 0
+
+    scheduler.start()
+    time.sleep(0.5)
+    scheduler.stop()
+
+    # Потік живий і повторює спробу, а не падає на порожньому розкладі
+    assert scheduler.stats['errors'] >= 2
+
+def test_blank_locations_disable_prefetch(app, monkeypatch):
+    monkeypatch.setenv('PIZZERIA_LOCATIONS', ' ; ')
+    assert app.test_client().get('/').status_code == 200
+    with pytest.raises(ValueError):
+        WeatherScheduler(None, [])
@@ -0,0 +1,204 @@
+import hashlib
+import math
+import os
+import threading
+
+from sqlalchemy import insert, tuple_
+
+from models import db, PollVote, write_lane
+from poll_tally import increment_tally
+
+class BloomFilter:
+    def __init__(self, capacity=1000000, error_rate=0.001):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, int(round(self.size / capacity * math.log(2))))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * second) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def save(self, path):
+        temporary = f'{path}.tmp'
+        with open(temporary, 'wb') as file:
+            file.write(self.bits)
+        os.replace(temporary, path)
+
+    def load(self, path):
+        with open(path, 'rb') as file:
+            bits = file.read()
+        if len(bits) != len(self.bits):
+            return False
+        self.bits = bytearray(bits)
+        return True
+
+class VoteBuffer:
+    # Голоси накопичуються в пам'яті і пишуться в poll_vote пачками.
+    # Bloom-фільтр відсіює нових голосувальників без звернення до бази;
+    # при збігу перевіряємо точно: буфер, потім база.
+
+    def __init__(self, app, seen_path, flush_interval=0.2, flush_size=500,
+                 capacity=1000000, error_rate=0.001, on_flush=None):
+        self.app = app
+        self.seen_path = seen_path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.on_flush = on_flush
+
+        self.seen = BloomFilter(capacity, error_rate)
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        self.stats = {
+            'accepted': 0,
+            'duplicates': 0,
+            'bloom_checks': 0,
+            'flushed': 0,
+            'flushes': 0,
+            'errors': 0,
+            'last_error': None,
+        }
+
+    @staticmethod
+    def _key(poll_id, voter_ip):
+        return f'{poll_id}:{voter_ip}'
+
+    def submit(self, poll_id, pizza_id, voter_ip):
+        self.start()
+        key = self._key(poll_id, voter_ip)
+        # Точна перевірка в базі - поза локом, щоб повільний запит не зупиняв
+        # інші голоси. Голос, що проскочить між перевіркою і записом, відкине _write.
+        maybe_seen = key in self.seen
+        stored = maybe_seen and key not in self._pending and self._stored(poll_id, voter_ip)
+        with self._lock:
+            if maybe_seen:
+                self.stats['bloom_checks'] += 1
+            if stored or key in self._pending:
+                self.stats['duplicates'] += 1
+                return False
+            self.seen.add(key)
+            self._pending[key] = (poll_id, pizza_id, voter_ip)
+            self.stats['accepted'] += 1
+            pending = len(self._pending)
+
+        if pending >= self.flush_size:
+            self._wakeup.set()
+        return True
+
+    def _stored(self, poll_id, voter_ip):
+        return db.session.query(PollVote.id).filter_by(
+            poll_id=poll_id, voter_ip=voter_ip
+        ).first() is not None
+
+    def flush(self):
+        with self._flush_lock:
+            with self._lock:
+                batch = self._pending
+                self._pending = {}
+            if not batch:
+                return 0
+
+            try:
+                written = self._write(list(batch.values()))
+            except Exception as e:
+                db.session.rollback()
+                with self._lock:
+                    # Повертаємо голоси в буфер, щоб не загубити їх
+                    batch.update(self._pending)
+                    self._pending = batch
+                self.stats['errors'] += 1
+                self.stats['last_error'] = str(e)
+                return 0
+
+            self.stats['flushed'] += written
+            self.stats['flushes'] += 1
+            if written and self.on_flush:
+                self.on_flush()
+            return written
+
+    def _write(self, votes):
+        keys = [(poll_id, voter_ip) for poll_id, _, voter_ip in votes]
+        with write_lane:
+            # Голоси, які інший воркер уже записав, відкидаємо одним запитом
+            existing = set(db.session.query(PollVote.poll_id, PollVote.voter_ip).filter(
+                tuple_(PollVote.poll_id, PollVote.voter_ip).in_(keys)
+            ).all())
+
+            rows = []
+            tally = {}
+            for poll_id, pizza_id, voter_ip in votes:
+                if (poll_id, voter_ip) in existing:
+                    continue
+                rows.append({'poll_id': poll_id, 'pizza_id': pizza_id, 'voter_ip': voter_ip})
+                tally[(poll_id, pizza_id)] = tally.get((poll_id, pizza_id), 0) + 1
+
+            if rows:
+                db.session.execute(insert(PollVote), rows)
+                for (poll_id, pizza_id), count in tally.items():
+                    increment_tally(poll_id, pizza_id, count)
+            db.session.commit()
+        return len(rows)
+
+    def load_seen(self):
+        if os.path.exists(self.seen_path) and self.seen.load(self.seen_path):
+            return
+        with self.app.app_context():
+            try:
+                query = db.session.query(PollVote.poll_id, PollVote.voter_ip) \
+                    .execution_options(yield_per=10000)
+                for poll_id, voter_ip in query:
+                    self.seen.add(self._key(poll_id, voter_ip))
+            finally:
+                db.session.remove()
+
+    def get_status(self):
+        with self._lock:
+            status = dict(self.stats)
+            status['pending'] = len(self._pending)
+        return status
+
+    def start(self):
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self.load_seen()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stopping.set()
+        self._wakeup.set()
+        self._thread.join(10)
+        with self.app.app_context():
+            try:
+                while self.flush():
+                    pass
+            finally:
+                db.session.remove()
+        self.seen.save(self.seen_path)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            with self.app.app_context():
+                try:
+                    self.flush()
+                finally:
+                    db.session.remove()
@@ -0,0 +1,230 @@
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+GROUP_SIZE = 20
+
+class Location:
+    def __init__(self, city, country, city_id=None):
+        self.city = city
+        self.country = country
+        self.city_id = city_id
+        self.key = re.sub(r'[^a-z0-9]+', '-', city.lower()).strip('-') or city.lower()
+
+def parse_locations(spec):
+    # "Kyiv,UA#703448;Lviv,UA" - ID міста (після #) дозволяє груповий запит
+    locations = []
+    for item in spec.split(';'):
+        item = item.strip()
+        if not item:
+            continue
+        place, _, city_id = item.partition('#')
+        city, _, country = place.partition(',')
+        locations.append(Location(city.strip(), country.strip() or 'UA', int(city_id) if city_id else None))
+    return locations
+
+class WeatherScheduler:
+    # Погода для всіх точок піцерії завантажується заздалегідь у фоні; запит
+    # лише читає готовий результат з пам'яті. Оновлення рівномірно розподілені
+    # в межах interval, щоб не впиратися в ліміти API. При кількох воркерах
+    # завантажує лише власник file-lock, інші читають снапшот з файлу.
+
+    def __init__(self, service, locations, interval=600, snapshot_path=None,
+                 max_workers=4, snapshot_check_interval=1.0):
+        if not locations:
+            raise ValueError('WeatherScheduler потребує хоча б одну точку (PIZZERIA_LOCATIONS)')
+        self.service = service
+        self.locations = {location.key: location for location in locations}
+        self.default_key = locations[0].key
+        self.interval = interval
+        self.snapshot_path = snapshot_path
+        self.max_workers = max_workers
+        self.snapshot_check_interval = snapshot_check_interval
+
+        # Задача оновлення - груповий запит на кілька ID міст або одне місто за назвою
+        grouped = [location for location in locations if location.city_id]
+        self._tasks = [
+            (self._fetch_group, grouped[start:start + GROUP_SIZE])
+            for start in range(0, len(grouped), GROUP_SIZE)
+        ] + [(self._fetch_one, [location]) for location in locations if not location.city_id]
+
+        self._results = {}
+        self._lock = threading.Lock()
+        self._due = {}
+        self._snapshot_mtime = None
+        self._snapshot_checked_at = 0.0
+        self._lock_file = None
+        self.leader = False
+        self._thread = None
+        self._stopping = threading.Event()
+        self.stats = {
+            'requests': 0,
+            'group_requests': 0,
+            'refreshed': 0,
+            'errors': 0,
+            'snapshot_loads': 0,
+        }
+
+    def resolve_key(self, key):
+        return key if key in self.locations else self.default_key
+
+    def get_weather(self, key=None):
+        self._load_snapshot_if_changed()
+        result = self._results.get(self.resolve_key(key))
+        if result is None:
+            return {'success': False, 'error': 'Дані про погоду ще завантажуються'}
+        return dict(result)
+
+    def get_status(self):
+        status = dict(self.stats)
+        status['leader'] = self.leader
+        status['locations'] = {
+            key: {
+                'success': result.get('success', False),
+                'age_seconds': round(time.time() - result['fetched_at'], 1) if 'fetched_at' in result else None,
+            }
+            for key, result in self._results.items()
+        }
+        return status
+
+    def refresh_initial(self):
+        # Спершу всі точки разом, далі кожна задача оновлюється у своїй частці інтервалу
+        self.refresh()
+        now = time.monotonic()
+        step = self.interval / len(self._tasks)
+        for index in range(len(self._tasks)):
+            self._due[index] = now + (index + 1) * step
+
+    def refresh_due(self):
+        now = time.monotonic()
+        due = [index for index, moment in self._due.items() if moment <= now]
+        if not due:
+            return 0
+        self.refresh(due)
+        for index in due:
+            self._due[index] = now + self.interval
+        return len(due)
+
+    def refresh(self, task_indexes=None):
+        tasks = [self._tasks[index] for index in task_indexes] if task_indexes else self._tasks
+        results = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for fetched in executor.map(lambda task: task[0](task[1]), tasks):
+                results.update(fetched)
+
+        fetched_at = time.time()
+        with self._lock:
+            merged = dict(self._results)
+            for key, result in results.items():
+                if result.get('success'):
+                    merged[key] = dict(result, fetched_at=fetched_at)
+                    self.stats['refreshed'] += 1
+                else:
+                    self.stats['errors'] += 1
+                    # Остання вдала погода краща за помилку
+                    if not merged.get(key, {}).get('success'):
+                        merged[key] = result
+            self._results = merged
+
+        if self.snapshot_path:
+            self._save_snapshot(merged)
+        return results
+
+    def _fetch_group(self, locations):
+        self.stats['group_requests'] += 1
+        by_id = self.service.fetch_weather_group([location.city_id for location in locations])
+        return {
+            location.key: by_id.get(location.city_id, {
+                'success': False, 'error': f'Немає даних для міста {location.city}'
+            })
+            for location in locations
+        }
+
+    def _fetch_one(self, locations):
+        self.stats['requests'] += 1
+        location = locations[0]
+        return {location.key: self.service.fetch_weather(location.city, location.country)}
+
+    def _save_snapshot(self, results):
+        temporary = f'{self.snapshot_path}.{os.getpid()}.tmp'
+        with open(temporary, 'w') as file:
+            json.dump(results, file, ensure_ascii=False)
+        os.replace(temporary, self.snapshot_path)
+
+    def _read_snapshot(self):
+        try:
+            mtime = os.stat(self.snapshot_path).st_mtime_ns
+            if mtime == self._snapshot_mtime:
+                return
+            with open(self.snapshot_path) as file:
+                results = json.load(file)
+        except (OSError, ValueError):
+            return
+        with self._lock:
+            self._results = results
+            self._snapshot_mtime = mtime
+            self.stats['snapshot_loads'] += 1
+
+    def _load_snapshot_if_changed(self):
+        if not self.snapshot_path or self.leader:
+            return
+        now = time.monotonic()
+        if now - self._snapshot_checked_at < self.snapshot_check_interval:
+            return
+        self._snapshot_checked_at = now
+        self._read_snapshot()
+
+    def _try_become_leader(self):
+        if self.leader:
+            return True
+        if self.snapshot_path and fcntl is not None:
+            lock_file = open(f'{self.snapshot_path}.lock', 'a')
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                lock_file.close()
+                return False
+            self._lock_file = lock_file
+            # Новий власник продовжує з даних попереднього, а не з порожнього кешу
+            self._read_snapshot()
+        # Без снапшота кожен процес завантажує погоду сам
+        self.leader = True
+        return True
+
+    def start(self):
+        if self._thread is not None:
+            return
+        directory = os.path.dirname(os.path.abspath(self.snapshot_path)) if self.snapshot_path else None
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5):
+        self._stopping.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self):
+        while not self._stopping.is_set():
+            if self._try_become_leader():
+                try:
+                    if not self._due:
+                        self.refresh_initial()
+                    else:
+                        self.refresh_due()
+                except Exception:
+                    self.stats['errors'] += 1
+                # Початкове завантаження впало до розкладу - повтор через interval
+                next_due = min(self._due.values(), default=time.monotonic() + self.interval) - time.monotonic()
+                self._stopping.wait(min(max(next_due, 0.05), self.interval))
+            else:
+                self._stopping.wait(self.snapshot_check_interval)
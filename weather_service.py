@@ -1,39 +1,233 @@
 import requests
 import os
+import threading
+import time
 from datetime import datetime
+from requests.adapters import HTTPAdapter
+
+class CircuitBreaker:
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=3, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            if self.state == self.OPEN:
+                if time.monotonic() - self.opened_at < self.reset_timeout:
+                    return False
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            # У стані half-open пропускаємо лише один пробний запит
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def is_open(self):
+        with self._lock:
+            return self.state == self.OPEN and time.monotonic() - self.opened_at < self.reset_timeout
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
 
 class WeatherService:
-    def __init__(self, api_key, city='Kyiv', country='UA'):
+    def __init__(self, api_key, city='Kyiv', country='UA',
+                 base_url='https://api.openweathermap.org/data/2.5',
+                 cache_ttl=600, error_ttl=60,
+                 connect_timeout=3.05, read_timeout=5, pool_size=10,
+                 failure_threshold=3, reset_timeout=30, on_upstream_call=None):
         self.api_key = api_key
         self.city = city
         self.country = country
-        self.base_url = 'https://api.openweathermap.org/data/2.5'
-    
+        self.base_url = base_url
+        self.cache_ttl = cache_ttl
+        self.error_ttl = error_ttl
+        self.timeout = (connect_timeout, read_timeout)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.circuit_breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.on_upstream_call = on_upstream_call
+        # В асинхронному режимі API опитує event loop, а запит лише читає кеш
+        self.fetch_on_miss = True
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._last_good = None
+        self._last_good_at = 0.0
+        self._last_error = None
+        self._last_error_at = 0.0
+        self._refreshing = False
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'refresh_errors': 0,
+            'refresh_latency_total': 0.0,
+            'refresh_latency_last': 0.0,
+        }
+
     def get_current_weather(self):
+        cached, stale = self.peek()
+        if cached is not None:
+            if stale:
+                self._start_background_refresh()
+            return cached
+        if not self.fetch_on_miss:
+            return {'success': False, 'error': 'Дані про погоду ще завантажуються'}
+
+        # Немає жодного значення в кеші: перший запит чекає на оновлення,
+        # а паралельні запити чекають на той самий запит (single-flight).
+        with self._refresh_lock:
+            with self._lock:
+                if self._last_good is not None:
+                    return dict(self._last_good)
+                if self._last_error is not None and time.monotonic() - self._last_error_at < self.error_ttl:
+                    return dict(self._last_error)
+            return dict(self._refresh())
+
+    def peek(self, record=True):
+        # Значення з кешу без звернення до API: (погода або None, чи потрібне оновлення)
+        now = time.monotonic()
+        with self._lock:
+            if self._last_good is not None:
+                fresh = now - self._last_good_at < self.cache_ttl
+                if record:
+                    self.stats['hits' if fresh else 'stale_hits'] += 1
+                return dict(self._last_good), not fresh
+
+            if self._last_error is not None and now - self._last_error_at < self.error_ttl:
+                if record:
+                    self.stats['hits'] += 1
+                return dict(self._last_error), False
+
+            if record:
+                self.stats['misses'] += 1
+            return None, True
+
+    def get_cache_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+        refreshes = stats['refreshes']
+        stats['refresh_latency_avg'] = stats['refresh_latency_total'] / refreshes if refreshes else 0.0
+        return stats
+
+    def begin_refresh(self):
+        # Не більше одного фонового оновлення одночасно, хоч з потоку, хоч з event loop
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+            return True
+
+    def end_refresh(self):
+        with self._lock:
+            self._refreshing = False
+
+    def _start_background_refresh(self):
+        if not self.begin_refresh():
+            return
+        thread = threading.Thread(target=self._background_refresh, daemon=True)
+        thread.start()
+
+    def _background_refresh(self):
         try:
-            url = f"{self.base_url}/weather"
-            params = {
-                'q': f"{self.city},{self.country}",
-                'appid': self.api_key,
-                'units': 'metric',
-                'lang': 'uk'
+            with self._refresh_lock:
+                self._refresh()
+        finally:
+            self.end_refresh()
+
+    def _refresh(self):
+        started = time.monotonic()
+        result = self.fetch_weather()
+        return self.store_result(result, time.monotonic() - started)
+
+    def store_result(self, result, elapsed):
+        with self._lock:
+            self.stats['refreshes'] += 1
+            self.stats['refresh_latency_total'] += elapsed
+            self.stats['refresh_latency_last'] = elapsed
+
+            if result.get('success'):
+                self._last_good = result
+                self._last_good_at = time.monotonic()
+                self._last_error = None
+                return result
+
+            self.stats['refresh_errors'] += 1
+            if self._last_good is not None:
+                # Залишаємо останнє вдале значення, але не пробуємо знову одразу
+                self._last_good_at = time.monotonic() - self.cache_ttl + self.error_ttl
+                return self._last_good
+
+            self._last_error = result
+            self._last_error_at = time.monotonic()
+            return result
+
+    def fetch_weather(self, city=None, country=None):
+        query = f"{city or self.city},{country or self.country}"
+        return self._call('weather', {'q': query}, parse_weather)
+
+    def fetch_weather_group(self, city_ids):
+        # Один запит на кілька міст (до 20 ID) через груповий ендпоінт OpenWeather
+        result = self._call('group', {'id': ','.join(str(city_id) for city_id in city_ids)}, parse_weather_group)
+        if not result.get('success'):
+            return {city_id: result for city_id in city_ids}
+        return result['cities']
+
+    def _call(self, endpoint, params, parse):
+        if not self.circuit_breaker.allow_request():
+            return {
+                'success': False,
+                'error': 'Сервіс погоди тимчасово недоступний'
             }
+
+        started = time.monotonic()
+        result = self._request(endpoint, params, parse)
+        if self.on_upstream_call:
+            self.on_upstream_call(time.monotonic() - started, result.get('success', False))
+        if result.get('success'):
+            self.circuit_breaker.record_success()
+        else:
+            self.circuit_breaker.record_failure()
+        return result
+
+    def build_request(self, endpoint, params):
+        return f"{self.base_url}/{endpoint}", dict(params, appid=self.api_key, units='metric', lang='uk')
+
+    def _request(self, endpoint, params, parse):
+        try:
+            url, params = self.build_request(endpoint, params)
             
-            response = requests.get(url, params=params, timeout=10)
+            response = self.session.get(url, params=params, timeout=self.timeout)
             response.raise_for_status()
             
-            data = response.json()
-            
-            return {
-                'success': True,
-                'temperature': round(data['main']['temp']),
-                'description': data['weather'][0]['description'].capitalize(),
-                'icon': data['weather'][0]['icon'],
-                'humidity': data['main']['humidity'],
-                'wind_speed': round(data['wind']['speed']),
-                'feels_like': round(data['main']['feels_like']),
-                'city': data['name']
-            }
+            return parse(response.json())
             
         except requests.exceptions.RequestException as e:
             return {
@@ -50,60 +244,25 @@ class WeatherService:
                 'success': False,
                 'error': f'Загальна помилка: {str(e)}'
             }
-    
-    def get_pizza_recommendation(self, weather_data):
-        if not weather_data.get('success'):
-            return {
-                'title': '🍕 Завжди гарний час для піци!',
-                'message': 'Незалежно від погоди, наші піци завжди смачні!',
-                'recommended_pizza': 'Маргарита'
-            }
-        
-        temp = weather_data.get('temperature', 20)
-        description = weather_data.get('description', '').lower()
 
-        if temp >= 25:
-            return {
-                'title': '🌞 Спекотна погода!',
-                'message': 'В таку жару рекомендуємо легкі піци з овочами та свіжими інгредієнтами.',
-                'recommended_pizza': 'Овочева',
-                'reason': 'Легка та освіжаюча'
-            }
-        elif temp <= 5:
-            return {
-                'title': '❄️ Холодно на вулиці!',
-                'message': 'Зігрійтеся нашими ситними м\'ясними піцами!',
-                'recommended_pizza': 'М\'ясна',
-                'reason': 'Ситна та зігрівальна'
-            }
-        elif 'дощ' in description or 'rain' in description:
-            return {
-                'title': '🌧️ Дощова погода!',
-                'message': 'В дощову погоду немає нічого кращого за класичну піцу з доставкою додому!',
-                'recommended_pizza': 'Пепероні',
-                'reason': 'Класика для затишку'
-            }
-        elif 'сніг' in description or 'snow' in description:
-            return {
-                'title': '❄️ Сніжна погода!',
-                'message': 'Снігопад - ідеальний час для гарячої піци з багатьма сирами!',
-                'recommended_pizza': 'Кватро Формаджі',
-                'reason': 'Гаряча та сирна'
-            }
-        elif 'хмарно' in description or 'cloud' in description:
-            return {
-                'title': '☁️ Хмарна погода!',
-                'message': 'Похмурий день стане яскравішим з нашою яскравою Гавайською піцою!',
-                'recommended_pizza': 'Гавайська',
-                'reason': 'Яскрава та смачна'
-            }
-        else:
-            return {
-                'title': '🌤️ Чудова погода!',
-                'message': 'В таку погоду ідеально підійде наша популярна Маргарита!',
-                'recommended_pizza': 'Маргарита',
-                'reason': 'Класична та улюблена'
-            }
+def parse_weather(data):
+    return {
+        'success': True,
+        'temperature': round(data['main']['temp']),
+        'description': data['weather'][0]['description'].capitalize(),
+        'icon': data['weather'][0]['icon'],
+        'condition_id': data['weather'][0]['id'],
+        'humidity': data['main']['humidity'],
+        'wind_speed': round(data['wind']['speed']),
+        'feels_like': round(data['main']['feels_like']),
+        'city': data['name']
+    }
+
+def parse_weather_group(data):
+    return {
+        'success': True,
+        'cities': {item['id']: parse_weather(item) for item in data['list']}
+    }
 
 def get_weather_icon_emoji(icon_code):
     icon_map = {